@@ -0,0 +1,49 @@
+#=====================================================
+# File: /scripts/build_ch.py
+#=====================================================
+
+import os
+import sys
+import time
+import logging
+
+# Append the project root directory to sys.path so that the src package can be imported.
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from src.core import graph_service
+
+# Configure basic logging settings for displaying informational messages.
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    # Usage: python scripts/build_ch.py [city_filename ...]
+    # Without arguments an index is built for every city in city_options.json.
+    # Each index is written next to its graph as cities/<name>.ch.npz, and the
+    # ALT landmarks as cities/<name>.alt.npz.
+    filenames = sys.argv[1:] or list(graph_service.city_options.values())
+
+    failed = []
+    for city_filename in filenames:
+        if not graph_service.load_graph(city_filename):
+            failed.append(city_filename)
+            continue
+        start = time.perf_counter()
+        ch = graph_service.get_contraction_hierarchy(graph_service.G)
+        if ch is None:
+            failed.append(city_filename)
+            continue
+        logger.info(f"{city_filename}: CH index ready in {time.perf_counter() - start:.1f}s.")
+
+        start = time.perf_counter()
+        alt = graph_service.get_landmarks(graph_service.G)
+        if alt is None:
+            failed.append(city_filename)
+            continue
+        logger.info(f"{city_filename}: landmarks ready in {time.perf_counter() - start:.1f}s.")
+
+    if failed:
+        logger.error(f"Failed: {', '.join(failed)}")
+        exit(1)
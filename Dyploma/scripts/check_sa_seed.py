@@ -0,0 +1,44 @@
+#=====================================================
+# File: /scripts/check_sa_seed.py
+#=====================================================
+
+import os
+import sys
+import time
+import logging
+
+import numpy as np
+
+# Append the project root directory to sys.path so that the src package can be imported.
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from src.core.algorithms import solve_tsp
+
+# Configure basic logging settings for displaying informational messages.
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    # Usage: python scripts/check_sa_seed.py [points] [runs]
+    # Solves the same random instance several times with one seed and checks
+    # that Simulated Annealing returns the same route every time.
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rng = np.random.default_rng(0)
+    points = rng.random((n, 2)) * 10000.0
+    dist = np.sqrt(((points[:, None, :] - points[None, :, :]) ** 2).sum(axis=-1))
+    node_ids = [str(i) for i in range(n)]
+
+    routes = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = solve_tsp(dist, node_ids, 'Simulated Annealing', seed=7)
+        logger.info(f"{n} points: {result['status']} in {time.perf_counter() - start:.2f}s.")
+        routes.append(result.get('route'))
+
+    if any(route != routes[0] for route in routes):
+        logger.error("Seeded Simulated Annealing returned different routes.")
+        exit(1)
+    logger.info(f"Seeded Simulated Annealing returned the same route in {runs} runs.")
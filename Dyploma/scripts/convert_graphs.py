@@ -0,0 +1,67 @@
+#=====================================================
+# File: /scripts/convert_graphs.py
+#=====================================================
+
+import os
+import sys
+import time
+import logging
+import osmnx as ox
+
+# Append the project root directory to sys.path so that the src package can be imported.
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+from src.core.graph_store import binary_path_for, save_graph_binary
+
+# Configure basic logging settings for displaying informational messages.
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def convert_graph(filepath: str) -> bool:
+    """
+    Convert a single .graphml file into the pre-serialized binary format
+    that graph_service.load_graph prefers at startup and on city switches.
+    The .npz file is written next to the .graphml file.
+
+    Args:
+        filepath (str): Path to the .graphml file.
+
+    Returns:
+        bool: True on success, False on failure.
+    """
+    target = binary_path_for(filepath)
+    logger.info(f"Converting {filepath} -> {target}...")
+    try:
+        start = time.perf_counter()
+        G = ox.load_graphml(filepath)
+        if not G.is_directed():
+            G = G.to_directed()
+        save_graph_binary(G, target)
+        logger.info(f"Converted in {time.perf_counter() - start:.1f}s "
+                    f"({G.number_of_nodes()} nodes, {G.number_of_edges()} edges).")
+        return True
+    except Exception as e:
+        logger.error(f"Error converting {filepath}: {e}")
+        return False
+
+if __name__ == '__main__':
+    # Usage: python scripts/convert_graphs.py [file.graphml ...]
+    # Without arguments every .graphml file in the 'cities' directory is converted.
+    directory = 'cities'
+
+    files = sys.argv[1:]
+    if not files:
+        if not os.path.isdir(directory):
+            logger.error(f"Directory {directory} not found.")
+            exit(1)
+        files = [
+            os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name.endswith('.graphml')
+        ]
+
+    failed = [f for f in files if not convert_graph(f)]
+    if failed:
+        exit(1)
@@ -2,10 +2,10 @@
 # File: /src/app/routes.py
 #=====================================================
 
+import os
 import random
 import math
 import networkx as nx
-from shapely.geometry import box
 from geopy.geocoders import Nominatim
 from flask import (
     request, jsonify, render_template,
@@ -14,7 +14,9 @@ from flask import (
 
 # Our internal modules
 from src.core import graph_service
-from src.core.algorithms import calculate_route
+from src.core.algorithms import calculate_route, get_search_stats
+from src.core.csr_graph import reset_search_stats
+from src.core.jobs import CANCELLED, DONE, FAILED, job_queue, route_job
 
 # Create a Blueprint for the main application routes.
 routes_bp = Blueprint("routes_bp", __name__)
@@ -35,15 +37,24 @@ def map_page():
     - Provides a dropdown list of available cities
     - Provides a dropdown list of available TSP algorithms
     """
-    graph_service.selected_points.clear()
+    graph_service.clear_selection()
 
     algorithms = [
         'Christofides Algorithm',
         'Greedy Algorithm',
         'Nearest Neighbor',
+        'Nearest Insertion',
+        'Farthest Insertion',
+        'Cheapest Insertion',
         'Simulated Annealing',
         '2-opt Heuristic',
-        'Brute Force'
+        'Or-opt Heuristic',
+        'Or-3opt Heuristic',
+        'Lin-Kernighan Heuristic',
+        'Portfolio',
+        'Brute Force',
+        'Branch and Bound',
+        'Exact (DP)'
     ]
     return render_template(
         'map.html',
@@ -78,8 +89,12 @@ def load_city_route():
         city_filename = graph_service.city_options[city_name]
         if graph_service.load_graph(city_filename):
             graph_service.current_city = city_name
-            graph_service.selected_points.clear()
-            return jsonify({'status': 'success'})
+            graph_service.clear_selection()
+            city_key = os.path.splitext(city_filename)[0]
+            return jsonify({
+                'status': 'success',
+                'tile_url': f'/tiles/{city_key}/edges/{{z}}/{{x}}/{{y}}.json'
+            })
     return jsonify({'status': 'error'})
 
 
@@ -90,9 +105,11 @@ def get_edges_in_bounds():
 
     The frontend sends a bounding box (north, south, east, west) and zoom level.
     If the zoom is below a certain threshold, we return an empty list for performance.
-    Otherwise, we filter the edges_gdf based on intersection with the bounding box.
+    Otherwise, the edges come from the city's level-of-detail tiles: low zooms
+    only get major roads with simplified geometry, and the payload size is
+    bounded at every zoom.
     """
-    if graph_service.edges_gdf is None:
+    if graph_service.tile_pyramid is None:
         return jsonify([])
 
     req = request.get_json()
@@ -103,28 +120,37 @@ def get_edges_in_bounds():
     if zoom < 2:
         return jsonify([])
 
-    # Construct a shapely box for the bounding area.
-    bbox = box(bounds['west'], bounds['south'], bounds['east'], bounds['north'])
-    # Filter the edges to only those that intersect with the bounding box.
-    edges_in_bounds = graph_service.edges_gdf[
-        graph_service.edges_gdf.intersects(bbox)
-    ]
-
-    edges_list = []
-    for _, row in edges_in_bounds.iterrows():
-        # The geometry is typically a LineString. We extract its coordinates.
-        coords = [(pt[1], pt[0]) for pt in row['geometry'].coords]
-        edges_list.append({'coords': coords})
+    edges_list = graph_service.tile_pyramid.edges_in_bounds(
+        bounds['west'], bounds['south'], bounds['east'], bounds['north'], zoom
+    )
     return jsonify(edges_list)
 
 
+@routes_bp.route('/tiles/<city_key>/edges/<int:z>/<int:x>/<int:y>.json', methods=['GET'])
+def get_edge_tile(city_key, z, x, y):
+    """
+    Serves a single level-of-detail edge tile of a loaded city.
+    Tiles never change while the city file is unchanged, so they can be
+    cached by the browser or a proxy.
+    """
+    pyramid = graph_service.get_tile_pyramid(city_key)
+    if pyramid is None:
+        return jsonify({'status': 'error', 'message': 'City not loaded'}), 404
+    if not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({'status': 'error', 'message': 'Invalid tile'}), 400
+
+    response = jsonify(pyramid.tile_json(z, x, y))
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+
 @routes_bp.route('/get_nodes_in_bounds', methods=['POST'])
 def get_nodes_in_bounds():
     """
     Returns a list of nodes that lie within the current map bounding box.
-    Similar logic to get_edges_in_bounds but for nodes_gdf.
+    Similar logic to get_edges_in_bounds but for the node index.
     """
-    if graph_service.nodes_gdf is None:
+    if graph_service.spatial_index is None:
         return jsonify([])
 
     req = request.get_json()
@@ -134,19 +160,9 @@ def get_nodes_in_bounds():
     if zoom < 2:
         return jsonify([])
 
-    bbox = box(bounds['west'], bounds['south'], bounds['east'], bounds['north'])
-    nodes_in_bounds = graph_service.nodes_gdf[
-        graph_service.nodes_gdf.intersects(bbox)
-    ]
-
-    nodes_list = []
-    for node_id, row in nodes_in_bounds.iterrows():
-        nodes_list.append({
-            'id': str(node_id),
-            'lat': row['y'],
-            'lon': row['x']
-        })
-    return jsonify(nodes_list)
+    index = graph_service.spatial_index
+    positions = index.query_nodes(bounds['west'], bounds['south'], bounds['east'], bounds['north'])
+    return jsonify(index.nodes_to_json(positions))
 
 
 @routes_bp.route('/select_point', methods=['POST'])
@@ -183,6 +199,8 @@ def select_point_route():
         return jsonify({'status': 'error','message':'Point already selected'})
 
     graph_service.selected_points.append({'id': node_id, 'lat': lat, 'lon': lon})
+    # Start computing the new row and column of the distance matrix right away.
+    graph_service.selection.add(node_id)
     # If we exceed WARNING_THRESHOLD, we may return a warning to the user.
     if len(graph_service.selected_points) == (WARNING_THRESHOLD + 1):
         return jsonify({
@@ -209,6 +227,7 @@ def deselect_point():
     )
     if existing:
         graph_service.selected_points.remove(existing)
+        graph_service.selection.remove(node_id)
         return jsonify({'status':'success','action':'deselected'})
     return jsonify({'status':'error','message':'Point was not selected'})
 
@@ -226,7 +245,7 @@ def clear_selected_points_route():
     """
     Clears the list of selected points. Useful if the user changes cities or resets the map.
     """
-    graph_service.selected_points.clear()
+    graph_service.clear_selection()
     return jsonify({'status':'success'})
 
 
@@ -245,7 +264,7 @@ def select_random_points():
     if count > len(nodes):
         return jsonify({'status':'error','message':'Not enough nodes in graph'})
 
-    graph_service.selected_points.clear()
+    graph_service.clear_selection()
     chosen = random.sample(nodes, count)
     points_list = []
     for n in chosen:
@@ -253,6 +272,7 @@ def select_random_points():
         lon = graph_service.G.nodes[n]['x']
         node_id = str(n)
         graph_service.selected_points.append({'id':node_id,'lat':lat,'lon':lon})
+        graph_service.selection.add(node_id)
         points_list.append({'id':node_id,'lat':lat,'lon':lon})
 
     return jsonify({'status':'success','points':points_list})
@@ -289,24 +309,129 @@ def calculate_route_route():
       - node_ids: list of node IDs
       - algorithm: a string specifying which algorithm to use
       - num_trucks: if VRP is supported, how many vehicles to deploy
+      - routing (optional): shortest path engine, 'dijkstra' (default), 'ch' or 'alt'
+      - seed (optional): seed for the randomized algorithms
+      - time_limit_ms (optional): time budget; the improvement algorithms then
+        return their best route so far with 'truncated': true if cut short
     """
     if graph_service.G is None:
         return jsonify({'status':'error','message':'Graph not loaded'})
 
-    data = request.get_json()
-    node_ids = [str(n) for n in data['node_ids']]
-    algo = data.get('algorithm', 'Christofides Algorithm')
-    num_trucks = int(data.get('num_trucks', 1))
-
-    result = calculate_route(
-        graph_service.G,
-        node_ids,
-        algo,
-        num_trucks=num_trucks
-    )
+    result = calculate_route(graph_service.G, **_route_arguments(request.get_json()))
     return jsonify(result)
 
 
+def _route_arguments(data):
+    # calculate_route() arguments of a /calculate_route request body.
+    time_limit_ms = data.get('time_limit_ms')
+    return {
+        'node_ids': [str(n) for n in data['node_ids']],
+        'algorithm': data.get('algorithm', 'Christofides Algorithm'),
+        'num_trucks': int(data.get('num_trucks', 1)),
+        'routing': data.get('routing', 'dijkstra'),
+        'seed': data.get('seed'),
+        'time_limit_ms': float(time_limit_ms) if time_limit_ms is not None else None
+    }
+
+
+@routes_bp.route('/jobs/calculate_route', methods=['POST'])
+def submit_route_job():
+    """
+    Queue a /calculate_route computation (same JSON body) as a background job
+    and return its 'job_id' at once (HTTP 202). Poll /jobs/<job_id> for the
+    state and /jobs/<job_id>/result for the route. Returns HTTP 429 if too
+    many jobs are already waiting.
+    """
+    if graph_service.G is None:
+        return jsonify({'status':'error','message':'Graph not loaded'}), 400
+
+    job = job_queue.submit(route_job, graph_service.G, **_route_arguments(request.get_json()))
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Too many queued jobs (max {job_queue.max_queued}), try again later'
+        }), 429
+    return jsonify({'status': 'success', 'job_id': job.id, 'state': job.state}), 202
+
+
+@routes_bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Return the state of a job: 'queued' (with its 'queue_position'),
+    'running' (with the solver 'progress'), 'done', 'failed' or 'cancelled',
+    plus its submit/start/finish timestamps.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Unknown job {job_id}'}), 404
+    return jsonify({
+        'status': 'success',
+        'job': dict(job.to_dict(), queue_position=job_queue.position(job))
+    })
+
+
+@routes_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """
+    Return the /calculate_route response of a finished job. While the job is
+    queued or running, returns HTTP 202 with {'status': 'pending', 'state'}.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Unknown job {job_id}'}), 404
+    if job.state == DONE:
+        return jsonify(job.result)
+    if job.state == FAILED:
+        return jsonify({'status': 'error', 'message': f'Job failed: {job.error}'})
+    if job.state == CANCELLED:
+        return jsonify({'status': 'error', 'message': 'Job cancelled'})
+    return jsonify({'status': 'pending', 'state': job.state}), 202
+
+
+@routes_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancel a job. A queued job is dropped at once; a running solver process
+    is stopped shortly after, and the job then becomes 'cancelled'.
+    """
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Unknown job {job_id}'}), 404
+    return jsonify({'status': 'success', 'job': job.to_dict()})
+
+
+@routes_bp.route('/jobs', methods=['GET'])
+def job_queue_stats():
+    """
+    Return the number of queued and running jobs and the queue limits.
+    """
+    return jsonify({'status': 'success', 'jobs': job_queue.stats()})
+
+
+@routes_bp.route('/routing_stats', methods=['GET'])
+def routing_stats_route():
+    """
+    Return the shortest path search counters and the hit/miss statistics
+    of the shared path cache.
+    """
+    return jsonify({
+        'status': 'success',
+        'search': get_search_stats(),
+        'path_cache': graph_service.path_cache.stats()
+    })
+
+
+@routes_bp.route('/routing_stats/reset', methods=['POST'])
+def reset_routing_stats_route():
+    """
+    Reset the shortest path search counters and the hit/miss counters of the
+    shared path cache (the cached paths themselves are kept).
+    """
+    reset_search_stats()
+    graph_service.path_cache.reset_stats()
+    return jsonify({'status': 'success'})
+
+
 @routes_bp.route('/get_neighbors', methods=['POST'])
 def get_neighbors_route():
     """
@@ -27,9 +27,18 @@ var tspAlgos = [
   'Christofides Algorithm',
   'Greedy Algorithm',
   'Nearest Neighbor',
+  'Nearest Insertion',
+  'Farthest Insertion',
+  'Cheapest Insertion',
   'Simulated Annealing',
   '2-opt Heuristic',
-  'Brute Force'
+  'Or-opt Heuristic',
+  'Or-3opt Heuristic',
+  'Lin-Kernighan Heuristic',
+  'Portfolio',
+  'Brute Force',
+  'Branch and Bound',
+  'Exact (DP)'
 ];
 var vrpAlgos = [
   'Clarke & Wright Savings'
@@ -26,14 +26,23 @@ document.addEventListener('DOMContentLoaded', function() {
     window._bigTestResults = [];
   }
 
-  // Color map for 6 algorithms (Brute Force = brown)
+  // Color map for the algorithms (Brute Force = brown)
   const ALGO_COLORS = {
     "Christofides Algorithm": "purple",
     "Greedy Algorithm":       "green",
     "Nearest Neighbor":       "blue",
+    "Nearest Insertion":      "gray",
+    "Farthest Insertion":     "gold",
+    "Cheapest Insertion":     "cyan",
     "Simulated Annealing":    "red",
     "2-opt Heuristic":        "orange",
-    "Brute Force":            "brown"
+    "Or-opt Heuristic":       "teal",
+    "Or-3opt Heuristic":      "magenta",
+    "Lin-Kernighan Heuristic": "navy",
+    "Portfolio":              "pink",
+    "Brute Force":            "brown",
+    "Branch and Bound":       "olive",
+    "Exact (DP)":             "black"
   };
 
   // -------------------------------------------------------------------------
@@ -63,6 +72,48 @@ document.addEventListener('DOMContentLoaded', function() {
     return res;
   }
 
+  // Runs /run_all_algos_stream and calls onEvent for every NDJSON event as it
+  // arrives. Resolves to the same shape as /run_all_algos
+  // ({status, results, lower_bound, warnings}).
+  async function runAllAlgosStreamed(body, onEvent) {
+    const resp = await fetch('/run_all_algos_stream', {
+      method:'POST',
+      headers:{ 'Content-Type':'application/json'},
+      body: JSON.stringify(body)
+    });
+    if (!(resp.headers.get('Content-Type') || '').includes('ndjson')) {
+      return resp.json();   // Selection error
+    }
+    const out = { status: 'success', results: [], lower_bound: null, warnings: [] };
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    const handle = line => {
+      if (!line.trim()) return;
+      const ev = JSON.parse(line);
+      if (ev.event === 'start') {
+        out.warnings = ev.warnings || [];
+      } else if (ev.event === 'result') {
+        out.results.push(ev);
+      } else if (ev.event === 'done') {
+        out.lower_bound = ev.lower_bound;
+        out.lower_bound_time_sec = ev.lower_bound_time_sec;
+        out.results.forEach(res => Object.assign(res, (ev.ratings || {})[res.algorithm] || {}));
+      }
+      if (onEvent) onEvent(ev);
+    };
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffered += decoder.decode(value, { stream: true });
+      const lines = buffered.split('\n');
+      buffered = lines.pop();
+      lines.forEach(handle);
+    }
+    handle(buffered);
+    return out;
+  }
+
   // -------------------------------------------------------------------------
   // 2) Buttons: Analysis, Advanced Stats, Batch Testing
   // -------------------------------------------------------------------------
@@ -208,13 +259,18 @@ document.addEventListener('DOMContentLoaded', function() {
           console.error('Error /select_random_points:', selResp.message);
           break;
         }
-        let runResp = await fetch('/run_all_algos', {
-          method:'POST',
-          headers:{ 'Content-Type':'application/json'},
-          body: JSON.stringify({ algos: selectedAlgos })
-        }).then(rr=>rr.json());
+        // Streamed, so the progress text follows the algorithms as they run.
+        let runResp = await runAllAlgosStreamed({ algos: selectedAlgos }, ev => {
+          if (!textEl) return;
+          if (ev.event === 'progress') {
+            const pct = (ev.fraction != null) ? ` ${(ev.fraction*100).toFixed(0)}%` : '';
+            textEl.textContent = `${r-1} / ${repeats} — ${ev.algorithm}${pct}`;
+          } else if (ev.event === 'result') {
+            textEl.textContent = `${r-1} / ${repeats} — ${ev.algorithm} done`;
+          }
+        });
         if (runResp.status!=='success') {
-          console.error('Error /run_all_algos:', runResp.message);
+          console.error('Error /run_all_algos_stream:', runResp.message);
           break;
         }
         let resultsArr = runResp.results||[];
@@ -526,9 +582,11 @@ document.addEventListener('DOMContentLoaded', function() {
 
     for (let n=2; n<=maxPoints; n++){
       const BF_THRESHOLD=10;
+      const DP_THRESHOLD=21;
       const SA_MIN=4;
       let filtered = selectedAlgos.filter(a=>{
         if (a==="Brute Force" && n>BF_THRESHOLD) return false;
+        if (a==="Exact (DP)" && n>DP_THRESHOLD) return false;
         if (a==="Simulated Annealing" && n<SA_MIN) return false;
         return true;
       });
@@ -580,6 +638,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 compute_time_sec: ar.compute_time_sec,
                 expansions: ar.expansions||0,
                 ratio:      ar.heuristic_ratio||1.0,
+                gap:        ar.optimality_gap,
                 num_nodes:  ar.num_nodes||n
               });
             });
@@ -3,21 +3,54 @@
 # File: /src/app/test_routes.py
 #=====================================================
 
+import json
 import time
 import random
 import math
 import networkx as nx
-from flask import Blueprint, request, jsonify, render_template
+from flask import Blueprint, Response, request, jsonify, render_template, stream_with_context
 
 # Decorator to ensure a graph is loaded before route execution
 from src.app.utils import require_graph_loaded
 
 # Core services and route calculation
 from src.core import graph_service
-from src.core.algorithms import calculate_route
+from src.core.algorithms import build_distance_matrix, missing_pair_response, tsp_route_response
+from src.core.distance_matrix import find_missing_pair
+from src.core.exact_solvers import HELD_KARP_MAX_POINTS
+from src.core.lower_bounds import tour_lower_bound
+from src.core.solver_pool import PROGRESS_INTERVAL_S, SOLVER_TIMEOUT_S, iter_solvers, run_solvers
 
 test_bp = Blueprint("test_bp", __name__)
 
+# Algorithms whose successful result is the optimal route.
+EXACT_ALGORITHMS = ('Brute Force', 'Exact (DP)')
+
+# Algorithms run by /run_all_algos when none are chosen.
+ALL_ALGORITHMS = [
+    'Christofides Algorithm',
+    'Greedy Algorithm',
+    'Nearest Neighbor',
+    'Nearest Insertion',
+    'Farthest Insertion',
+    'Cheapest Insertion',
+    'Simulated Annealing',
+    '2-opt Heuristic',
+    'Or-opt Heuristic',
+    'Or-3opt Heuristic',
+    'Lin-Kernighan Heuristic',
+    'Portfolio',
+    'Brute Force',
+    'Branch and Bound',
+    'Exact (DP)'
+]
+
+HARD_LIMIT = 45      # Hard limit of number of points
+BF_THRESHOLD = 12    # If points exceed this threshold, disable Brute Force
+DP_THRESHOLD = HELD_KARP_MAX_POINTS  # ... and the same for Exact (DP)
+WARNING_THRESHOLD = 10
+SA_MIN_POINTS = 5    # Minimum points for Simulated Annealing to make sense
+
 @test_bp.route('/test_mode', endpoint='test_page')
 @require_graph_loaded
 def test_mode():
@@ -28,71 +61,34 @@ def test_mode():
     - Provides a list of TSP algorithms for selection
     - Allows random point selection for demonstration purposes
     """
-    graph_service.selected_points.clear()
-
-    algos = [
-        'Christofides Algorithm',
-        'Greedy Algorithm',
-        'Nearest Neighbor',
-        'Simulated Annealing',
-        '2-opt Heuristic',
-        'Brute Force'
-    ]
+    graph_service.clear_selection()
+
     return render_template(
         'test.html',
         cities=graph_service.city_options.keys(),
-        algorithms=algos
+        algorithms=list(ALL_ALGORITHMS)
     )
 
-@test_bp.route('/run_all_algos', methods=['POST'])
-@require_graph_loaded
-def run_all_algos():
+def _check_selection(chosen_algorithms):
     """
-    Receives a list of chosen algorithms from the frontend and runs them all
-    on the currently selected points in the loaded graph.
+    Checks the number of selected points and drops the algorithms that do
+    not fit it (Brute Force and Exact (DP) above their thresholds, Simulated
+    Annealing below SA_MIN_POINTS). 'chosen_algorithms' is changed in place.
 
-    Returns JSON with the result of each algorithm, including:
-      - 'algorithm': name of the algorithm
-      - 'distance': computed total distance
-      - 'time': travel time
-      - 'compute_time_sec': how long (in seconds) it took to compute
-      - 'ordered_points': the visiting order of the route
+    Returns:
+        (list, list, str): The selected node IDs, the warnings, and an error
+                           message (None if the selection can be solved).
     """
-    data = request.get_json()
-    chosen_algorithms = data.get('algos', [])
-
-    # If no algorithms are specified, default to all recognized algorithms.
-    if not chosen_algorithms:
-        chosen_algorithms = [
-            'Christofides Algorithm',
-            'Greedy Algorithm',
-            'Nearest Neighbor',
-            'Simulated Annealing',
-            '2-opt Heuristic',
-            'Brute Force'
-        ]
-
-    HARD_LIMIT = 45      # Hard limit of number of points
-    BF_THRESHOLD = 12    # If points exceed this threshold, disable Brute Force
-    WARNING_THRESHOLD = 10
-    SA_MIN_POINTS = 5    # Minimum points for Simulated Annealing to make sense
-
     node_ids = [p['id'] for p in graph_service.selected_points]
     cnt = len(node_ids)
 
     # 1) Check if too many points are selected
     if cnt > HARD_LIMIT:
-        return jsonify({
-            'status': 'error',
-            'message': f'Max {HARD_LIMIT} points allowed.'
-        })
+        return node_ids, [], f'Max {HARD_LIMIT} points allowed.'
 
     # 2) At least 2 points needed to make a route
     if cnt < 2:
-        return jsonify({
-            'status': 'error',
-            'message': 'Select at least two points'
-        })
+        return node_ids, [], 'Select at least two points'
 
     warns = []
     if cnt > WARNING_THRESHOLD:
@@ -106,6 +102,11 @@ def run_all_algos():
         warns.append(
             f'Brute Force disabled for more than {BF_THRESHOLD} points.'
         )
+    if cnt > DP_THRESHOLD and 'Exact (DP)' in chosen_algorithms:
+        chosen_algorithms.remove('Exact (DP)')
+        warns.append(
+            f'Exact (DP) disabled for more than {DP_THRESHOLD} points.'
+        )
 
     # 4) Disable Simulated Annealing if fewer than SA_MIN_POINTS
     if cnt < SA_MIN_POINTS and 'Simulated Annealing' in chosen_algorithms:
@@ -113,81 +114,254 @@ def run_all_algos():
         warns.append(
             f'Simulated Annealing disabled for fewer than {SA_MIN_POINTS} points.'
         )
+    return node_ids, warns, None
 
-    partial_results = []
-    for algo in chosen_algorithms:
-        start_time = time.perf_counter()
-        # Perform the route calculation for the current algorithm
-        res = calculate_route(graph_service.G, node_ids, algo)
-        end_time = time.perf_counter()
-        compute_time_sec = round(end_time - start_time, 3)
-
-        partial_results.append({
-            'algorithm': algo,
-            'res': res,
-            'time_sec': compute_time_sec
-        })
 
-    # Among successful algorithms, find the minimum distance to compute ratio
+def _result_entry(algo_name, r, seconds, cnt_points):
+    """
+    Builds the result entry of one algorithm from its tsp_route_response().
+    The 'heuristic_ratio' and 'optimality_gap' of a successful entry are
+    filled in by _rate_results() once all algorithms have finished.
+    """
+    if r['status'] != 'success':
+        # If the result was an error, place an error entry in the final output
+        return {
+            'algorithm': algo_name,
+            'status': 'error',
+            'message': r.get('message', 'Error')
+        }
+
+    # Hypothetical expansions count:
+    # - Brute Force expansions might be factorial-based
+    # - Exact (DP) expansions are 2^(n-1) * (n-1)^2
+    # - Nearest Neighbor expansions might be n * n
+    expansions = 0
+    if algo_name == 'Brute Force':
+        expansions = 1
+        if cnt_points > 1:
+            expansions = math.factorial(cnt_points - 1)
+    elif algo_name == 'Exact (DP)':
+        expansions = 2 ** (cnt_points - 1) * (cnt_points - 1) ** 2
+    elif algo_name == 'Nearest Neighbor':
+        expansions = cnt_points * cnt_points
+
+    return {
+        'algorithm': algo_name,
+        'status': 'success',
+        'distance': r.get('total_distance', 0),
+        'time': r.get('travel_time', 0),
+        'num_nodes': r.get('num_nodes_in_route', 0),
+        'ordered_points': r.get('ordered_points', []),
+        'main_route_coordinates': r.get('main_route_coordinates', []),
+        'return_route_coordinates': r.get('return_route_coordinates', []),
+        'expansions': expansions,
+        'heuristic_ratio': None,
+        'optimality_gap': None,
+        'compute_time_sec': round(seconds, 3) if seconds is not None else None
+    }
+
+
+def _lower_bound(matrix, partial_results):
+    """
+    Lower bound on the optimum: computed from the distance matrix, or better
+    if an exact algorithm or branch and bound proved one.
+
+    Args:
+        matrix (list): The distance matrix of the selection.
+        partial_results (list): (algorithm, tsp_route_response()) pairs.
+
+    Returns:
+        (float, float, float): The lower bound (None without results), the
+                               shortest distance found (None without
+                               results), and the bound's compute seconds.
+    """
     successful = [
-        pr for pr in partial_results if pr['res']['status'] == 'success'
+        (algo, r) for algo, r in partial_results
+        if r['status'] == 'success' and r.get('total_distance') is not None
     ]
     min_dist = None
     if successful:
         # The minimal distance from all successful results
-        min_dist = min(
-            pr['res']['total_distance'] for pr in successful
-            if pr['res'].get('total_distance') is not None
-        )
+        min_dist = min(r['total_distance'] for _, r in successful)
+
+    bound_start = time.perf_counter()
+    lower_bound = tour_lower_bound(matrix, upper=min_dist)
+    lower_bound_time_sec = round(time.perf_counter() - bound_start, 3)
+    for algo, r in successful:
+        if algo in EXACT_ALGORITHMS:
+            lower_bound = max(lower_bound, r['total_distance'])
+        if r.get('lower_bound') is not None:
+            lower_bound = max(lower_bound, r['lower_bound'])
+    if min_dist is not None:
+        lower_bound = min(lower_bound, min_dist)
+    return lower_bound, min_dist, lower_bound_time_sec
+
+
+def _rate_results(results, min_dist, lower_bound):
+    # Fills in the ratio to the best distance found and the optimality gap.
+    for entry in results:
+        if entry['status'] != 'success':
+            continue
+        dist_alg = entry['distance']
+        entry['heuristic_ratio'] = 1.0
+        if min_dist and min_dist > 0:
+            entry['heuristic_ratio'] = round(dist_alg / min_dist, 3)
+        if lower_bound:
+            entry['optimality_gap'] = round(max(0.0, dist_alg - lower_bound) / lower_bound, 4)
 
+
+@test_bp.route('/run_all_algos', methods=['POST'])
+@require_graph_loaded
+def run_all_algos():
+    """
+    Receives a list of chosen algorithms from the frontend and runs them all
+    on the currently selected points in the loaded graph.
+
+    The distance matrix is computed once and the algorithms run in parallel
+    worker processes (see solver_pool.run_solvers); an algorithm that takes
+    longer than 'timeout_sec' (default SOLVER_TIMEOUT_S) is reported as an
+    error.
+
+    Returns JSON with the result of each algorithm, including:
+      - 'algorithm': name of the algorithm
+      - 'distance': computed total distance
+      - 'time': travel time
+      - 'compute_time_sec': how long (in seconds) the solver itself ran
+      - 'ordered_points': the visiting order of the route
+      - 'optimality_gap': (distance - lower_bound) / lower_bound
+    and the top-level 'lower_bound' on the optimal distance.
+    """
+    data = request.get_json()
+    # If no algorithms are specified, default to all recognized algorithms.
+    chosen_algorithms = data.get('algos') or list(ALL_ALGORITHMS)
+    # Optional seed for the randomized algorithms (reproducible benchmarks).
+    seed = data.get('seed')
+    timeout = float(data.get('timeout_sec', SOLVER_TIMEOUT_S))
+
+    node_ids, warns, error = _check_selection(chosen_algorithms)
+    if error:
+        return jsonify({
+            'status': 'error',
+            'message': error
+        })
+
+    # One distance matrix for all algorithms, then the solvers in parallel.
+    G = graph_service.G
+    csr, matrix, trees = build_distance_matrix(G, node_ids)
+    missing = find_missing_pair(matrix, node_ids)
+    if missing is not None:
+        outcomes = {
+            algo: (missing_pair_response(node_ids, missing), None)
+            for algo in chosen_algorithms
+        }
+    else:
+        outcomes = run_solvers(matrix, node_ids, chosen_algorithms, seed=seed, timeout=timeout)
+
+    partial_results = []
     results = []
-    for pr in partial_results:
-        algo_name = pr['algorithm']
-        r = pr['res']
-        cts = pr['time_sec']
-
-        if r['status'] == 'success':
-            expansions = 0
-            cnt_points = len(node_ids)
-
-            # Hypothetical expansions count:
-            # - Brute Force expansions might be factorial-based
-            # - Nearest Neighbor expansions might be n * n
-            if algo_name == 'Brute Force':
-                expansions = 1
-                if cnt_points > 1:
-                    expansions = math.factorial(cnt_points - 1)
-            elif algo_name == 'Nearest Neighbor':
-                expansions = cnt_points * cnt_points
-
-            ratio = 1.0
-            dist_alg = r.get('total_distance', 0)
-            if min_dist and min_dist > 0:
-                ratio = round(dist_alg / min_dist, 3)
-
-            results.append({
-                'algorithm': algo_name,
-                'status': 'success',
-                'distance': dist_alg,
-                'time': r.get('travel_time', 0),
-                'num_nodes': r.get('num_nodes_in_route', 0),
-                'ordered_points': r.get('ordered_points', []),
-                'main_route_coordinates': r.get('main_route_coordinates', []),
-                'return_route_coordinates': r.get('return_route_coordinates', []),
-                'expansions': expansions,
-                'heuristic_ratio': ratio,
-                'compute_time_sec': cts
-            })
-        else:
-            # If the result was an error, place an error entry in the final output
-            results.append({
-                'algorithm': algo_name,
-                'status': 'error',
-                'message': r.get('message', 'Error')
-            })
+    for algo in chosen_algorithms:
+        solved, seconds = outcomes[algo]
+        r = tsp_route_response(G, csr, trees, solved)
+        partial_results.append((algo, r))
+        results.append(_result_entry(algo, r, seconds, len(node_ids)))
+
+    lower_bound, min_dist, lower_bound_time_sec = None, None, 0.0
+    if missing is None:
+        lower_bound, min_dist, lower_bound_time_sec = _lower_bound(matrix, partial_results)
+    _rate_results(results, min_dist, lower_bound)
 
     return jsonify({
         'status': 'success',
         'results': results,
+        'lower_bound': lower_bound,
+        'lower_bound_time_sec': lower_bound_time_sec,
         'warnings': warns
-    })
\ No newline at end of file
+    })
+
+
+@test_bp.route('/run_all_algos_stream', methods=['POST'])
+@require_graph_loaded
+def run_all_algos_stream():
+    """
+    Streaming variant of /run_all_algos: the same request, answered as
+    newline-delimited JSON (application/x-ndjson) with one event per line:
+
+      - {'event': 'start', 'algorithms': [...], 'warnings': [...]}
+      - {'event': 'progress', 'algorithm', 'elapsed_sec', 'fraction',
+         'best_distance'} about every PROGRESS_INTERVAL_S seconds for each
+         running algorithm; 'fraction' and 'best_distance' come from the
+         solvers that report progress (Simulated Annealing, Lin-Kernighan,
+         Brute Force, Branch and Bound, Exact (DP)) and are null otherwise
+      - {'event': 'result', ...} as soon as an algorithm finishes, with the
+         fields of a /run_all_algos result entry (route geometry and timing)
+      - {'event': 'done', 'lower_bound', 'lower_bound_time_sec', 'ratings'}
+         last; 'ratings' maps every successful algorithm to its
+         'heuristic_ratio' and 'optimality_gap', which need all results
+
+    Selection errors are returned as a plain JSON error like /run_all_algos.
+    """
+    data = request.get_json()
+    chosen_algorithms = data.get('algos') or list(ALL_ALGORITHMS)
+    seed = data.get('seed')
+    timeout = float(data.get('timeout_sec', SOLVER_TIMEOUT_S))
+
+    node_ids, warns, error = _check_selection(chosen_algorithms)
+    if error:
+        return jsonify({
+            'status': 'error',
+            'message': error
+        })
+    G = graph_service.G
+
+    def events():
+        yield {'event': 'start', 'algorithms': chosen_algorithms, 'warnings': warns}
+
+        csr, matrix, trees = build_distance_matrix(G, node_ids)
+        missing = find_missing_pair(matrix, node_ids)
+        if missing is not None:
+            solved_events = (
+                ('result', algo, missing_pair_response(node_ids, missing), None)
+                for algo in chosen_algorithms
+            )
+        else:
+            solved_events = iter_solvers(
+                matrix, node_ids, chosen_algorithms, seed=seed, timeout=timeout,
+                progress_interval=PROGRESS_INTERVAL_S
+            )
+
+        partial_results = []
+        results = []
+        for event in solved_events:
+            if event[0] == 'progress':
+                _, algo, info = event
+                yield {'event': 'progress', 'algorithm': algo, **info}
+                continue
+            _, algo, solved, seconds = event
+            r = tsp_route_response(G, csr, trees, solved)
+            partial_results.append((algo, r))
+            entry = _result_entry(algo, r, seconds, len(node_ids))
+            results.append(entry)
+            yield {'event': 'result', **entry}
+
+        lower_bound, min_dist, lower_bound_time_sec = None, None, 0.0
+        if missing is None:
+            lower_bound, min_dist, lower_bound_time_sec = _lower_bound(matrix, partial_results)
+        _rate_results(results, min_dist, lower_bound)
+        yield {
+            'event': 'done',
+            'lower_bound': lower_bound,
+            'lower_bound_time_sec': lower_bound_time_sec,
+            'ratings': {
+                entry['algorithm']: {
+                    'heuristic_ratio': entry['heuristic_ratio'],
+                    'optimality_gap': entry['optimality_gap']
+                }
+                for entry in results if entry['status'] == 'success'
+            }
+        }
+
+    def lines():
+        for event in events():
+            yield json.dumps(event) + '\n'
+
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
@@ -5,9 +5,49 @@
 import itertools
 import math
 import random
+import time
 import networkx as nx
-
-def calculate_route(G, node_ids, algorithm, num_trucks=1):
+import numpy as np
+
+from src.core import graph_service
+from src.core.annealing import SA_TIME_LIMIT_S, anneal_tour
+from src.core.csr_graph import search_stats
+from src.core.construction import greedy_edge_tour, insertion_tour, nearest_neighbor_tour
+from src.core.distance_matrix import (
+    CachedPaths, compute_cached_distance_matrix, compute_distance_matrix, expand_route, find_missing_pair
+)
+from src.core.exact_solvers import HELD_KARP_MAX_POINTS, branch_and_bound_tour, held_karp_tour
+from src.core.lin_kernighan import lin_kernighan_tour
+from src.core.local_search import (
+    Deadline, expired, improve_tour, neighbor_lists, or3opt_tour, or_opt_tour, tour_length,
+    two_opt_tour
+)
+from src.core.portfolio import PORTFOLIO_TIME_LIMIT_S, portfolio_tour
+
+# Shortest path engines that can fill the distance matrix:
+#   'dijkstra' - one bounded Dijkstra search per selected node
+#   'ch'       - Contraction Hierarchies many-to-many query (index built once per city)
+#   'alt'      - bidirectional A* with landmarks, one query per pair (landmarks chosen once per city)
+ROUTING_MODES = ('dijkstra', 'ch', 'alt')
+
+# Permutations between the clock checks and progress reports of brute_force_tsp.
+BF_CHECK_EVERY = 10000
+
+# Solvers that stop at the time_limit of solve_tsp() with their best route so
+# far; the other algorithms build one route and always run to the end.
+ANYTIME_ALGORITHMS = (
+    'Simulated Annealing',
+    '2-opt Heuristic',
+    'Or-opt Heuristic',
+    'Or-3opt Heuristic',
+    'Lin-Kernighan Heuristic',
+    'Brute Force',
+    'Branch and Bound',
+    'Portfolio'
+)
+
+def calculate_route(G, node_ids, algorithm, num_trucks=1, routing='dijkstra', seed=None,
+                    solve=None, time_limit_ms=None):
     """
     High-level interface for running either a TSP or VRP algorithm
     based on the number of trucks (num_trucks).
@@ -17,77 +57,232 @@ def calculate_route(G, node_ids, algorithm, num_trucks=1):
         node_ids (list): The list of selected node IDs (strings).
         algorithm (str): The name of the chosen algorithm.
         num_trucks (int): The number of vehicles (1 => TSP, >1 => VRP).
+        routing (str): The shortest path engine, one of ROUTING_MODES.
+        seed (int, optional): Seed for the randomized TSP algorithms, so that
+                              benchmark runs are reproducible.
+        solve (callable, optional): Replacement for solve_tsp() with the same
+                                    (dist, node_ids, algorithm, seed,
+                                    time_limit=...) call, e.g. to run the
+                                    solver in another process.
+        time_limit_ms (float, optional): Time budget of the whole calculation.
+                                         The ANYTIME_ALGORITHMS get what the
+                                         distance matrix leaves of it and then
+                                         return their best route so far.
 
     Returns:
         dict: A dictionary describing the result of the calculation.
               'status': 'success' or 'error'
               'ordered_points': ...
               'total_distance': ...
+              'truncated': whether the time limit cut the solver short
+                           (only with time_limit_ms)
+              'warnings': e.g. a routing mode that fell back to Dijkstra
+                          (only if there are any)
               etc.
     """
+    deadline = None
+    if time_limit_ms is not None:
+        deadline = time.perf_counter() + max(0.0, float(time_limit_ms)) / 1000.0
     if G is None:
         return {'status': 'error', 'message': 'Graph not loaded'}
     if len(node_ids) < 2:
         return {'status': 'error', 'message': 'Select at least two points'}
+    if routing not in ROUTING_MODES:
+        return {'status': 'error', 'message': f'Unknown routing mode {routing}'}
+
+    routing, warning = _routing_fallback(G, routing)
 
     if num_trucks == 1:
         # TSP scenario
-        return calculate_tsp_route(G, node_ids, algorithm)
+        result = calculate_tsp_route(G, node_ids, algorithm, routing, seed, solve, deadline)
     else:
         # VRP scenario
         if algorithm == 'Clarke & Wright Savings':
-            return calculate_vrp_route_clarke_wright(G, node_ids, num_trucks)
+            result = calculate_vrp_route_clarke_wright(G, node_ids, num_trucks, routing)
         else:
             return {
                 'status': 'error',
                 'message': 'Selected VRP algorithm not supported'
             }
+    if warning is not None:
+        result.setdefault('warnings', []).append(warning)
+    return result
+
+
+def _routing_fallback(G, routing):
+    # Returns (routing, warning). Building a Contraction Hierarchies index or
+    # selecting landmarks takes minutes, so requests only use the files that
+    # scripts/build_ch.py has written before and fall back to Dijkstra otherwise.
+    if routing == 'ch' and graph_service.get_contraction_hierarchy(G, build_if_missing=False) is None:
+        index = 'Contraction Hierarchies index'
+    elif routing == 'alt' and graph_service.get_landmarks(G, build_if_missing=False) is None:
+        index = 'landmark index'
+    else:
+        return routing, None
+    return 'dijkstra', (f'No {index} is available for this city '
+                        '(build it with scripts/build_ch.py); Dijkstra was used instead.')
 
 
-def calculate_tsp_route(G, node_ids, algorithm):
+def build_distance_matrix(G, node_ids, routing='dijkstra'):
     """
-    Constructs a complete subgraph for the selected nodes using shortest path lengths,
-    and runs the desired TSP algorithm on that subgraph.
+    Computes the pairwise shortest path matrix of the selected nodes with
+    the requested routing engine. Pairs found in the shared path cache are
+    not searched again, and with plain Dijkstra the matrix maintained in the
+    background for the map selection is used when it covers node_ids.
+
+    Args:
+        G (nx.DiGraph): The main city graph.
+        node_ids (list): A list of node IDs (strings).
+        routing (str): One of ROUTING_MODES. 'ch' and 'alt' fall back to
+                       Dijkstra if no index can be obtained for G; missing
+                       indexes are not built here.
+
+    Returns:
+        (CSRGraph, list, object): The CSR adjacency of G, the matrix and the path trees.
+    """
+    csr = graph_service.get_csr_graph(G)
+    ch = graph_service.get_contraction_hierarchy(G, build_if_missing=False) if routing == 'ch' else None
+    alt = graph_service.get_landmarks(G, build_if_missing=False) if routing == 'alt' else None
+    city_key = graph_service.city_filename_of(G)
+    if city_key is not None and routing == 'dijkstra':
+        matrix = graph_service.selection.matrix_for(city_key, node_ids)
+        if matrix is not None:
+            return csr, matrix, CachedPaths(csr, graph_service.path_cache, city_key)
+    if city_key is None:
+        matrix, trees = compute_distance_matrix(csr, node_ids, ch=ch, landmarks=alt)
+    else:
+        matrix, trees = compute_cached_distance_matrix(
+            csr, node_ids, graph_service.path_cache, city_key, ch=ch, landmarks=alt
+        )
+    return csr, matrix, trees
+
+
+def get_search_stats():
+    """
+    Returns the number of queries and settled nodes per search kind
+    ('dijkstra', 'astar', 'alt') since the last reset_search_stats()
+    (POST /routing_stats/reset).
+    """
+    return {kind: dict(counts) for kind, counts in search_stats.items()}
+
+
+def calculate_tsp_route(G, node_ids, algorithm, routing='dijkstra', seed=None, solve=None,
+                        deadline=None):
+    """
+    Computes the shortest path distance matrix of the selected nodes and runs
+    the desired TSP algorithm on it.
 
     Args:
         G (nx.DiGraph): The main city graph.
         node_ids (list): A list of node IDs (strings).
         algorithm (str): The name of the TSP algorithm to apply.
+        routing (str): The shortest path engine, one of ROUTING_MODES.
+        seed (int, optional): Seed for the randomized algorithms.
+        solve (callable, optional): Runs the solver instead of solve_tsp().
+        deadline (float, optional): time.perf_counter() value by which the
+                                    solver should return.
 
     Returns:
         dict: The result of building the TSP route, including geometry.
     """
-    # Build a complete directed subgraph (using shortest paths).
-    complete_graph = nx.DiGraph()
-    for u, v in itertools.permutations(node_ids, 2):
-        try:
-            dist = nx.shortest_path_length(G, int(u), int(v), weight='length')
-        except nx.NetworkXNoPath:
-            return {
-                'status': 'partial_success',
-                'message': f'No path between {u} and {v}',
-                'ordered_points': node_ids,
-                'total_distance': None,
-                'travel_time': None,
-                'num_nodes_in_route': 0
-            }
-        complete_graph.add_edge(u, v, weight=dist)
+    # Compute all pairwise shortest path lengths.
+    csr, matrix, trees = build_distance_matrix(G, node_ids, routing)
+    missing = find_missing_pair(matrix, node_ids)
+    if missing is not None:
+        return missing_pair_response(node_ids, missing)
+
+    # All solvers work on the dense matrix; index i stands for node_ids[i].
+    time_limit = None if deadline is None else max(0.0, deadline - time.perf_counter())
+    solved = (solve or solve_tsp)(
+        np.asarray(matrix, dtype=np.float64), node_ids, algorithm, seed, time_limit=time_limit
+    )
+    return tsp_route_response(G, csr, trees, solved)
 
+
+def missing_pair_response(node_ids, missing):
+    """
+    Returns the response for a selection in which the pair 'missing'
+    (from find_missing_pair) is not connected.
+    """
+    u, v = missing
+    return {
+        'status': 'partial_success',
+        'message': f'No path between {u} and {v}',
+        'ordered_points': node_ids,
+        'total_distance': None,
+        'travel_time': None,
+        'num_nodes_in_route': 0
+    }
+
+
+def tsp_route_response(G, csr, trees, solved):
+    """
+    Builds the final geometry and distances of a solve_tsp() result.
+
+    Args:
+        G (nx.DiGraph): The main city graph.
+        csr (CSRGraph): Its CSR adjacency.
+        trees: Path trees from build_distance_matrix.
+        solved (dict): The result of solve_tsp().
+
+    Returns:
+        dict: The route response (see build_tsp_response), with the solver's
+              extra fields ('lower_bound', 'optimality_gap') if any.
+    """
+    if solved['status'] != 'success':
+        return solved
+    result = build_tsp_response(G, csr, solved['route'], trees)
+    if result['status'] == 'success':
+        for key, value in solved.items():
+            if key not in ('status', 'route'):
+                result[key] = value
+    return result
+
+
+def solve_tsp(dist, node_ids, algorithm, seed=None, on_progress=None, time_limit=None):
+    """
+    Runs a TSP algorithm on a distance matrix. Needs no graph, so it can run
+    in a worker process (see solver_pool).
+
+    Args:
+        dist (np.ndarray): n x n distance matrix, dist[i][j] from node_ids[i]
+                           to node_ids[j].
+        node_ids (list): The node IDs of the matrix rows; node_ids[0] is the start.
+        algorithm (str): The name of the TSP algorithm to apply.
+        seed (int, optional): Seed for the randomized algorithms.
+        on_progress (callable, optional): Called by the long-running solvers as
+                                          on_progress(fraction, best_length);
+                                          either may be None.
+        time_limit (float, optional): Seconds after which the
+                                      ANYTIME_ALGORITHMS stop with their best
+                                      route so far.
+
+    Returns:
+        dict: {'status': 'success', 'route': [...]} plus solver-specific
+              fields, or {'status': 'error', 'message': ...}. With a
+              time_limit, 'truncated' tells whether it cut the solver short,
+              as recorded by the solver itself (see local_search.Deadline).
+    """
+    deadline = None if time_limit is None else Deadline(time.perf_counter() + time_limit)
+    extra = {}
     # Depending on the chosen algorithm, run the TSP procedure.
     if algorithm == 'Christofides Algorithm':
-        undirected = complete_graph.to_undirected()
-        tsp_route = nx.approximation.traveling_salesman_problem(
-            undirected, weight='weight', cycle=False
-        )
-        # Rotate the route so that tsp_route[0] == node_ids[0].
-        start_index = tsp_route.index(node_ids[0])
-        tsp_route = tsp_route[start_index:] + tsp_route[:start_index]
+        tsp_route = christofides_tsp(dist, node_ids)
 
     elif algorithm == 'Greedy Algorithm':
-        tsp_route = greedy_tsp(complete_graph, start=node_ids[0])
+        tsp_route = greedy_tsp(dist, node_ids)
 
     elif algorithm == 'Nearest Neighbor':
-        tsp_route = nearest_neighbor_tsp(complete_graph, start=node_ids[0])
+        tsp_route = nearest_neighbor_tsp(dist, node_ids)
+
+    elif algorithm == 'Nearest Insertion':
+        tsp_route = insertion_tsp(dist, node_ids, 'nearest')
+
+    elif algorithm == 'Farthest Insertion':
+        tsp_route = insertion_tsp(dist, node_ids, 'farthest')
+
+    elif algorithm == 'Cheapest Insertion':
+        tsp_route = insertion_tsp(dist, node_ids, 'cheapest')
 
     elif algorithm == 'Simulated Annealing':
         if len(node_ids) < 5:
@@ -95,14 +290,49 @@ def calculate_tsp_route(G, node_ids, algorithm):
                 'status': 'error',
                 'message': 'Simulated Annealing requires at least 5 points.'
             }
-        tsp_route = simulated_annealing_tsp(complete_graph, start=node_ids[0])
+        tsp_route = simulated_annealing_tsp(
+            dist, node_ids, seed=seed, on_progress=on_progress, deadline=deadline
+        )
 
     elif algorithm == '2-opt Heuristic':
-        initial_route = node_ids.copy()
-        tsp_route = two_opt(complete_graph, initial_route)
+        tsp_route = two_opt(dist, node_ids, deadline=deadline)
+
+    elif algorithm == 'Or-opt Heuristic':
+        tsp_route = or_opt(dist, node_ids, deadline=deadline)
+
+    elif algorithm == 'Or-3opt Heuristic':
+        tsp_route = or_3opt(dist, node_ids, deadline=deadline)
+
+    elif algorithm == 'Lin-Kernighan Heuristic':
+        tsp_route = lin_kernighan(dist, node_ids, seed=seed, on_progress=on_progress,
+                                  deadline=deadline)
+
+    elif algorithm == 'Portfolio':
+        tsp_route, extra['portfolio'] = portfolio_tsp(
+            dist, node_ids, seed=seed, on_progress=on_progress, deadline=deadline
+        )
 
     elif algorithm == 'Brute Force':
-        tsp_route = brute_force_tsp(complete_graph, start=node_ids[0])
+        tsp_route = brute_force_tsp(dist, node_ids, on_progress=on_progress, deadline=deadline)
+
+    elif algorithm == 'Branch and Bound':
+        tsp_route, lower_bound = branch_and_bound(dist, node_ids, seed=seed, on_progress=on_progress,
+                                                  deadline=deadline)
+        # Length of the matrix tour, which total_distance reproduces.
+        index = {u: i for i, u in enumerate(node_ids)}
+        length = tour_length(dist.tolist(), [index[u] for u in tsp_route])
+        extra = {
+            'lower_bound': lower_bound,
+            'optimality_gap': max(0.0, (length - lower_bound) / lower_bound) if lower_bound > 0 else 0.0
+        }
+
+    elif algorithm == 'Exact (DP)':
+        if len(node_ids) > HELD_KARP_MAX_POINTS:
+            return {
+                'status': 'error',
+                'message': f'Exact (DP) supports at most {HELD_KARP_MAX_POINTS} points.'
+            }
+        tsp_route = held_karp(dist, node_ids, on_progress=on_progress)
 
     else:
         return {
@@ -110,11 +340,12 @@ def calculate_tsp_route(G, node_ids, algorithm):
             'message': 'Unknown algorithm'
         }
 
-    # Build the final geometry and distances from the TSP route.
-    return build_tsp_response(G, tsp_route)
+    if deadline is not None:
+        extra['truncated'] = deadline.reached
+    return {'status': 'success', 'route': tsp_route, **extra}
 
 
-def calculate_vrp_route_clarke_wright(G, node_ids, num_trucks):
+def calculate_vrp_route_clarke_wright(G, node_ids, num_trucks, routing='dijkstra'):
     """
     Classic Clarke & Wright Savings algorithm for VRP with a single depot
     and multiple clients. Limited demonstration only.
@@ -123,6 +354,7 @@ def calculate_vrp_route_clarke_wright(G, node_ids, num_trucks):
         G (nx.DiGraph): The loaded city graph.
         node_ids (list): The list of node IDs (first is depot).
         num_trucks (int): The number of vehicles (routes).
+        routing (str): The shortest path engine, one of ROUTING_MODES.
 
     Returns:
         dict: A dictionary with 'vrp_routes', 'total_distance', etc.
@@ -130,40 +362,29 @@ def calculate_vrp_route_clarke_wright(G, node_ids, num_trucks):
     depot = node_ids[0]
     clients = node_ids[1:]
 
-    distance = {}
-    # Pre-calculate distances from depot->client, client->depot, and client->client.
-    for c in clients:
-        try:
-            distance[(depot, c)] = nx.shortest_path_length(G, int(depot), int(c), weight='length')
-        except nx.NetworkXNoPath:
-            return {
-                'status': 'partial_success',
-                'message': f'No path from depot={depot} to {c}',
-                'vrp_routes': [], 'total_distance': None,
-                'travel_time': None, 'num_nodes_in_route': 0
-            }
-        try:
-            distance[(c, depot)] = nx.shortest_path_length(G, int(c), int(depot), weight='length')
-        except nx.NetworkXNoPath:
-            return {
-                'status': 'partial_success',
-                'message': f'No path from {c} back to depot={depot}',
-                'vrp_routes': [], 'total_distance': None,
-                'travel_time': None, 'num_nodes_in_route': 0
-            }
+    # Pre-calculate distances between the depot and all clients in one pass.
+    csr, matrix, trees = build_distance_matrix(G, node_ids, routing)
+    missing = find_missing_pair(matrix, node_ids)
+    if missing is not None:
+        u, v = missing
+        if u == depot:
+            message = f'No path from depot={depot} to {v}'
+        elif v == depot:
+            message = f'No path from {u} back to depot={depot}'
+        else:
+            message = f'No path between clients {u} and {v}'
+        return {
+            'status': 'partial_success',
+            'message': message,
+            'vrp_routes': [], 'total_distance': None,
+            'travel_time': None, 'num_nodes_in_route': 0
+        }
 
-    for i in clients:
-        for j in clients:
+    distance = {}
+    for i, u in enumerate(node_ids):
+        for j, v in enumerate(node_ids):
             if i != j:
-                try:
-                    distance[(i, j)] = nx.shortest_path_length(G, int(i), int(j), weight='length')
-                except nx.NetworkXNoPath:
-                    return {
-                        'status': 'partial_success',
-                        'message': f'No path between clients {i} and {j}',
-                        'vrp_routes': [], 'total_distance': None,
-                        'travel_time': None, 'num_nodes_in_route': 0
-                    }
+                distance[(u, v)] = matrix[i][j]
 
     # Build the savings list: savings = dist(depot,i) + dist(depot,j) - dist(i,j)
     savings_list = []
@@ -216,7 +437,7 @@ def calculate_vrp_route_clarke_wright(G, node_ids, num_trucks):
     for i, route_part in enumerate(routes):
         # The route: depot -> route_part -> depot
         full_route = [depot] + route_part + [depot]
-        coords_list, dist_val = build_coords_from_route(G, full_route)
+        coords_list, dist_val = build_coords_from_route(G, csr, full_route, trees)
         if dist_val is None:
             return {
                 'status': 'partial_success',
@@ -234,11 +455,7 @@ def calculate_vrp_route_clarke_wright(G, node_ids, num_trucks):
         })
 
         # Collect unique nodes in this route
-        route_nodes = []
-        for k in range(len(full_route) - 1):
-            segm = nx.shortest_path(G, int(full_route[k]), int(full_route[k + 1]), weight='length')
-            route_nodes.extend(segm[:-1])
-        route_nodes.append(int(full_route[-1]))
+        route_nodes, _ = expand_route(csr, trees, full_route)
         all_vrp_nodes.update(route_nodes)
 
     travel_time = total_distance / 1000 / average_speed * 60  # minutes
@@ -253,126 +470,121 @@ def calculate_vrp_route_clarke_wright(G, node_ids, num_trucks):
     }
 
 
-def build_coords_from_route(G, route):
+def build_coords_from_route(G, csr, route, trees):
     """
-    Builds the lat-lon coordinates by traversing shortest paths between consecutive points in 'route'.
+    Builds the lat-lon coordinates by walking the shortest path trees between
+    consecutive points in 'route'. No new shortest path search is performed.
     Returns the coordinate list and the sum of all edge lengths, or ([], None) if a path is missing.
 
     Args:
         G (nx.DiGraph): The city graph.
+        csr (CSRGraph): The compact adjacency of G.
         route (list): A list of node IDs in visiting order.
+        trees: Path trees from compute_distance_matrix.
 
     Returns:
         (list, float): ( [ [lat,lon], [lat,lon], ... ], total_distance ),
                        or ([], None) on failure.
     """
-    import networkx as nx
+    full_nodes, missing = expand_route(csr, trees, route)
+    if missing is not None:
+        return ([], None)
+
+    coords_latlon, dist_val, _ = coords_from_nodes(G, csr, full_nodes)
+    if not coords_latlon:
+        return ([], None)
+    return (coords_latlon, dist_val)
+
+
+def coords_from_nodes(G, csr, full_nodes):
+    """
+    Converts a list of consecutive graph nodes into lat-lon coordinates and a length.
+    Edge lengths come from the CSR arrays; only edges that carry a curved
+    geometry are looked up in the networkx graph.
 
-    full_nodes = []
-    for i in range(len(route) - 1):
-        try:
-            segm = nx.shortest_path(G, int(route[i]), int(route[i + 1]), weight='length')
-        except nx.NetworkXNoPath:
-            return ([], None)
-        full_nodes.extend(segm[:-1])
-    full_nodes.append(int(route[-1]))
+    Args:
+        G (nx.DiGraph): The city graph.
+        csr (CSRGraph): The compact adjacency of G.
+        full_nodes (list): Consecutive node indices along a path.
 
+    Returns:
+        (list, float, tuple or None): (coords, distance, None) on success, or
+                                      ([], None, (u, v)) if an edge is missing.
+    """
+    node_ids = csr.node_ids
     coords = []
     dist_val = 0
     for i in range(len(full_nodes) - 1):
         u = full_nodes[i]
         v = full_nodes[i + 1]
-        data = G.get_edge_data(u, v)
-        if data is None:
-            return ([], None)
-        # In MultiDiGraph, an edge can have multiple keys. We pick the first (0) if present.
-        edge_info = data[0] if 0 in data else data[next(iter(data))]
-        length_edge = edge_info.get('length', 0)
-        dist_val += length_edge
+        e = csr.edge_index(u, v)
+        u_id = int(node_ids[u])
+        v_id = int(node_ids[v])
+        if e < 0:
+            return ([], None, (u_id, v_id))
+        dist_val += float(csr.lengths[e])
+        # The CSR keeps the key of the shortest parallel edge, which is
+        # the edge the distance computation used.
+        edge_info = G[u_id][v_id][int(csr.edge_keys[e])]
         if 'geometry' in edge_info:
             c = list(edge_info['geometry'].coords)
             coords.extend(c)
         else:
-            coords.append((G.nodes[u]['x'], G.nodes[u]['y']))
-            coords.append((G.nodes[v]['x'], G.nodes[v]['y']))
+            coords.append((float(csr.x[u]), float(csr.y[u])))
+            coords.append((float(csr.x[v]), float(csr.y[v])))
 
     # Remove consecutive duplicates
     coords = [c for i, c in enumerate(coords) if i == 0 or c != coords[i - 1]]
     coords_latlon = [[lat, lon] for (lon, lat) in coords]
-
-    if len(coords) == 0:
-        return ([], None)
-    return (coords_latlon, dist_val)
+    return (coords_latlon, dist_val, None)
 
 
-def build_tsp_response(G, tsp_route):
+def build_tsp_response(G, csr, tsp_route, trees):
     """
     After computing the TSP visiting order, build the geometry for the
     main route and the return path from the last node back to the start.
+    Paths are rebuilt from the predecessor trees of the distance computation.
 
     Args:
         G (nx.DiGraph): The city graph.
+        csr (CSRGraph): The compact adjacency of G.
         tsp_route (list): Ordered node IDs for the TSP route.
+        trees: Path trees from compute_distance_matrix.
 
     Returns:
         dict: Contains the 'main_route_coordinates', 'return_route_coordinates',
               'ordered_points', 'total_distance', 'travel_time', and 'num_nodes_in_route'.
     """
-    import networkx as nx
-
-    main_full_nodes = []
     # Main route: tsp_route[i] -> tsp_route[i+1]
-    for i in range(len(tsp_route) - 1):
-        try:
-            segm = nx.shortest_path(G, int(tsp_route[i]), int(tsp_route[i + 1]), weight='length')
-        except nx.NetworkXNoPath:
-            return {
-                'status': 'partial_success',
-                'message': f'No path between {tsp_route[i]} and {tsp_route[i+1]}',
-                'main_route_coordinates': [],
-                'return_route_coordinates': [],
-                'ordered_points': tsp_route,
-                'total_distance': None,
-                'travel_time': None,
-                'num_nodes_in_route': 0
-            }
-        main_full_nodes.extend(segm[:-1])
-    main_full_nodes.append(int(tsp_route[-1]))
-
-    main_coords = []
-    main_dist = 0
-    for i in range(len(main_full_nodes) - 1):
-        u = main_full_nodes[i]
-        v = main_full_nodes[i + 1]
-        data = G.get_edge_data(u, v)
-        if data is None:
-            return {
-                'status': 'partial_success',
-                'message': f'Edge data not found between {u} and {v}',
-                'main_route_coordinates': [],
-                'return_route_coordinates': [],
-                'ordered_points': tsp_route,
-                'total_distance': None,
-                'travel_time': None,
-                'num_nodes_in_route': 0
-            }
-        edge_info = data[0] if 0 in data else data[next(iter(data))]
-        main_dist += edge_info.get('length', 0)
-        if 'geometry' in edge_info:
-            c = list(edge_info['geometry'].coords)
-            main_coords.extend(c)
-        else:
-            main_coords.append((G.nodes[u]['x'], G.nodes[u]['y']))
-            main_coords.append((G.nodes[v]['x'], G.nodes[v]['y']))
+    main_full_nodes, missing = expand_route(csr, trees, tsp_route)
+    if missing is not None:
+        return {
+            'status': 'partial_success',
+            'message': f'No path between {missing[0]} and {missing[1]}',
+            'main_route_coordinates': [],
+            'return_route_coordinates': [],
+            'ordered_points': tsp_route,
+            'total_distance': None,
+            'travel_time': None,
+            'num_nodes_in_route': 0
+        }
 
-    # Remove duplicates
-    main_coords = [c for i, c in enumerate(main_coords) if i == 0 or c != main_coords[i - 1]]
-    main_route_coordinates = [[lat, lon] for (lon, lat) in main_coords]
+    main_route_coordinates, main_dist, missing = coords_from_nodes(G, csr, main_full_nodes)
+    if missing is not None:
+        return {
+            'status': 'partial_success',
+            'message': f'Edge data not found between {missing[0]} and {missing[1]}',
+            'main_route_coordinates': [],
+            'return_route_coordinates': [],
+            'ordered_points': tsp_route,
+            'total_distance': None,
+            'travel_time': None,
+            'num_nodes_in_route': 0
+        }
 
     # Return path: from tsp_route[-1] back to tsp_route[0]
-    try:
-        ret_path = nx.shortest_path(G, int(tsp_route[-1]), int(tsp_route[0]), weight='length')
-    except nx.NetworkXNoPath:
+    ret_nodes = trees.path(tsp_route[-1], tsp_route[0])
+    if ret_nodes is None:
         return {
             'status': 'partial_success',
             'message': f'No path from {tsp_route[-1]} back to {tsp_route[0]}',
@@ -383,38 +595,19 @@ def build_tsp_response(G, tsp_route):
             'travel_time': None,
             'num_nodes_in_route': 0
         }
-    ret_nodes = []
-    ret_nodes.extend(ret_path)
-
-    ret_coords = []
-    ret_dist = 0
-    for i in range(len(ret_nodes) - 1):
-        u = ret_nodes[i]
-        v = ret_nodes[i + 1]
-        data = G.get_edge_data(u, v)
-        if data is None:
-            return {
-                'status': 'partial_success',
-                'message': f'Edge data not found in return path {u}-{v}',
-                'main_route_coordinates': main_route_coordinates,
-                'return_route_coordinates': [],
-                'ordered_points': tsp_route,
-                'total_distance': None,
-                'travel_time': None,
-                'num_nodes_in_route': 0
-            }
-        edge_info = data[0] if 0 in data else data[next(iter(data))]
-        ret_dist += edge_info.get('length', 0)
-        if 'geometry' in edge_info:
-            c = list(edge_info['geometry'].coords)
-            ret_coords.extend(c)
-        else:
-            ret_coords.append((G.nodes[u]['x'], G.nodes[u]['y']))
-            ret_coords.append((G.nodes[v]['x'], G.nodes[v]['y']))
 
-    # Remove duplicates
-    ret_coords = [c for i, c in enumerate(ret_coords) if i == 0 or c != ret_coords[i - 1]]
-    return_route_coordinates = [[lat, lon] for (lon, lat) in ret_coords]
+    return_route_coordinates, ret_dist, missing = coords_from_nodes(G, csr, ret_nodes)
+    if missing is not None:
+        return {
+            'status': 'partial_success',
+            'message': f'Edge data not found in return path {missing[0]}-{missing[1]}',
+            'main_route_coordinates': main_route_coordinates,
+            'return_route_coordinates': [],
+            'ordered_points': tsp_route,
+            'total_distance': None,
+            'travel_time': None,
+            'num_nodes_in_route': 0
+        }
 
     total_distance = main_dist + ret_dist
 
@@ -438,158 +631,302 @@ def build_tsp_response(G, tsp_route):
     }
 
 
-def nearest_neighbor_tsp(graph, start):
+# -----------------------------------------------------------------------------
+# TSP solvers. Each takes the dense distance matrix 'dist' (np.ndarray, n x n,
+# dist[i][j] from node_ids[i] to node_ids[j]) and the node IDs, starts the
+# route at node_ids[0] and returns the route as a list of node IDs.
+# -----------------------------------------------------------------------------
+
+def _route(node_ids, tour):
+    # Node IDs of a tour of matrix indices.
+    return [node_ids[i] for i in tour]
+
+
+def christofides_tsp(dist, node_ids):
     """
-    Simple Nearest Neighbor TSP approach on a complete graph:
-    - Always pick the next closest unvisited vertex until none remain.
+    Christofides TSP approach (networkx implementation):
+    - Runs on the undirected graph whose edge weights are the mean of both
+      directions, the only solver that needs a networkx graph.
 
     Args:
-        graph (nx.DiGraph): A complete graph (distance as weight).
-        start (str): The node to start from.
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
 
     Returns:
-        list: The visiting order of nodes (a simple path).
+        list: The route starting at node_ids[0].
     """
-    nodes = list(graph.nodes)
-    path = [start]
-    unvisited = set(nodes)
-    unvisited.remove(start)
-    current = start
+    undirected = nx.from_numpy_array((dist + dist.T) / 2.0)
+    tour = nx.approximation.traveling_salesman_problem(
+        undirected, weight='weight', cycle=False
+    )
+    # Rotate the route so that it starts at index 0.
+    start_index = tour.index(0)
+    return _route(node_ids, tour[start_index:] + tour[:start_index])
 
-    while unvisited:
-        next_node = min(unvisited, key=lambda node: graph[current][node]['weight'])
-        path.append(next_node)
-        unvisited.remove(next_node)
-        current = next_node
 
-    return path
+def nearest_neighbor_tsp(dist, node_ids):
+    """
+    Simple Nearest Neighbor TSP approach:
+    - Always pick the next closest unvisited vertex until none remain
+      (see construction.nearest_neighbor_tour).
 
+    Args:
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
 
-def greedy_tsp(graph, start):
+    Returns:
+        list: The visiting order of nodes (a simple path).
     """
-    Greedy TSP approach:
-    - Repeatedly pick the minimal edge from the last added node to an unvisited node.
-    - This is different from Nearest Neighbor in that some implementations
-      consider all edges globally, but here we do a local approach.
+    return _route(node_ids, nearest_neighbor_tour(dist))
+
+
+def insertion_tsp(dist, node_ids, rule):
+    """
+    Insertion TSP approach:
+    - Grow a closed route from the start, inserting one node at a time where
+      it adds the least distance.
+    - 'rule' picks the next node: 'nearest' or 'farthest' from the route,
+      or 'cheapest' to insert (see construction.insertion_tour).
 
     Args:
-        graph (nx.DiGraph): The complete graph with distances.
-        start (str): The node ID to start from.
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        rule (str): One of construction.INSERTION_RULES.
 
     Returns:
         list: The visiting order of nodes.
     """
-    nodes = list(graph.nodes)
-    path = [start]
-    unvisited = set(nodes)
-    unvisited.remove(start)
+    return _route(node_ids, insertion_tour(dist, rule))
 
-    while unvisited:
-        current = path[-1]
-        next_node = min(unvisited, key=lambda v: graph[current][v]['weight'])
-        path.append(next_node)
-        unvisited.remove(next_node)
 
-    return path
+def greedy_tsp(dist, node_ids):
+    """
+    Greedy edge TSP approach:
+    - Consider all edges globally, shortest first.
+    - Accept an edge if both of its ends have fewer than two route edges
+      and it does not close a cycle early; then choose the cheaper direction
+      (see construction.greedy_edge_tour).
 
+    Args:
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
 
-def two_opt(graph, node_ids, init_method='greedy'):
+    Returns:
+        list: The visiting order of nodes.
+    """
+    return _route(node_ids, greedy_edge_tour(dist))
+
+
+def two_opt(dist, node_ids, init_method='greedy', deadline=None):
     """
     2-Opt TSP improvement procedure:
     - Start with a route (by default from a greedy approach).
-    - Repeatedly check 2-edge swaps to see if they improve the total distance,
-      stopping when no improvement can be found.
+    - Apply improving segment reversals until none is left; see
+      local_search.two_opt_tour for the move evaluation.
 
     Args:
-        graph (nx.DiGraph): The complete graph with distances.
-        node_ids (list): The list of node IDs to visit.
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
         init_method (str): Method of building the initial route (greedy or nearest, etc.).
+        deadline (float, optional): local_search.Deadline (a perf_counter
+                                    float whose .reached records truncation)
+                                    at which the search stops with the best
+                                    route so far.
 
     Returns:
-        list: A route that is locally optimal under 2-Opt.
+        list: A route that is locally optimal under 2-Opt (closed tour length).
     """
     if init_method.lower().startswith('g'):
-        route = greedy_tsp(graph, start=node_ids[0])
+        tour = greedy_edge_tour(dist)
     else:
-        route = nearest_neighbor_tsp(graph, start=node_ids[0])
+        tour = nearest_neighbor_tour(dist)
+    return _route(node_ids, two_opt_tour(dist.tolist(), tour, deadline=deadline))
 
-    improved = True
-    best = route[:]
-    while improved:
-        improved = False
-        for i in range(1, len(best) - 2):
-            for j in range(i + 1, len(best)):
-                if j - i == 1:
-                    continue
-                new_route = best[:]
-                new_route[i:j] = reversed(best[i:j])
-                if calculate_route_length(graph, new_route) < calculate_route_length(graph, best):
-                    best = new_route
-                    improved = True
-        route = best
-    return best
 
+def or_opt(dist, node_ids, deadline=None):
+    """
+    2-opt combined with Or-opt ("or2opt"):
+    - Start with a greedy route.
+    - Alternate segment reversals and moves of chains of 1-3 stops until
+      neither improves the tour.
+
+    Args:
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        deadline (float, optional): Stops the search (see two_opt).
 
-def calculate_route_length(graph, route):
+    Returns:
+        list: A route that is locally optimal under both move types.
+    """
+    tour = improve_tour(
+        dist.tolist(), greedy_edge_tour(dist), [two_opt_tour, or_opt_tour], deadline=deadline
+    )
+    return _route(node_ids, tour)
+
+
+def or_3opt(dist, node_ids, deadline=None):
     """
-    Computes the total distance of a route in the provided complete graph.
+    2-opt, Or-opt and reversal-free 3-opt ("or3opt") combined:
+    - Start with a greedy route.
+    - Additionally swap adjacent segments of any length, which relocates
+      long chains of stops without reversing them.
 
     Args:
-        graph (nx.DiGraph): The complete graph with 'weight' edges.
-        route (list): The order of nodes (strings or int) to traverse.
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        deadline (float, optional): Stops the search (see two_opt).
 
     Returns:
-        float: Sum of all consecutive edge weights along the route.
+        list: A route that is locally optimal under all three move types.
     """
-    total = 0
-    for i in range(len(route) - 1):
-        total += graph[route[i]][route[i + 1]]['weight']
-    return total
+    tour = improve_tour(
+        dist.tolist(), greedy_edge_tour(dist), [two_opt_tour, or_opt_tour, or3opt_tour],
+        deadline=deadline
+    )
+    return _route(node_ids, tour)
 
 
-def simulated_annealing_tsp(graph, start):
+def lin_kernighan(dist, node_ids, seed=None, on_progress=None, deadline=None):
     """
-    Simulated Annealing TSP approach:
-    - Start with a random route (with 'start' as the first node).
-    - Perform random 2-swap perturbations, occasionally accepting worse solutions
-      according to the temperature schedule to escape local minima.
+    Iterated Lin-Kernighan TSP heuristic:
+    - Start with a greedy route polished by 2-opt, Or-opt and or3opt.
+    - Improve it with variable-depth LK moves, then apply double-bridge kicks
+      with local LK repair while the time budget lasts
+      (see lin_kernighan.lin_kernighan_tour).
 
     Args:
-        graph (nx.DiGraph): The complete graph.
-        start (str): The starting node ID.
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        seed (int, optional): Seed of the kicks.
+        on_progress (callable, optional): Progress callback of the kick loop.
+        deadline (float, optional): Stops the search (see two_opt).
 
     Returns:
-        list: The TSP route without repeating the start at the end.
+        list: The best route found.
     """
-    nodes = list(graph.nodes)
-    if start in nodes:
-        nodes.remove(start)
-    random.shuffle(nodes)
-    route = [start] + nodes + [start]
+    return _route(node_ids, _lin_kernighan_tour(dist, seed, on_progress, deadline))
 
-    best_route = route
-    best_dist = calculate_route_length(graph, best_route)
-    T = 10000
-    cooling = 0.003
 
-    while T > 1:
-        new_route = best_route[:]
-        i = random.randint(1, len(new_route) - 3)
-        j = random.randint(i + 1, len(new_route) - 2)
-        new_route[i:j] = reversed(new_route[i:j])
+def _lin_kernighan_tour(dist, seed=None, on_progress=None, deadline=None):
+    rows = dist.tolist()
+    neighbors = neighbor_lists(dist)
+    tour = improve_tour(
+        rows, greedy_edge_tour(dist), [two_opt_tour, or_opt_tour, or3opt_tour], neighbors,
+        deadline
+    )
+    return lin_kernighan_tour(rows, tour, neighbors, seed=seed, on_progress=on_progress,
+                              deadline=deadline)
 
-        new_dist = calculate_route_length(graph, new_route)
-        if new_dist < best_dist or random.random() < math.exp((best_dist - new_dist)/T):
-            best_route = new_route
-            best_dist = new_dist
 
-        T *= (1 - cooling)
+def branch_and_bound(dist, node_ids, seed=None, on_progress=None, deadline=None):
+    """
+    Exact TSP by depth-first branch and bound with Held-Karp and assignment
+    lower bounds, started from the Lin-Kernighan route
+    (see exact_solvers.branch_and_bound_tour). Within its time and node
+    limits the route is proven optimal; otherwise the best route is returned
+    with a proven lower bound on the optimum.
+
+    Args:
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        seed (int, optional): Seed of the initial Lin-Kernighan run.
+        on_progress (callable, optional): Progress callback of the search.
+        deadline (float, optional): Ends the Lin-Kernighan run and the search
+                                    (see two_opt).
 
-    # Remove the duplicated start at the end
-    return best_route[:-1]
+    Returns:
+        (list, float): The best route and the lower bound on the optimal length.
+    """
+    tour = _lin_kernighan_tour(dist, seed, deadline=deadline)
+    tour, _, lower_bound = branch_and_bound_tour(
+        dist, tour, on_progress=on_progress, deadline=deadline
+    )
+    return _route(node_ids, tour), lower_bound
 
 
-def brute_force_tsp(graph, start):
+def held_karp(dist, node_ids, on_progress=None):
+    """
+    Exact TSP by Held-Karp dynamic programming over subsets of the stops
+    (see exact_solvers.held_karp_tour). Feasible up to HELD_KARP_MAX_POINTS.
+
+    Args:
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        on_progress (callable, optional): Progress callback of the DP.
+
+    Returns:
+        list: The optimal route.
+    """
+    tour, _ = held_karp_tour(dist, on_progress)
+    return _route(node_ids, tour)
+
+
+def simulated_annealing_tsp(dist, node_ids, time_limit=SA_TIME_LIMIT_S, seed=None,
+                            on_progress=None, deadline=None):
+    """
+    Simulated Annealing TSP approach:
+    - Start with a random route (with node_ids[0] as the first node).
+    - Propose random segment reversals and relocations of single stops,
+      occasionally accepting worse solutions according to the temperature
+      schedule to escape local minima (see annealing.anneal_tour).
+
+    Args:
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        time_limit (float): Wall-clock budget in seconds.
+        seed (int, optional): Seed for a reproducible run.
+        on_progress (callable, optional): Progress callback of the annealer.
+        deadline (float, optional): Shortens time_limit if it comes first
+                                    (see two_opt).
+
+    Returns:
+        list: The TSP route without repeating the start at the end.
+    """
+    rng = random.Random(seed)
+    rest = list(range(1, len(node_ids)))
+    rng.shuffle(rest)
+    tour = anneal_tour(
+        dist.tolist(), [0] + rest, time_limit=time_limit, seed=seed, on_progress=on_progress,
+        deadline=deadline
+    )
+    return _route(node_ids, tour)
+
+
+def portfolio_tsp(dist, node_ids, seed=None, on_progress=None, deadline=None):
+    """
+    Parallel multi-start portfolio:
+    - Run 2-opt and Or-opt from different constructions and several seeded
+      Simulated Annealing runs at the same time, each in its own worker
+      process on a shared copy of the distance matrix.
+    - Keep the shortest route found by the deadline
+      (see portfolio.portfolio_tour).
+
+    Args:
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        seed (int, optional): Base seed of the annealing runs.
+        on_progress (callable, optional): Called as members finish.
+        deadline (float, optional): local_search.Deadline (a perf_counter
+                                    float whose .reached records truncation)
+                                    that shortens the default
+                                    PORTFOLIO_TIME_LIMIT_S; a plain float
+                                    also works but records nothing.
+
+    Returns:
+        (list, list): The best route and the statistics of every worker.
+    """
+    time_limit = PORTFOLIO_TIME_LIMIT_S
+    if deadline is not None:
+        time_limit = max(0.0, min(time_limit, deadline - time.perf_counter()))
+    tour, stats = portfolio_tour(dist, time_limit=time_limit, seed=seed, on_progress=on_progress)
+    if (isinstance(deadline, Deadline) and time_limit < PORTFOLIO_TIME_LIMIT_S
+            and any(entry.get('truncated') for entry in stats)):
+        # The members stopped at a portfolio deadline that came from 'deadline'.
+        deadline.reached = True
+    return _route(node_ids, tour), stats
+
+
+def brute_force_tsp(dist, node_ids, on_progress=None, deadline=None):
     """
     Brute Force TSP approach:
     - Generate all permutations of the other nodes,
@@ -597,25 +934,33 @@ def brute_force_tsp(graph, start):
     - Pick the best one.
 
     Args:
-        graph (nx.DiGraph): The complete graph of selected nodes.
-        start (str): The node to start from.
+        dist (np.ndarray): The distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        on_progress (callable, optional): Called as on_progress(fraction, best_length)
+                                          every BF_CHECK_EVERY permutations.
+        deadline (float, optional): local_search.Deadline (a perf_counter
+                                    float whose .reached records truncation)
+                                    at which the enumeration stops with the
+                                    best route so far.
 
     Returns:
         list: The best route found (excluding the repeated start at the end).
     """
-    nodes = list(graph.nodes)
-    if start in nodes:
-        nodes.remove(start)
+    rows = dist.tolist()
     min_len = float('inf')
-    best_perm = None
-
-    for perm in itertools.permutations(nodes):
-        candidate = [start] + list(perm) + [start]
-        length_ = calculate_route_length(graph, candidate)
+    best_tour = (0,)
+    total = math.factorial(len(node_ids) - 1)
+
+    for count, perm in enumerate(itertools.permutations(range(1, len(node_ids)))):
+        if count % BF_CHECK_EVERY == 0:
+            if count and expired(deadline):
+                break
+            if on_progress is not None:
+                on_progress(count / total, min_len if best_tour != (0,) else None)
+        candidate = (0,) + perm
+        length_ = tour_length(rows, candidate)
         if length_ < min_len:
             min_len = length_
-            best_perm = candidate
+            best_tour = candidate
 
-    if best_perm is None:
-        return []
-    return best_perm[:-1]  # Remove duplicate start at the end
+    return _route(node_ids, best_tour)
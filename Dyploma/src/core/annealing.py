@@ -0,0 +1,179 @@
+#=====================================================
+# File: /src/core/annealing.py
+#=====================================================
+
+import math
+import random
+import time
+
+from src.core.local_search import earlier, expired, tour_length
+
+SA_TIME_LIMIT_S = 1.0          # Default wall-clock budget
+ITERATIONS_PER_POINT = 2000    # Default move budget = ITERATIONS_PER_POINT * n
+INITIAL_ACCEPTANCE = 0.05      # Acceptance probability of an average uphill move at the start
+FINAL_ACCEPTANCE = 1e-8        # ... and at the end of the schedule
+SAMPLE_MOVES = 200             # Random moves sampled to calibrate the temperature
+CHECK_EVERY = 256              # Moves between clock checks
+SEEDED_ITERATIONS = 150000     # Move budget of a seeded run on a small tour (see seeded_iterations)
+SEEDED_BASE_POINTS = 300       # Tour size at which a move takes about twice as long as on a small tour
+
+
+class _AnnealState:
+    """
+    Current tour of the annealer with forward/backward prefix sums of its
+    edges, which make the cost change of a reversal or a relocation O(1).
+    Applying a move stays O(n): the list is rearranged and the prefix sums
+    after the move are rebuilt. tour[0] never moves.
+    """
+
+    def __init__(self, dist, tour):
+        self.dist = dist
+        self.tour = list(tour)
+        self.n = len(tour)
+        self.F = [0.0] * self.n
+        self.B = [0.0] * self.n
+        self._refresh(0)
+        self.length = tour_length(dist, self.tour)
+
+    def _refresh(self, start):
+        tour, dist, F, B = self.tour, self.dist, self.F, self.B
+        for t in range(max(start, 0), self.n - 1):
+            a, b = tour[t], tour[t + 1]
+            F[t + 1] = F[t] + dist[a][b]
+            B[t + 1] = B[t] + dist[b][a]
+
+    def reverse_delta(self, p, q):
+        # Reversal of tour[p..q], 1 <= p < q <= n-1.
+        tour, dist = self.tour, self.dist
+        u, v, w, x = tour[p - 1], tour[p], tour[q], tour[(q + 1) % self.n]
+        return (dist[u][w] + dist[v][x] - dist[u][v] - dist[w][x]
+                + (self.B[q] - self.B[p]) - (self.F[q] - self.F[p]))
+
+    def reverse(self, p, q, delta):
+        self.tour[p:q + 1] = self.tour[p:q + 1][::-1]
+        self._refresh(p - 1)
+        self.length += delta
+
+    def relocate_delta(self, i, g):
+        # Move tour[i] (i >= 1) into the gap after tour[g], g not in (i-1, i).
+        tour, dist, n = self.tour, self.dist, self.n
+        prev, c, nxt = tour[i - 1], tour[i], tour[(i + 1) % n]
+        a, b = tour[g], tour[(g + 1) % n]
+        return (dist[prev][nxt] - dist[prev][c] - dist[c][nxt]
+                + dist[a][c] + dist[c][b] - dist[a][b])
+
+    def relocate(self, i, g, delta):
+        c = self.tour.pop(i)
+        at = g + 1 if g < i else g
+        self.tour.insert(at, c)
+        self._refresh(min(i, at) - 1)
+        self.length += delta
+
+
+def _random_move(state, rng):
+    # Returns (kind, a, b, delta) of a uniformly drawn reversal or relocation.
+    n = state.n
+    if rng.random() < 0.5:
+        p = rng.randint(1, n - 2)
+        q = rng.randint(p + 1, n - 1)
+        return 'reverse', p, q, state.reverse_delta(p, q)
+    i = rng.randint(1, n - 1)
+    g = rng.randint(0, n - 3)
+    if g >= i - 1:
+        g += 2                  # Skip the two gaps next to tour[i]
+    return 'relocate', i, g % n, state.relocate_delta(i, g % n)
+
+
+def seeded_iterations(n):
+    """
+    Returns the default move budget of a seeded run on n points. It depends
+    on n alone, so that a seed always gives the same schedule: at most
+    ITERATIONS_PER_POINT * n, and fewer on larger tours, where applying
+    moves and copying new best tours make a move take time growing about
+    with n^2, so that the schedule takes about half of SA_TIME_LIMIT_S at
+    any size.
+    """
+    return min(ITERATIONS_PER_POINT * n,
+               SEEDED_ITERATIONS * SEEDED_BASE_POINTS ** 2 // (SEEDED_BASE_POINTS ** 2 + n * n))
+
+
+def anneal_tour(dist, tour, time_limit=SA_TIME_LIMIT_S, max_iterations=None, seed=None,
+                on_progress=None, deadline=None):
+    """
+    Simulated annealing over reversal and relocation moves.
+
+    The current and the best tour are kept separately. The start temperature
+    is calibrated on a sample of random moves so that an average uphill move
+    is accepted with probability INITIAL_ACCEPTANCE, and the temperature
+    decreases geometrically to FINAL_ACCEPTANCE over the budget. Progress is
+    measured in moves or in elapsed time, whichever runs out first, so the
+    whole schedule is always walked.
+
+    With a seed the schedule follows the move budget alone, which defaults
+    to seeded_iterations(n), so that the result depends only on the seed,
+    the start tour and the budget. A seeded run that the time limit or the
+    deadline cuts short returns the start tour unchanged (and marks a
+    Deadline as reached), rather than a tour that depends on when it was
+    stopped. The start tour is kept as the best one until a shorter tour is
+    found, so the result is never worse than the start.
+
+    Args:
+        dist (list): n x n distance matrix.
+        tour (list): Initial tour of point indices; tour[0] is the fixed start.
+        time_limit (float): Wall-clock budget in seconds.
+        max_iterations (int, optional): Move budget; defaults to
+                                        ITERATIONS_PER_POINT * n, or
+                                        seeded_iterations(n) with a seed.
+        seed (int, optional): Seed of the random moves.
+        on_progress (callable, optional): Called as on_progress(fraction, best_length)
+                                          at every clock check.
+        deadline (float, optional): local_search.Deadline (a perf_counter
+                                    float whose .reached records truncation)
+                                    that shortens time_limit if it comes first.
+
+    Returns:
+        list: The best tour found.
+    """
+    n = len(tour)
+    if n < 4:
+        return list(tour)
+    if max_iterations is None:
+        max_iterations = ITERATIONS_PER_POINT * n if seed is None else seeded_iterations(n)
+    rng = random.Random(seed)
+    state = _AnnealState(dist, tour)
+
+    start_time = time.perf_counter()
+    deadline = earlier(deadline, start_time + time_limit)
+    time_limit = max(0.0, deadline - start_time)
+    uphill = [d for _, _, _, d in (_random_move(state, rng) for _ in range(SAMPLE_MOVES)) if d > 0]
+    average = sum(uphill) / len(uphill) if uphill else 1.0
+    t_start = -average / math.log(INITIAL_ACCEPTANCE)
+    t_end = -average / math.log(FINAL_ACCEPTANCE)
+    ratio = t_end / t_start
+
+    best = list(state.tour)
+    best_length = state.length
+    temperature = t_start
+    for iteration in range(max_iterations):
+        if iteration % CHECK_EVERY == 0:
+            if expired(deadline):
+                if seed is not None:
+                    return list(tour)
+                break
+            progress = iteration / max_iterations
+            if seed is None:
+                progress = max(progress, (time.perf_counter() - start_time) / time_limit)
+            temperature = t_start * ratio ** progress
+            if on_progress is not None:
+                on_progress(progress, best_length)
+
+        kind, a, b, delta = _random_move(state, rng)
+        if delta < 0 or rng.random() < math.exp(-delta / temperature):
+            if kind == 'reverse':
+                state.reverse(a, b, delta)
+            else:
+                state.relocate(a, b, delta)
+            if state.length < best_length - 1e-9:
+                best = list(state.tour)
+                best_length = state.length
+    return best
@@ -0,0 +1,205 @@
+#=====================================================
+# File: /src/core/construction.py
+#=====================================================
+
+import numpy as np
+
+from src.core.local_search import tour_length
+
+# Rules of insertion_tour() for choosing the next point.
+INSERTION_RULES = ('nearest', 'farthest', 'cheapest')
+
+
+class _DisjointSet:
+    """
+    Union-find over point indices with path halving and union by size.
+    """
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, a):
+        parent = self.parent
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+
+def _walk(successor, start=0):
+    # Tour given by a successor array, from 'start'.
+    tour = [start]
+    current = int(successor[start])
+    while current != start:
+        tour.append(current)
+        current = int(successor[current])
+    return tour
+
+
+def nearest_neighbor_tour(dist):
+    """
+    Nearest neighbour construction: from point 0, always move to the closest
+    unvisited point. Each step is one array operation over the matrix row.
+
+    Args:
+        dist (list or np.ndarray): n x n distance matrix.
+
+    Returns:
+        list: Tour of point indices starting at 0.
+    """
+    D = np.asarray(dist, dtype=np.float64)
+    n = len(D)
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[0] = False
+    tour = [0]
+    current = 0
+    for _ in range(n - 1):
+        left = np.flatnonzero(unvisited)
+        current = int(left[np.argmin(D[current, left])])
+        unvisited[current] = False
+        tour.append(current)
+    return tour
+
+
+def insertion_tour(dist, rule='cheapest'):
+    """
+    Insertion construction: grows a closed tour from point 0, inserting one
+    point per step at the tour edge where it adds the least length.
+
+    The rule chooses the point:
+        'nearest'  - the point closest to the tour,
+        'farthest' - the point farthest from the tour,
+        'cheapest' - the point with the smallest insertion cost.
+    The distance of every point to the tour, and for 'cheapest' the best
+    insertion edge of every point, are kept in arrays and updated for the
+    edges each insertion creates, so a step is a few array operations and
+    the whole construction O(n^2) (cheapest: plus the points whose best edge
+    was just removed).
+
+    Args:
+        dist (list or np.ndarray): n x n distance matrix.
+        rule (str): One of INSERTION_RULES.
+
+    Returns:
+        list: Tour of point indices starting at 0.
+    """
+    if rule not in INSERTION_RULES:
+        raise ValueError(f'Unknown insertion rule {rule}')
+    D = np.asarray(dist, dtype=np.float64)
+    n = len(D)
+    if n < 3:
+        return list(range(n))
+
+    # The tour starts as the loop 0 -> 0; edge a -> successor[a].
+    successor = np.zeros(n, dtype=np.int64)
+    in_tour = np.zeros(n, dtype=bool)
+    in_tour[0] = True
+    to_tour = np.minimum(D[0], D[:, 0])
+    best_cost = D[0] + D[:, 0]              # Insertion cost into the loop at 0
+    best_from = np.zeros(n, dtype=np.int64)
+
+    for _ in range(n - 1):
+        left = np.flatnonzero(~in_tour)
+        if rule == 'cheapest':
+            v = int(left[np.argmin(best_cost[left])])
+            a = int(best_from[v])
+        else:
+            pick = np.argmin(to_tour[left]) if rule == 'nearest' else np.argmax(to_tour[left])
+            v = int(left[pick])
+            starts = np.flatnonzero(in_tour)
+            ends = successor[starts]
+            a = int(starts[np.argmin(D[starts, v] + D[v, ends] - D[starts, ends])])
+        b = int(successor[a])
+        successor[a] = v
+        successor[v] = b
+        in_tour[v] = True
+        to_tour = np.minimum(to_tour, np.minimum(D[v], D[:, v]))
+
+        if rule == 'cheapest' and len(left) > 1:
+            left = left[left != v]
+            # Points whose best edge a -> b is gone look at the whole tour again.
+            stale = left[best_from[left] == a]
+            if len(stale):
+                starts = np.flatnonzero(in_tour)
+                ends = successor[starts]
+                costs = (D[np.ix_(starts, stale)] + D[np.ix_(stale, ends)].T
+                         - D[starts, ends][:, None])
+                best = np.argmin(costs, axis=0)
+                best_cost[stale] = costs[best, np.arange(len(stale))]
+                best_from[stale] = starts[best]
+            # The others only compare with the new edges a -> v and v -> b.
+            fresh = left[best_from[left] != a]
+            for s, e in ((a, v), (v, b)):
+                costs = D[s, fresh] + D[fresh, e] - D[s, e]
+                better = costs < best_cost[fresh]
+                best_cost[fresh[better]] = costs[better]
+                best_from[fresh[better]] = s
+    return _walk(successor)
+
+
+def greedy_edge_tour(dist):
+    """
+    Greedy edge construction.
+
+    All point pairs are sorted once by their average length in both
+    directions. A pair is accepted as a tour edge if both points still have
+    fewer than two tour edges and they lie in different path fragments
+    (union-find), so no cycle closes early. After n - 1 accepted edges the
+    fragments form one path, which is closed into a cycle and then walked in
+    the direction that is shorter for the asymmetric distances. The work is
+    dominated by the sort, O(n^2 log n).
+
+    Building directed fragments instead (one successor and one predecessor
+    per point) leaves long edges for the end and gives worse tours on road
+    distances, which are nearly symmetric.
+
+    Args:
+        dist (list or np.ndarray): n x n distance matrix.
+
+    Returns:
+        list: Tour of point indices starting at 0.
+    """
+    D = np.asarray(dist, dtype=np.float64)
+    n = len(D)
+    if n < 3:
+        return list(range(n))
+
+    rows, cols = np.triu_indices(n, 1)
+    order = np.argsort((D[rows, cols] + D[cols, rows]) / 2.0, kind='stable')
+    adjacent = [[] for _ in range(n)]
+    fragments = _DisjointSet(n)
+    accepted = 0
+    for i, j in zip(rows[order].tolist(), cols[order].tolist()):
+        if len(adjacent[i]) == 2 or len(adjacent[j]) == 2:
+            continue
+        if not fragments.union(i, j):
+            continue
+        adjacent[i].append(j)
+        adjacent[j].append(i)
+        accepted += 1
+        if accepted == n - 1:
+            break
+
+    head, tail = [v for v in range(n) if len(adjacent[v]) < 2]
+    adjacent[head].append(tail)
+    adjacent[tail].append(head)
+
+    tour = [0]
+    previous, current = -1, 0
+    for _ in range(n - 1):
+        a, b = adjacent[current]
+        previous, current = current, (b if a == previous else a)
+        tour.append(current)
+    reverse = tour[:1] + tour[:0:-1]
+    return tour if tour_length(D, tour) <= tour_length(D, reverse) else reverse
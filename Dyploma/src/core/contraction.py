@@ -0,0 +1,452 @@
+#=====================================================
+# File: /src/core/contraction.py
+#=====================================================
+
+import os
+import heapq
+import math
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the on-disk layout below changes.
+FORMAT_VERSION = 1
+
+# Settled-node limits of the witness searches during preprocessing.
+# Lower limits are faster but may add unnecessary (still correct) shortcuts.
+WITNESS_SETTLE_LIMIT_SIMULATE = 30
+WITNESS_SETTLE_LIMIT_CONTRACT = 150
+
+
+def _witness_search(out_adj, source, excluded, targets, max_dist, settle_limit):
+    """
+    Bounded Dijkstra from 'source' that ignores 'excluded' and stops once all
+    targets are settled, max_dist is exceeded or settle_limit nodes are settled.
+
+    Returns:
+        dict: Tentative distances of the reached nodes.
+    """
+    remaining = set(targets)
+    dist = {source: 0.0}
+    settled = set()
+    heap = [(0.0, source)]
+    while heap and remaining and len(settled) < settle_limit:
+        d, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        if d > max_dist:
+            break
+        settled.add(u)
+        remaining.discard(u)
+        for v, w in out_adj[u].items():
+            if v == excluded or v in settled:
+                continue
+            nd = d + w
+            if nd < dist.get(v, math.inf):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+def _find_shortcuts(out_adj, in_adj, v, settle_limit):
+    """
+    Returns the shortcuts (u, w, weight) needed if node v were contracted now.
+    """
+    shortcuts = []
+    outs = list(out_adj[v].items())
+    for u, w_in in in_adj[v].items():
+        targets = {w: w_in + w_out for w, w_out in outs if w != u}
+        if not targets:
+            continue
+        dist = _witness_search(out_adj, u, v, targets, max(targets.values()), settle_limit)
+        for w, d in targets.items():
+            if dist.get(w, math.inf) > d:
+                shortcuts.append((u, w, d))
+    return shortcuts
+
+
+def _to_csr(num_nodes, lists):
+    """
+    Packs per-node [(neighbor, weight), ...] lists into (indptr, indices, weights).
+    """
+    indptr = np.zeros(num_nodes + 1, dtype=np.int32)
+    np.cumsum([len(lst) for lst in lists], out=indptr[1:])
+    indices = np.fromiter((n for lst in lists for n, _ in lst), dtype=np.int32, count=indptr[-1])
+    weights = np.fromiter((w for lst in lists for _, w in lst), dtype=np.float64, count=indptr[-1])
+    return indptr, indices, weights
+
+
+def index_path_for(graphml_path):
+    """
+    Returns the path of the CH index file that belongs to a city graph file.
+    Example: cities/wroclaw.graphml -> cities/wroclaw.ch.npz
+    """
+    return os.path.splitext(graphml_path)[0] + '.ch.npz'
+
+
+def graph_signature(csr):
+    """
+    A cheap fingerprint of a CSRGraph, stored with the index so that a stale
+    file is never used for a different graph.
+    """
+    return np.array([csr.num_nodes, csr.num_edges, float(csr.lengths.sum())], dtype=np.float64)
+
+
+class ContractionHierarchy:
+    """
+    Contraction Hierarchies index of a directed city graph.
+
+    Every node has a rank (its contraction order). The forward search graph
+    ('up') holds the edges u->w with rank[w] > rank[u]; the backward search
+    graph ('down') holds, for every node w, the edges u->w with rank[u] > rank[w],
+    stored from w's side. Both contain shortcuts; the middle node of every
+    shortcut is kept so that paths can be unpacked into original graph nodes.
+    """
+
+    def __init__(self, rank, up, down, shortcut_u, shortcut_w, shortcut_mid, signature):
+        self.rank = rank
+        self.up_indptr, self.up_indices, self.up_weights = up
+        self.down_indptr, self.down_indices, self.down_weights = down
+        self.signature = signature
+        self.middle = {
+            (u, w): m for u, w, m in zip(shortcut_u.tolist(), shortcut_w.tolist(), shortcut_mid.tolist())
+        }
+        self._shortcut_arrays = (shortcut_u, shortcut_w, shortcut_mid)
+
+    @property
+    def num_shortcuts(self):
+        return len(self.middle)
+
+    def save(self, filepath):
+        """
+        Writes the index to a .npz file.
+        """
+        shortcut_u, shortcut_w, shortcut_mid = self._shortcut_arrays
+        np.savez(
+            filepath,
+            format_version=np.array(FORMAT_VERSION),
+            signature=self.signature,
+            rank=self.rank,
+            up_indptr=self.up_indptr, up_indices=self.up_indices, up_weights=self.up_weights,
+            down_indptr=self.down_indptr, down_indices=self.down_indices, down_weights=self.down_weights,
+            shortcut_u=shortcut_u, shortcut_w=shortcut_w, shortcut_mid=shortcut_mid
+        )
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Reads an index written by save().
+
+        Raises:
+            ValueError: If the file was written with an unsupported format version.
+        """
+        with np.load(filepath, allow_pickle=False) as data:
+            if int(data['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported CH format version {int(data['format_version'])}")
+            return cls(
+                data['rank'],
+                (data['up_indptr'], data['up_indices'], data['up_weights']),
+                (data['down_indptr'], data['down_indices'], data['down_weights']),
+                data['shortcut_u'], data['shortcut_w'], data['shortcut_mid'],
+                data['signature']
+            )
+
+    def _upward_search(self, source, backward=False):
+        """
+        Full Dijkstra search from 'source' in the forward (or backward) upward graph.
+
+        Returns:
+            (dict, dict): distances and predecessors of every reached node.
+        """
+        if backward:
+            indptr, indices, weights = self.down_indptr, self.down_indices, self.down_weights
+        else:
+            indptr, indices, weights = self.up_indptr, self.up_indices, self.up_weights
+        dist = {source: 0.0}
+        pred = {}
+        settled = {}
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            settled[u] = d
+            start, end = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+                nd = d + w
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return settled, pred
+
+    def unpack_edge(self, u, w):
+        """
+        Expands a (possibly shortcut) edge u->w into original graph nodes.
+
+        Returns:
+            list: Node indices from u to w.
+        """
+        path = [u]
+        stack = [(u, w)]
+        while stack:
+            a, b = stack.pop()
+            m = self.middle.get((a, b))
+            if m is None:
+                path.append(b)
+            else:
+                stack.append((m, b))
+                stack.append((a, m))
+        return path
+
+    def _unpack_chains(self, meet, fwd_pred, bwd_pred, source, target):
+        """
+        Builds the full node path source -> meet -> target from both search trees.
+        """
+        up_chain = [meet]
+        while up_chain[-1] != source:
+            up_chain.append(fwd_pred[up_chain[-1]])
+        up_chain.reverse()
+        down_chain = [meet]
+        while down_chain[-1] != target:
+            down_chain.append(bwd_pred[down_chain[-1]])
+        chain = up_chain + down_chain[1:]
+
+        path = [source]
+        for a, b in zip(chain, chain[1:]):
+            path.extend(self.unpack_edge(a, b)[1:])
+        return path
+
+    def query(self, source, target):
+        """
+        Point-to-point shortest path via a bidirectional upward search.
+
+        Args:
+            source (int): Source node index.
+            target (int): Target node index.
+
+        Returns:
+            (float, list): (distance, path of node indices), or (math.inf, None).
+        """
+        if source == target:
+            return 0.0, [source]
+
+        dist = ({source: 0.0}, {target: 0.0})
+        pred = ({}, {})
+        settled = (set(), set())
+        heaps = ([(0.0, source)], [(0.0, target)])
+        graphs = (
+            (self.up_indptr, self.up_indices, self.up_weights),
+            (self.down_indptr, self.down_indices, self.down_weights)
+        )
+        best = math.inf
+        meet = -1
+
+        while heaps[0] or heaps[1]:
+            # Alternate directions; a direction is finished once its minimum exceeds best.
+            for side in (0, 1):
+                heap = heaps[side]
+                if not heap:
+                    continue
+                if heap[0][0] >= best:
+                    heap.clear()
+                    continue
+                d, u = heapq.heappop(heap)
+                if u in settled[side]:
+                    continue
+                settled[side].add(u)
+                other = dist[1 - side].get(u)
+                if other is not None and d + other < best:
+                    best = d + other
+                    meet = u
+                indptr, indices, weights = graphs[side]
+                start, end = indptr[u], indptr[u + 1]
+                for v, w in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+                    nd = d + w
+                    if nd < dist[side].get(v, math.inf):
+                        dist[side][v] = nd
+                        pred[side][v] = u
+                        heapq.heappush(heap, (nd, v))
+
+        if meet < 0:
+            return math.inf, None
+        return best, self._unpack_chains(meet, pred[0], pred[1], source, target)
+
+    def many_to_many(self, node_ids, indices):
+        """
+        Bucket-based many-to-many query between all given nodes.
+
+        One backward upward search per target fills the buckets of the nodes
+        it reaches; one forward upward search per source then scans them.
+
+        Args:
+            node_ids (list): Node IDs (strings) of the selected nodes.
+            indices (list): The matching node indices.
+
+        Returns:
+            (list, CHPaths): (matrix, trees) in the format of
+                             distance_matrix.compute_distance_matrix.
+        """
+        n = len(indices)
+        buckets = {}
+        bwd_preds = []
+        for j, t in enumerate(indices):
+            dist, pred = self._upward_search(t, backward=True)
+            bwd_preds.append(pred)
+            for v, d in dist.items():
+                buckets.setdefault(v, []).append((j, d))
+
+        matrix = [[math.inf] * n for _ in range(n)]
+        meets = [[-1] * n for _ in range(n)]
+        fwd_preds = []
+        for i, s in enumerate(indices):
+            dist, pred = self._upward_search(s)
+            fwd_preds.append(pred)
+            row = matrix[i]
+            meet_row = meets[i]
+            for v, d in dist.items():
+                for j, dt in buckets.get(v, ()):
+                    if d + dt < row[j]:
+                        row[j] = d + dt
+                        meet_row[j] = v
+            row[i] = 0.0
+            meet_row[i] = s
+
+        return matrix, CHPaths(self, node_ids, indices, meets, fwd_preds, bwd_preds)
+
+
+class CHPaths:
+    """
+    Path lookup for a many-to-many CH result, compatible with
+    distance_matrix.ShortestPathTrees.
+    """
+
+    def __init__(self, ch, node_ids, indices, meets, fwd_preds, bwd_preds):
+        self.ch = ch
+        self.position = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.indices = indices
+        self.meets = meets
+        self.fwd_preds = fwd_preds
+        self.bwd_preds = bwd_preds
+
+    def path(self, u, v):
+        """
+        Returns the unpacked node index path from node ID u to node ID v, or None.
+        """
+        i = self.position[u]
+        j = self.position[v]
+        meet = self.meets[i][j]
+        if meet < 0:
+            return None
+        return self.ch._unpack_chains(
+            meet, self.fwd_preds[i], self.bwd_preds[j], self.indices[i], self.indices[j]
+        )
+
+
+def build_contraction_hierarchy(csr):
+    """
+    Preprocesses a CSRGraph into a ContractionHierarchy.
+
+    Nodes are contracted in order of a lazily updated priority
+    (edge difference + number of already contracted neighbours).
+
+    Args:
+        csr (CSRGraph): The compact city graph.
+
+    Returns:
+        ContractionHierarchy: The index.
+    """
+    n = csr.num_nodes
+    out_adj = [dict() for _ in range(n)]
+    in_adj = [dict() for _ in range(n)]
+    indptr = csr.indptr.tolist()
+    targets = csr.indices.tolist()
+    lengths = csr.lengths.tolist()
+    for u in range(n):
+        for e in range(indptr[u], indptr[u + 1]):
+            v = targets[e]
+            if v != u:
+                out_adj[u][v] = lengths[e]
+                in_adj[v][u] = lengths[e]
+
+    deleted_neighbors = [0] * n
+    middle = {}
+
+    def priority(v):
+        shortcuts = _find_shortcuts(out_adj, in_adj, v, WITNESS_SETTLE_LIMIT_SIMULATE)
+        return len(shortcuts) - len(in_adj[v]) - len(out_adj[v]) + deleted_neighbors[v]
+
+    heap = [(priority(v), v) for v in range(n)]
+    heapq.heapify(heap)
+
+    rank = np.full(n, -1, dtype=np.int32)
+    up_lists = [None] * n
+    down_lists = [None] * n
+    order = 0
+
+    while heap:
+        _, v = heapq.heappop(heap)
+        if rank[v] >= 0:
+            continue
+        # Lazy update: re-evaluate and postpone if v is no longer the best choice.
+        current = priority(v)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, v))
+            continue
+
+        for u, w, d in _find_shortcuts(out_adj, in_adj, v, WITNESS_SETTLE_LIMIT_CONTRACT):
+            if d < out_adj[u].get(w, math.inf):
+                out_adj[u][w] = d
+                in_adj[w][u] = d
+                middle[(u, w)] = v
+
+        rank[v] = order
+        order += 1
+        # All remaining neighbours are contracted later, so they rank higher.
+        up_lists[v] = list(out_adj[v].items())
+        down_lists[v] = list(in_adj[v].items())
+        for w in out_adj[v]:
+            del in_adj[w][v]
+            deleted_neighbors[w] += 1
+        for u in in_adj[v]:
+            del out_adj[u][v]
+            deleted_neighbors[u] += 1
+        out_adj[v] = {}
+        in_adj[v] = {}
+
+        if order % 10000 == 0:
+            logger.info(f"CH preprocessing: {order}/{n} nodes contracted, {len(middle)} shortcuts.")
+
+    # Only shortcuts that survived as search-graph edges are needed for unpacking.
+    used = {(v, w) for v in range(n) for w, _ in up_lists[v]}
+    used.update((u, v) for v in range(n) for u, _ in down_lists[v])
+    kept = [(u, w, m) for (u, w), m in middle.items() if (u, w) in used]
+    kept = _close_shortcuts(kept, middle)
+
+    return ContractionHierarchy(
+        rank,
+        _to_csr(n, up_lists),
+        _to_csr(n, down_lists),
+        np.array([k[0] for k in kept], dtype=np.int32),
+        np.array([k[1] for k in kept], dtype=np.int32),
+        np.array([k[2] for k in kept], dtype=np.int32),
+        graph_signature(csr)
+    )
+
+
+def _close_shortcuts(kept, middle):
+    """
+    Adds every shortcut that is needed to unpack the kept shortcuts recursively.
+    """
+    result = {}
+    stack = [(u, w) for u, w, _ in kept]
+    while stack:
+        key = stack.pop()
+        if key in result or key not in middle:
+            continue
+        m = middle[key]
+        result[key] = m
+        stack.append((key[0], m))
+        stack.append((m, key[1]))
+    return [(u, w, m) for (u, w), m in result.items()]
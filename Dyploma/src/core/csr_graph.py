@@ -0,0 +1,292 @@
+#=====================================================
+# File: /src/core/csr_graph.py
+#=====================================================
+
+import heapq
+import math
+import numpy as np
+
+# Earth radius used by OSMnx when it computes edge lengths (meters).
+EARTH_RADIUS_M = 6371009
+
+# Number of queries and settled nodes per search type, used to compare
+# how much of the graph each engine explores. Reset with reset_search_stats().
+search_stats = {}
+
+
+def record_search(kind, settled):
+    """
+    Adds one query that settled 'settled' nodes to the counters of 'kind'.
+    """
+    stats = search_stats.setdefault(kind, {'queries': 0, 'settled': 0})
+    stats['queries'] += 1
+    stats['settled'] += settled
+
+
+def reset_search_stats():
+    """
+    Clears all search counters.
+    """
+    search_stats.clear()
+
+
+class CSRGraph:
+    """
+    Compact, array-backed adjacency of a directed city graph.
+
+    Nodes are numbered 0..n-1. The outgoing edges of node i are stored in
+    indices[indptr[i]:indptr[i + 1]] with their lengths at the same positions
+    in 'lengths'. Parallel edges are collapsed to the shortest one, whose
+    MultiDiGraph key is kept in 'edge_keys' for geometry lookups.
+
+    Attributes:
+        node_ids (np.ndarray): int64 OSM node ID of every node index.
+        index_of (dict): OSM node ID -> node index.
+        x (np.ndarray): float64 longitude of every node.
+        y (np.ndarray): float64 latitude of every node.
+        indptr (np.ndarray): int32 offsets into 'indices', length n + 1.
+        indices (np.ndarray): int32 target node index of every edge.
+        lengths (np.ndarray): float64 length of every edge in meters.
+        edge_keys (np.ndarray): int32 MultiDiGraph key of every edge.
+    """
+
+    def __init__(self, node_ids, x, y, indptr, indices, lengths, edge_keys, index_of=None):
+        self.node_ids = node_ids
+        if index_of is None:
+            index_of = {int(n): i for i, n in enumerate(node_ids.tolist())}
+        self.index_of = index_of
+        self.x = x
+        self.y = y
+        self.indptr = indptr
+        self.indices = indices
+        self.lengths = lengths
+        self.edge_keys = edge_keys
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def edge_index(self, u, v):
+        """
+        Returns the position of edge u->v in the edge arrays, or -1 if absent.
+
+        Args:
+            u (int): Source node index.
+            v (int): Target node index.
+
+        Returns:
+            int: Edge position or -1.
+        """
+        start, end = self.indptr[u], self.indptr[u + 1]
+        hits = np.flatnonzero(self.indices[start:end] == v)
+        if len(hits) == 0:
+            return -1
+        return int(start + hits[0])
+
+
+def build_csr_graph(G, weight='length'):
+    """
+    Builds a CSRGraph from an OSMnx MultiDiGraph.
+
+    Args:
+        G (nx.MultiDiGraph): The city graph.
+        weight (str): Edge attribute used as the edge length.
+
+    Returns:
+        CSRGraph: The compact adjacency of G.
+    """
+    node_ids = np.fromiter(G.nodes, dtype=np.int64, count=G.number_of_nodes())
+    index_of = {int(n): i for i, n in enumerate(node_ids.tolist())}
+    x = np.array([G.nodes[n]['x'] for n in G.nodes], dtype=np.float64)
+    y = np.array([G.nodes[n]['y'] for n in G.nodes], dtype=np.float64)
+
+    num_edges = G.number_of_edges()
+    edge_u = np.empty(num_edges, dtype=np.int32)
+    edge_v = np.empty(num_edges, dtype=np.int32)
+    edge_key = np.empty(num_edges, dtype=np.int32)
+    edge_length = np.empty(num_edges, dtype=np.float64)
+    for i, (u, v, k, length) in enumerate(G.edges(keys=True, data=weight, default=0)):
+        edge_u[i] = index_of[u]
+        edge_v[i] = index_of[v]
+        edge_key[i] = k if isinstance(k, int) else 0
+        edge_length[i] = length
+
+    return csr_from_edges(node_ids, x, y, edge_u, edge_v, edge_key, edge_length)
+
+
+def csr_from_edges(node_ids, x, y, edge_u, edge_v, edge_key, edge_length):
+    """
+    Builds a CSRGraph from flat edge arrays (one entry per MultiDiGraph edge).
+    Parallel edges are collapsed to the shortest one.
+
+    Args:
+        node_ids (np.ndarray): int64 OSM node IDs.
+        x (np.ndarray): Node longitudes.
+        y (np.ndarray): Node latitudes.
+        edge_u (np.ndarray): Source node index of every edge.
+        edge_v (np.ndarray): Target node index of every edge.
+        edge_key (np.ndarray): MultiDiGraph key of every edge.
+        edge_length (np.ndarray): Length of every edge.
+
+    Returns:
+        CSRGraph: The compact adjacency.
+    """
+    # Sort by (u, v, length) so that the first edge of each (u, v) run is the shortest.
+    order = np.lexsort((edge_length, edge_v, edge_u))
+    u = edge_u[order]
+    v = edge_v[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+    order = order[keep]
+
+    indptr = np.zeros(len(node_ids) + 1, dtype=np.int32)
+    np.cumsum(np.bincount(edge_u[order], minlength=len(node_ids)), out=indptr[1:])
+
+    return CSRGraph(
+        np.asarray(node_ids, dtype=np.int64),
+        np.asarray(x, dtype=np.float64),
+        np.asarray(y, dtype=np.float64),
+        indptr,
+        edge_v[order].astype(np.int32),
+        edge_length[order].astype(np.float64),
+        edge_key[order].astype(np.int32)
+    )
+
+
+def transpose_csr(csr):
+    """
+    Returns the CSRGraph with every edge reversed (same node numbering).
+    Searching it from t yields distances *to* t in the original graph.
+    """
+    counts = np.diff(csr.indptr)
+    sources = np.repeat(np.arange(csr.num_nodes, dtype=np.int32), counts)
+    order = np.argsort(csr.indices, kind='stable')
+    indptr = np.zeros(csr.num_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(csr.indices, minlength=csr.num_nodes), out=indptr[1:])
+    return CSRGraph(
+        csr.node_ids, csr.x, csr.y, indptr,
+        sources[order], csr.lengths[order], csr.edge_keys[order],
+        index_of=csr.index_of
+    )
+
+
+def dijkstra(csr, source, targets=None):
+    """
+    Heap-based Dijkstra search on a CSRGraph.
+    If 'targets' is given, the search stops once every target is settled.
+
+    Args:
+        csr (CSRGraph): The compact city graph.
+        source (int): Source node index.
+        targets (iterable, optional): Node indices whose distances are required.
+
+    Returns:
+        (dict, dict): (dist, pred) mapping every settled node index to its
+                      distance and to its predecessor index.
+    """
+    indptr = csr.indptr
+    indices = csr.indices
+    lengths = csr.lengths
+
+    remaining = None
+    if targets is not None:
+        remaining = set(targets)
+        remaining.discard(source)
+
+    dist = {source: 0.0}
+    pred = {}
+    settled = {}
+    heap = [(0.0, source)]
+
+    while heap:
+        if remaining is not None and not remaining:
+            break
+        d, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        settled[u] = d
+        if remaining is not None:
+            remaining.discard(u)
+
+        start, end = indptr[u], indptr[u + 1]
+        for v, length in zip(indices[start:end].tolist(), lengths[start:end].tolist()):
+            if v in settled:
+                continue
+            nd = d + length
+            if nd < dist.get(v, math.inf):
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd, v))
+
+    record_search('dijkstra', len(settled))
+    return settled, {n: pred[n] for n in settled if n in pred}
+
+
+def astar(csr, source, target):
+    """
+    A* point-to-point search on a CSRGraph using the great-circle distance
+    to the target as the heuristic.
+
+    Args:
+        csr (CSRGraph): The compact city graph.
+        source (int): Source node index.
+        target (int): Target node index.
+
+    Returns:
+        (float, list): (distance, path of node indices), or (math.inf, None)
+                       if the target cannot be reached.
+    """
+    indptr = csr.indptr
+    indices = csr.indices
+    lengths = csr.lengths
+
+    # Convert coordinates to radians once for the whole search.
+    lat_t = math.radians(csr.y[target])
+    lon_t = math.radians(csr.x[target])
+    cos_t = math.cos(lat_t)
+    lat_all = csr.y
+    lon_all = csr.x
+
+    def heuristic(n):
+        lat = math.radians(lat_all[n])
+        dlat = lat_t - lat
+        dlon = lon_t - math.radians(lon_all[n])
+        a = math.sin(dlat / 2) ** 2 + math.cos(lat) * cos_t * math.sin(dlon / 2) ** 2
+        # Slightly shrink the estimate to stay admissible despite rounding.
+        return 0.999 * 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+    dist = {source: 0.0}
+    pred = {}
+    closed = set()
+    heap = [(heuristic(source), 0.0, source)]
+
+    while heap:
+        _, d, u = heapq.heappop(heap)
+        if u in closed:
+            continue
+        if u == target:
+            record_search('astar', len(closed) + 1)
+            path = [u]
+            while u != source:
+                u = pred[u]
+                path.append(u)
+            path.reverse()
+            return d, path
+        closed.add(u)
+
+        start, end = indptr[u], indptr[u + 1]
+        for v, length in zip(indices[start:end].tolist(), lengths[start:end].tolist()):
+            if v in closed:
+                continue
+            nd = d + length
+            if nd < dist.get(v, math.inf):
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd + heuristic(v), nd, v))
+
+    record_search('astar', len(closed))
+    return math.inf, None
@@ -0,0 +1,282 @@
+#=====================================================
+# File: /src/core/distance_matrix.py
+#=====================================================
+
+import math
+from collections import Counter
+
+from src.core.csr_graph import astar, dijkstra, transpose_csr
+from src.core.landmarks import PairPaths, alt_distance_matrix, alt_query
+
+
+class ShortestPathTrees:
+    """
+    Predecessor trees of the one-to-many searches, one tree per source.
+    They are kept for the length of a request so that any selected pair's
+    path can be rebuilt without another search.
+
+    Searches run backwards from a target (on the transposed graph) are kept
+    in 'succs': there the tree points from every node to its successor
+    on the way to the target. For bounded searches that did not target every
+    selected node, 'settled' holds the nodes whose tree path is final.
+    """
+
+    def __init__(self, csr):
+        self.csr = csr
+        self.preds = {}
+        self.succs = {}
+        self.settled = {}
+
+    def path(self, u, v):
+        """
+        Walks the predecessor tree of 'u' back from 'v' to rebuild the node path.
+
+        Args:
+            u (str): The source node ID.
+            v (str): The target node ID.
+
+        Returns:
+            list or None: The list of node indices from u to v, or None if no
+                          path (or no tree covers the pair).
+        """
+        source = self.csr.index_of[int(u)]
+        target = self.csr.index_of[int(v)]
+        if u in self.preds and target in self.settled.get(('pred', u), (target,)):
+            tree, node, end = self.preds[u], target, source
+        elif v in self.succs and source in self.settled.get(('succ', v), (source,)):
+            tree, node, end = self.succs[v], source, target
+        else:
+            return None
+        path = [node]
+        while node != end:
+            if node not in tree:
+                return None
+            node = tree[node]
+            path.append(node)
+        if end == source:
+            path.reverse()
+        return path
+
+
+class CachedPaths:
+    """
+    Path lookup for a matrix assembled by compute_cached_distance_matrix.
+
+    Paths come from the shared cache, then from the searches of the current
+    request, and as a last resort from a point-to-point search. Paths
+    obtained in the last two ways are written back to the cache.
+    """
+
+    def __init__(self, csr, cache, city_key, trees=None, landmarks=None):
+        self.csr = csr
+        self.cache = cache
+        self.city_key = city_key
+        self.trees = trees
+        self.landmarks = landmarks
+
+    def path(self, u, v):
+        """
+        Returns the node index path from node ID u to node ID v, or None.
+        """
+        source, target = int(u), int(v)
+        path = self.cache.get_path(self.city_key, source, target)
+        if path is not None:
+            return path
+
+        path = self.trees.path(u, v) if self.trees is not None else None
+        if path is None:
+            s = self.csr.index_of[source]
+            t = self.csr.index_of[target]
+            if self.landmarks is not None:
+                dist, path = alt_query(self.landmarks, s, t)
+            else:
+                dist, path = astar(self.csr, s, t)
+            if path is None:
+                self.cache.put(self.city_key, source, target, math.inf)
+                return None
+            self.cache.put(self.city_key, source, target, dist, path)
+            return path
+
+        self.cache.put(self.city_key, source, target, self._length(path), path)
+        return path
+
+    def _length(self, path):
+        csr = self.csr
+        return sum(csr.lengths[csr.edge_index(a, b)] for a, b in zip(path, path[1:]))
+
+
+def compute_distance_matrix(csr, node_ids, ch=None, landmarks=None):
+    """
+    Builds an n x n matrix of shortest path lengths between the selected nodes.
+    One bounded Dijkstra search is run per source instead of one search per pair.
+    The predecessor tree of every search is kept so that route geometry can be
+    rebuilt later without running Dijkstra again.
+
+    If a Contraction Hierarchies index is given, the matrix is computed with
+    its bucket-based many-to-many query instead. With a landmark index, each
+    ordered pair is answered by a bidirectional ALT query.
+
+    Args:
+        csr (CSRGraph): The compact city graph.
+        node_ids (list): The list of node IDs (strings).
+        ch (ContractionHierarchy, optional): CH index of the same graph.
+        landmarks (Landmarks, optional): ALT landmark index of the same graph.
+
+    Returns:
+        (list, object): (matrix, trees) where matrix[i][j] is the distance from
+                        node_ids[i] to node_ids[j] (math.inf if unreachable), and
+                        trees rebuilds paths via trees.path(u, v).
+    """
+    indices = [csr.index_of[int(n)] for n in node_ids]
+    if ch is not None:
+        return ch.many_to_many(node_ids, indices)
+    if landmarks is not None:
+        return alt_distance_matrix(landmarks, node_ids, indices)
+
+    n = len(indices)
+    matrix = [[0.0] * n for _ in range(n)]
+    trees = ShortestPathTrees(csr)
+
+    for i, source in enumerate(indices):
+        dist, pred = dijkstra(csr, source, indices)
+        trees.preds[node_ids[i]] = pred
+        row = matrix[i]
+        for j, target in enumerate(indices):
+            if i != j:
+                row[j] = dist.get(target, math.inf)
+
+    return matrix, trees
+
+
+def compute_cached_distance_matrix(csr, node_ids, cache, city_key, ch=None, landmarks=None):
+    """
+    Builds the distance matrix like compute_distance_matrix, but takes every
+    pair already known to the shared path cache from there and only searches
+    for the missing pairs.
+
+    When every pair is missing the full engine runs as usual. Otherwise CH
+    and ALT answer the missing pairs one by one, and plain Dijkstra covers
+    them with as few one-to-many searches as possible: a search from a
+    source settles a whole row, a backward search from a target a whole
+    column, so adding one point to a cached selection costs two searches.
+
+    Args:
+        csr (CSRGraph): The compact city graph.
+        node_ids (list): The list of node IDs (strings).
+        cache (PathCache): The shared cache.
+        city_key (str): City filename of csr, part of the cache key.
+        ch (ContractionHierarchy, optional): CH index of the same graph.
+        landmarks (Landmarks, optional): ALT landmark index of the same graph.
+
+    Returns:
+        (list, CachedPaths): (matrix, trees) as in compute_distance_matrix.
+    """
+    n = len(node_ids)
+    ids = [int(node_id) for node_id in node_ids]
+    matrix = [[0.0] * n for _ in range(n)]
+    missing = []
+    for i in range(n):
+        for j in range(n):
+            if i != j:
+                d = cache.get(city_key, ids[i], ids[j])
+                if d is None:
+                    missing.append((i, j))
+                else:
+                    matrix[i][j] = d
+
+    trees = None
+    if len(missing) == n * (n - 1):
+        full, trees = compute_distance_matrix(csr, node_ids, ch=ch, landmarks=landmarks)
+        for i, j in missing:
+            matrix[i][j] = full[i][j]
+    elif missing:
+        indices = [csr.index_of[node_id] for node_id in ids]
+        if ch is not None or landmarks is not None:
+            trees = PairPaths()
+            for i, j in missing:
+                if ch is not None:
+                    d, path = ch.query(indices[i], indices[j])
+                else:
+                    d, path = alt_query(landmarks, indices[i], indices[j])
+                matrix[i][j] = d
+                if path is not None:
+                    trees.paths[(node_ids[i], node_ids[j])] = path
+        else:
+            trees = cover_missing_pairs(csr, node_ids, indices, missing, matrix)
+
+    for i, j in missing:
+        cache.put(city_key, ids[i], ids[j], matrix[i][j])
+    return matrix, CachedPaths(csr, cache, city_key, trees, landmarks)
+
+
+def cover_missing_pairs(csr, node_ids, indices, missing, matrix):
+    """
+    Fills the missing matrix entries with forward and backward Dijkstra
+    searches, each time picking the row or column with most missing pairs.
+    """
+    trees = ShortestPathTrees(csr)
+    reverse = None
+    remaining = set(missing)
+    while remaining:
+        source, by_source = Counter(i for i, _ in remaining).most_common(1)[0]
+        target, by_target = Counter(j for _, j in remaining).most_common(1)[0]
+        if by_source >= by_target:
+            pairs = [(i, j) for i, j in remaining if i == source]
+            dist, pred = dijkstra(csr, indices[source], [indices[j] for _, j in pairs])
+            trees.preds[node_ids[source]] = pred
+            trees.settled[('pred', node_ids[source])] = dist
+            for i, j in pairs:
+                matrix[i][j] = dist.get(indices[j], math.inf)
+        else:
+            if reverse is None:
+                reverse = transpose_csr(csr)
+            pairs = [(i, j) for i, j in remaining if j == target]
+            dist, succ = dijkstra(reverse, indices[target], [indices[i] for i, _ in pairs])
+            trees.succs[node_ids[target]] = succ
+            trees.settled[('succ', node_ids[target])] = dist
+            for i, j in pairs:
+                matrix[i][j] = dist.get(indices[i], math.inf)
+        remaining.difference_update(pairs)
+    return trees
+
+
+def expand_route(csr, trees, route):
+    """
+    Expands a visiting order of selected nodes into the full list of graph nodes.
+
+    Args:
+        csr (CSRGraph): The compact city graph.
+        trees: Path trees from compute_distance_matrix.
+        route (list): Node IDs (strings) in visiting order.
+
+    Returns:
+        (list, tuple or None): (full_nodes, None) on success, where full_nodes
+                               are node indices, or
+                               ([], (u, v)) for the first pair without a path.
+    """
+    full_nodes = []
+    for i in range(len(route) - 1):
+        segm = trees.path(route[i], route[i + 1])
+        if segm is None:
+            return [], (route[i], route[i + 1])
+        full_nodes.extend(segm[:-1])
+    full_nodes.append(csr.index_of[int(route[-1])])
+    return full_nodes, None
+
+
+def find_missing_pair(matrix, node_ids):
+    """
+    Returns the first ordered pair (u, v) with no path between them, or None.
+
+    Args:
+        matrix (list): The distance matrix from compute_distance_matrix.
+        node_ids (list): Node IDs in the same order as the matrix rows.
+
+    Returns:
+        tuple or None: (u, v) node IDs, or None if every pair is connected.
+    """
+    for i, row in enumerate(matrix):
+        for j, d in enumerate(row):
+            if d == math.inf:
+                return node_ids[i], node_ids[j]
+    return None
@@ -0,0 +1,227 @@
+#=====================================================
+# File: /src/core/exact_solvers.py
+#=====================================================
+
+import math
+import time
+import numpy as np
+
+from src.core.local_search import EPS, earlier, expired, tour_length
+from src.core.lower_bounds import assignment_bound, held_karp_bound, spanning_tree, symmetric_transform
+
+# Memory Held-Karp may allocate (tables and temporaries); larger instances are refused.
+HELD_KARP_MEMORY_LIMIT = 256 * 1024 * 1024
+
+BB_TIME_LIMIT_S = 10.0     # Default time budget of branch and bound
+BB_NODE_LIMIT = 100000     # Default number of search nodes expanded
+PROGRESS_EVERY = 256       # Search nodes between progress reports
+
+
+def held_karp_bytes(n):
+    """
+    Returns the peak memory in bytes that held_karp_tour() allocates for n
+    points: a float64 cost and an int8 predecessor per (subset, last point),
+    plus the larger of the two phases below.
+    """
+    m = n - 1
+    if m <= 0:
+        return 0
+    subsets = 1 << m
+    tables = subsets * m * 9
+    # Sorting the subsets by size: int8 sizes, the int64 order and the
+    # scratch space of the stable sort.
+    sorting = subsets * (1 + 8 + 8)
+    # Updating: the int64 order, and for the subsets of one size that
+    # contain point j (at most comb(m - 1, (m - 1) // 2)) a float64 row of
+    # candidates each, twice since the block of the previous j is freed only
+    # when the next one exists, and five int64 index temporaries. The
+    # membership test takes 9 bytes per subset of that size.
+    step = math.comb(m - 1, (m - 1) // 2)
+    updating = subsets * 8 + step * (2 * m * 8 + 5 * 8) + math.comb(m, m // 2) * 9
+    return tables + max(sorting, updating)
+
+
+def held_karp_max_points(limit=HELD_KARP_MEMORY_LIMIT):
+    """
+    Returns the largest number of points whose tables fit into 'limit' bytes.
+    """
+    n = 2
+    while held_karp_bytes(n + 1) <= limit:
+        n += 1
+    return n
+
+
+HELD_KARP_MAX_POINTS = held_karp_max_points()
+
+
+def held_karp_tour(dist, on_progress=None):
+    """
+    Exact TSP by bitmask dynamic programming (Held-Karp).
+
+    cost[S, j] is the length of the shortest path that starts at point 0,
+    visits exactly the points of subset S (of points 1..n-1) and ends at
+    j in S. Subsets are processed by size, and all subsets of one size that
+    contain j are updated in a single vectorized step:
+        cost[S, j] = min_i cost[S - {j}, i] + dist[i][j]
+    The work is O(2^n * n^2) and the peak memory held_karp_bytes(n).
+
+    Args:
+        dist (list or np.ndarray): n x n distance matrix (asymmetric allowed).
+        on_progress (callable, optional): Called as on_progress(fraction, None)
+                                          after every subset size.
+
+    Returns:
+        (list, float): The optimal tour of point indices starting at 0,
+                       and its length.
+
+    Raises:
+        ValueError: If held_karp_bytes(n) exceeds HELD_KARP_MEMORY_LIMIT.
+    """
+    D = np.asarray(dist, dtype=np.float64)
+    n = len(D)
+    if n <= 2:
+        return list(range(n)), float(D[0, 1] + D[1, 0]) if n == 2 else 0.0
+    if held_karp_bytes(n) > HELD_KARP_MEMORY_LIMIT:
+        raise ValueError(f'Held-Karp supports at most {HELD_KARP_MAX_POINTS} points')
+
+    m = n - 1                      # Point k + 1 is bit k
+    full = (1 << m) - 1
+    cost = np.full((1 << m, m), np.inf)
+    parent = np.full((1 << m, m), -1, dtype=np.int8)
+    to_point = D[1:, 1:]           # to_point[i, j]: from point i + 1 to point j + 1
+    for k in range(m):
+        cost[1 << k, k] = D[0, k + 1]
+
+    # Number of points in every subset: the subsets with bit k set are those
+    # below 1 << k with that bit added.
+    size = np.zeros(1 << m, dtype=np.int8)
+    for k in range(m):
+        np.add(size[:1 << k], 1, out=size[1 << k:2 << k])
+    order = np.argsort(size, kind='stable')
+    bounds = np.searchsorted(size[order], np.arange(m + 2))
+    del size
+
+    for s in range(2, m + 1):
+        group = order[bounds[s]:bounds[s + 1]]
+        for j in range(m):
+            bit = 1 << j
+            subsets = group[(group & bit) != 0]
+            candidates = cost[subsets ^ bit]
+            candidates += to_point[:, j]
+            best = np.argmin(candidates, axis=1)
+            cost[subsets, j] = candidates[np.arange(len(subsets)), best]
+            parent[subsets, j] = best
+        if on_progress is not None:
+            on_progress(bounds[s + 1] / len(order), None)
+
+    closing = cost[full] + D[1:, 0]
+    last = int(np.argmin(closing))
+    length = float(closing[last])
+
+    path = []
+    subset = full
+    while last >= 0:
+        path.append(last + 1)
+        previous = int(parent[subset, last])
+        subset ^= 1 << last
+        last = previous
+    return [0] + path[::-1], length
+
+
+def branch_and_bound_tour(dist, tour, time_limit=BB_TIME_LIMIT_S, node_limit=BB_NODE_LIMIT,
+                          on_progress=None, deadline=None):
+    """
+    Exact TSP by depth-first branch and bound.
+
+    A search node is a path from point 0; its children extend the path by one
+    point, most promising first. A node is pruned when its lower bound is not
+    below the best tour found. The bound of a path ending at 'last' is its
+    length plus a spanning tree of the unvisited points and the cheapest edges
+    from 'last' into them and from them back to 0, which bounds any path that
+    completes the tour. The tree is taken in the transformed problem of the
+    root Held-Karp bound, with its point penalties (see
+    lower_bounds.held_karp_bound), which keeps the edge directions and a tight
+    bound without a subgradient run per node. 'tour' is the initial upper bound.
+
+    When the time or node limit is hit, the smallest bound of the open nodes
+    is still a proven lower bound on the optimum.
+
+    Args:
+        dist (list or np.ndarray): n x n distance matrix (asymmetric allowed).
+        tour (list): A heuristic tour of point indices starting at 0.
+        time_limit (float): Time budget in seconds.
+        node_limit (int): Maximum number of search nodes expanded.
+        on_progress (callable, optional): Called as on_progress(fraction, best_length)
+                                          every PROGRESS_EVERY search nodes, with
+                                          the used share of the limits.
+        deadline (float, optional): time.perf_counter() value (e.g. a
+                                    local_search.Deadline) that ends the
+                                    search before time_limit does.
+
+    Returns:
+        (list, float, float): The best tour, its length and a lower bound on
+                              the optimum (equal to the length if proven optimal).
+    """
+    D = np.asarray(dist, dtype=np.float64)
+    n = len(D)
+    if n <= 3:
+        best, best_length = held_karp_tour(D)
+        return best, best_length, best_length
+    dl = D.tolist()
+    best = list(tour)
+    best_length = tour_length(dl, best)
+
+    root_bound, pi = held_karp_bound(D, upper=best_length)
+    root_bound = max(root_bound, assignment_bound(D))
+    if root_bound >= best_length - EPS:
+        return best, best_length, best_length
+    W, link = symmetric_transform(D)
+    W += pi[:, None] + pi[None, :]
+
+    def path_bound(cost, last, remaining):
+        # The rest of the tour is out(last) -> a path through the in and out
+        # copies of 'remaining' -> in(0).
+        copies = np.concatenate((remaining, remaining + n))
+        weight, _ = spanning_tree(W, copies)
+        weight += W[last + n, remaining].min() + W[remaining + n, 0].min()
+        return (cost + weight + len(remaining) * link
+                - 2.0 * pi[copies].sum() - pi[last + n] - pi[0])
+
+    start_time = time.perf_counter()
+    deadline = earlier(deadline, start_time + time_limit)
+    stack = [(root_bound, [0], 0.0)]
+    expanded = 0
+    while stack:
+        bound, path, cost = stack.pop()
+        if bound >= best_length - EPS:
+            continue
+        if expanded >= node_limit or expired(deadline):
+            stack.append((bound, path, cost))
+            break
+        expanded += 1
+        if on_progress is not None and expanded % PROGRESS_EVERY == 0:
+            elapsed = time.perf_counter() - start_time
+            on_progress(max(expanded / node_limit, elapsed / (deadline - start_time)), best_length)
+
+        visited = np.zeros(n, dtype=bool)
+        visited[path] = True
+        remaining = np.flatnonzero(~visited)
+        last = path[-1]
+        children = []
+        for k, j in enumerate(remaining.tolist()):
+            child_cost = cost + dl[last][j]
+            if len(remaining) == 1:
+                length = child_cost + dl[j][0]
+                if length < best_length - EPS:
+                    best, best_length = path + [j], length
+                continue
+            child_bound = path_bound(child_cost, j, np.delete(remaining, k))
+            if child_bound < best_length - EPS:
+                children.append((child_bound, path + [j], child_cost))
+        # The most promising child is pushed last, so it is expanded next.
+        children.sort(key=lambda child: -child[0])
+        stack.extend(children)
+
+    open_bounds = [bound for bound, _, _ in stack if bound < best_length - EPS]
+    lower = max(root_bound, min(open_bounds)) if open_bounds else best_length
+    return best, float(best_length), float(min(lower, best_length))
@@ -9,12 +9,35 @@ import json
 import logging
 from typing import Dict, Optional
 
+from src.core.contraction import (
+    ContractionHierarchy, build_contraction_hierarchy, graph_signature, index_path_for
+)
+from src.core.csr_graph import CSRGraph, build_csr_graph
+from src.core.graph_store import binary_path_for, load_graph_binary
+from src.core import landmarks
+from src.core.path_cache import PathCache
+from src.core.selection_matrix import SelectionMatrix
+from src.core.spatial_index import SpatialIndex
+from src.core.tile_pyramid import TilePyramid
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Global cache to store graphs, preventing repeated loading.
 graph_cache = {}
 
+# Optional Contraction Hierarchies indexes, keyed like graph_cache.
+ch_cache = {}
+
+# Optional ALT landmark indexes, keyed like graph_cache.
+alt_cache = {}
+
+# Pairwise distances and paths shared by all requests, keyed by city file.
+path_cache = PathCache()
+
+# Incrementally maintained distance matrix of selected_points.
+selection = SelectionMatrix(path_cache)
+
 def load_city_options() -> Dict[str, str]:
     """
     Loads a dictionary of city options from a JSON file.
@@ -56,12 +79,30 @@ city_options = load_city_options()
 G = None               # Main directed graph (osmnx graph)
 nodes_gdf = None       # GeoDataFrame for nodes
 edges_gdf = None       # GeoDataFrame for edges
+csr_graph = None       # Array-backed adjacency used for routing queries
+spatial_index = None   # Spatial index used by the viewport endpoints
+tile_pyramid = None    # Level-of-detail edge tiles for the map
 current_city = None    # Current city name
 selected_points = []   # User-selected points on the map
 
+def log_maxspeed_check(edges) -> None:
+    """
+    Logs how many edges of a loaded city carry a 'maxspeed' value.
+    """
+    if 'maxspeed' in edges.columns:
+        total_edges = len(edges)
+        edges_with_maxspeed = edges['maxspeed'].notna().sum()
+        logger.info(f"[MAXSPEED CHECK] Total edges: {total_edges}")
+        logger.info(f"[MAXSPEED CHECK] Edges with maxspeed: {edges_with_maxspeed}")
+        logger.info(f"[MAXSPEED CHECK] Edges without maxspeed: {total_edges - edges_with_maxspeed}")
+    else:
+        logger.info("[MAXSPEED CHECK] 'maxspeed' column not found in edges_gdf.")
+
 def load_graph(city_filename: str) -> bool:
     """
     Loads a .graphml file from the 'cities' directory and initializes global variables.
+    If a pre-serialized .npz file with the same name exists (see scripts/convert_graphs.py)
+    and is not older than the GraphML file, it is loaded instead.
     If the graph is already cached, it reuses it.
 
     Args:
@@ -70,7 +111,7 @@ def load_graph(city_filename: str) -> bool:
     Returns:
         bool: True on success, False on failure.
     """
-    global G, nodes_gdf, edges_gdf
+    global G, nodes_gdf, edges_gdf, csr_graph, spatial_index, tile_pyramid
 
     # Basic sanity checks to avoid unsafe filenames.
     if not isinstance(city_filename, str) or not city_filename.strip() or ".." in city_filename or "/" in city_filename:
@@ -80,10 +121,32 @@ def load_graph(city_filename: str) -> bool:
     # If this city graph is cached, reuse it.
     if city_filename in graph_cache:
         logger.info(f"Using cached graph for {city_filename}")
-        G, nodes_gdf, edges_gdf = graph_cache[city_filename]
+        G, nodes_gdf, edges_gdf, csr_graph, spatial_index, tile_pyramid = graph_cache[city_filename]
         return True
 
     filepath = os.path.join('cities', city_filename)
+    # A cold load invalidates any routing index built for an earlier version.
+    ch_cache.pop(city_filename, None)
+    alt_cache.pop(city_filename, None)
+    path_cache.invalidate(city_filename)
+
+    # Prefer the pre-serialized binary file unless the GraphML file is newer.
+    binary_path = binary_path_for(filepath)
+    if os.path.exists(binary_path) and (
+        not os.path.exists(filepath) or os.path.getmtime(binary_path) >= os.path.getmtime(filepath)
+    ):
+        logger.info(f"Loading graph from binary file {binary_path}...")
+        try:
+            G, nodes_gdf, edges_gdf, csr_graph = load_graph_binary(binary_path)
+            log_maxspeed_check(edges_gdf)
+            spatial_index = SpatialIndex(nodes_gdf, edges_gdf)
+            tile_pyramid = TilePyramid(edges_gdf, spatial_index)
+            graph_cache[city_filename] = (G, nodes_gdf, edges_gdf, csr_graph, spatial_index, tile_pyramid)
+            logger.info(f"Graph loaded successfully: {csr_graph.num_nodes} nodes, {csr_graph.num_edges} edges.")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load binary graph {binary_path}, falling back to GraphML: {e}")
+
     if os.path.exists(filepath):
         logger.info(f"Loading graph from file {filepath}...")
         try:
@@ -98,17 +161,18 @@ def load_graph(city_filename: str) -> bool:
             nodes_gdf, edges_gdf = ox.graph_to_gdfs(G)
 
             # Optional check for 'maxspeed' column in edges.
-            if 'maxspeed' in edges_gdf.columns:
-                total_edges = len(edges_gdf)
-                edges_with_maxspeed = edges_gdf['maxspeed'].notna().sum()
-                logger.info(f"[MAXSPEED CHECK] Total edges: {total_edges}")
-                logger.info(f"[MAXSPEED CHECK] Edges with maxspeed: {edges_with_maxspeed}")
-                logger.info(f"[MAXSPEED CHECK] Edges without maxspeed: {total_edges - edges_with_maxspeed}")
-            else:
-                logger.info("[MAXSPEED CHECK] 'maxspeed' column not found in edges_gdf.")
+            log_maxspeed_check(edges_gdf)
+
+            # Build the compact adjacency used by the routing algorithms.
+            csr_graph = build_csr_graph(G)
+            logger.info(f"CSR adjacency built: {csr_graph.num_nodes} nodes, {csr_graph.num_edges} edges.")
+
+            # Build the spatial index and the edge tiles used by the map endpoints.
+            spatial_index = SpatialIndex(nodes_gdf, edges_gdf)
+            tile_pyramid = TilePyramid(edges_gdf, spatial_index)
 
             # Store in cache to avoid reloading later.
-            graph_cache[city_filename] = (G, nodes_gdf, edges_gdf)
+            graph_cache[city_filename] = (G, nodes_gdf, edges_gdf, csr_graph, spatial_index, tile_pyramid)
             logger.info("Graph loaded successfully.")
             return True
         except Exception as e:
@@ -123,10 +187,164 @@ def reset_state() -> None:
     Resets global state variables, clearing the loaded graph
     and any city-specific metadata.
     """
-    global G, nodes_gdf, edges_gdf, current_city, selected_points
+    global G, nodes_gdf, edges_gdf, csr_graph, spatial_index, tile_pyramid, current_city, selected_points
     G = None
     nodes_gdf = None
     edges_gdf = None
+    csr_graph = None
+    spatial_index = None
+    tile_pyramid = None
     current_city = None
     selected_points = []
+    selection.reset()
     logger.info("Global state variables have been reset.")
+
+def clear_selection() -> None:
+    """
+    Clears the selected points and restarts the selection matrix
+    for the currently loaded graph.
+    """
+    selected_points.clear()
+    selection.reset(csr_graph, city_filename_of(G) if G is not None else None)
+
+def get_csr_graph(graph) -> Optional[CSRGraph]:
+    """
+    Returns the CSR adjacency that belongs to the given networkx graph.
+    Graphs loaded through load_graph reuse the adjacency built at load time;
+    any other graph gets one built on demand.
+
+    Args:
+        graph: The networkx graph passed to the routing functions.
+
+    Returns:
+        CSRGraph or None: The compact adjacency, or None if graph is None.
+    """
+    if graph is None:
+        return None
+    if graph is G and csr_graph is not None:
+        return csr_graph
+    for cached in graph_cache.values():
+        if cached[0] is graph:
+            return cached[3]
+    return build_csr_graph(graph)
+
+def get_tile_pyramid(city_key: str) -> Optional[TilePyramid]:
+    """
+    Returns the edge tile pyramid of a loaded city, so tiles can be served
+    for any cached city and not only the current one.
+
+    Args:
+        city_key (str): The city's graph filename without its extension.
+
+    Returns:
+        TilePyramid or None: The pyramid, or None if that city is not loaded.
+    """
+    for city_filename, cached in graph_cache.items():
+        if os.path.splitext(city_filename)[0] == city_key:
+            return cached[5]
+    return None
+
+def city_filename_of(graph) -> Optional[str]:
+    """
+    Returns the graph_cache key of a loaded networkx graph, or None.
+    """
+    for city_filename, cached in graph_cache.items():
+        if cached[0] is graph:
+            return city_filename
+    return None
+
+def get_contraction_hierarchy(graph, build_if_missing: bool = True) -> Optional[ContractionHierarchy]:
+    """
+    Returns the Contraction Hierarchies index of a loaded city graph.
+
+    The index is read from cities/<name>.ch.npz when that file matches the
+    graph. Otherwise it is built (which can take minutes for large cities)
+    and written there, so preprocessing runs once per city file.
+
+    Args:
+        graph: The networkx graph passed to the routing functions.
+        build_if_missing (bool): Build the index if no usable file exists.
+
+    Returns:
+        ContractionHierarchy or None: The index, or None if the graph was not
+        loaded through load_graph or no index is available.
+    """
+    city_filename = city_filename_of(graph)
+    if city_filename is None:
+        return None
+    if city_filename in ch_cache:
+        return ch_cache[city_filename]
+
+    csr = graph_cache[city_filename][3]
+    index_path = index_path_for(os.path.join('cities', city_filename))
+    if os.path.exists(index_path):
+        try:
+            ch = ContractionHierarchy.load(index_path)
+            if (ch.signature == graph_signature(csr)).all():
+                logger.info(f"Loaded CH index from {index_path} ({ch.num_shortcuts} shortcuts).")
+                ch_cache[city_filename] = ch
+                return ch
+            logger.warning(f"CH index {index_path} does not match the graph; rebuilding.")
+        except Exception as e:
+            logger.warning(f"Failed to load CH index {index_path}: {e}")
+
+    if not build_if_missing:
+        return None
+
+    logger.info(f"Building CH index for {city_filename}...")
+    ch = build_contraction_hierarchy(csr)
+    try:
+        ch.save(index_path)
+        logger.info(f"CH index saved to {index_path} ({ch.num_shortcuts} shortcuts).")
+    except OSError as e:
+        logger.warning(f"Could not save CH index to {index_path}: {e}")
+    ch_cache[city_filename] = ch
+    return ch
+
+def get_landmarks(graph, build_if_missing: bool = True) -> Optional[landmarks.Landmarks]:
+    """
+    Returns the ALT landmark index of a loaded city graph.
+
+    Like get_contraction_hierarchy, the index is read from
+    cities/<name>.alt.npz when that file matches the graph, and built and
+    written there otherwise.
+
+    Args:
+        graph: The networkx graph passed to the routing functions.
+        build_if_missing (bool): Build the index if no usable file exists.
+
+    Returns:
+        Landmarks or None: The index, or None if the graph was not loaded
+        through load_graph or no index is available.
+    """
+    city_filename = city_filename_of(graph)
+    if city_filename is None:
+        return None
+    if city_filename in alt_cache:
+        return alt_cache[city_filename]
+
+    csr = graph_cache[city_filename][3]
+    index_path = landmarks.index_path_for(os.path.join('cities', city_filename))
+    if os.path.exists(index_path):
+        try:
+            alt = landmarks.Landmarks.load(csr, index_path)
+            if (alt.signature == graph_signature(csr)).all():
+                logger.info(f"Loaded {len(alt.nodes)} landmarks from {index_path}.")
+                alt_cache[city_filename] = alt
+                return alt
+            logger.warning(f"Landmark file {index_path} does not match the graph; rebuilding.")
+        except Exception as e:
+            logger.warning(f"Failed to load landmarks {index_path}: {e}")
+
+    if not build_if_missing:
+        return None
+
+    logger.info(f"Selecting landmarks for {city_filename}...")
+    alt = landmarks.select_landmarks(csr)
+    try:
+        alt.save(index_path)
+        logger.info(f"{len(alt.nodes)} landmarks saved to {index_path}.")
+    except OSError as e:
+        logger.warning(f"Could not save landmarks to {index_path}: {e}")
+    alt_cache[city_filename] = alt
+    return alt
@@ -0,0 +1,218 @@
+#=====================================================
+# File: /src/core/graph_store.py
+#=====================================================
+
+import os
+import json
+import numpy as np
+import networkx as nx
+import shapely
+import geopandas as gpd
+
+from src.core.csr_graph import csr_from_edges
+
+# Bumped whenever the array layout below changes.
+FORMAT_VERSION = 2
+
+
+def binary_path_for(graphml_path: str) -> str:
+    """
+    Returns the path of the pre-serialized binary file that belongs to a .graphml file.
+    Example: cities/wroclaw.graphml -> cities/wroclaw.npz
+    """
+    return os.path.splitext(graphml_path)[0] + '.npz'
+
+
+def _encode_attributes(columns) -> np.ndarray:
+    # Attribute columns as UTF-8 JSON bytes, since np.load runs with
+    # allow_pickle=False and cannot read object arrays.
+    return np.frombuffer(json.dumps(columns, default=str).encode('utf-8'), dtype=np.uint8)
+
+
+def _decode_attributes(array: np.ndarray) -> dict:
+    return json.loads(array.tobytes().decode('utf-8'))
+
+
+def _with_attributes(data: dict, columns: dict, i: int) -> dict:
+    # Adds the values of row i; attributes missing there (None) are left out,
+    # as in the GraphML graph.
+    for name, values in columns.items():
+        if values[i] is not None:
+            data[name] = values[i]
+    return data
+
+
+def save_graph_binary(G, filepath: str) -> None:
+    """
+    Serializes a city graph into a flat NumPy .npz archive.
+
+    Stored arrays:
+      - node_ids, node_x, node_y: node table
+      - edge_u, edge_v, edge_key, edge_length, edge_highway: edge table
+        (u/v are node indices, highway is an index into 'highway_names')
+      - geom_offsets, geom_coords: packed edge geometries; the points of edge i
+        are geom_coords[geom_offsets[i]:geom_offsets[i + 1]] (empty if the edge
+        has no geometry of its own and is a straight line between its nodes)
+      - graph_attributes, node_attributes, edge_attributes: every other
+        attribute (maxspeed, oneway, name, osmid, ...) as JSON columns
+        {name: [value or None per node/edge]}, so that the loaded graph has
+        the same attributes as the GraphML one; 'highway' is repeated here
+        for edges that carry several tags
+
+    Args:
+        G (nx.MultiDiGraph): The city graph (as loaded from GraphML).
+        filepath (str): Target .npz path.
+    """
+    node_ids = np.fromiter(G.nodes, dtype=np.int64, count=G.number_of_nodes())
+    index_of = {int(n): i for i, n in enumerate(node_ids.tolist())}
+    node_x = np.array([G.nodes[n]['x'] for n in G.nodes], dtype=np.float64)
+    node_y = np.array([G.nodes[n]['y'] for n in G.nodes], dtype=np.float64)
+    node_attributes = {}
+    for i, (_, data) in enumerate(G.nodes(data=True)):
+        for name, value in data.items():
+            if name not in ('x', 'y'):
+                node_attributes.setdefault(name, [None] * len(node_ids))[i] = value
+
+    num_edges = G.number_of_edges()
+    edge_u = np.empty(num_edges, dtype=np.int32)
+    edge_v = np.empty(num_edges, dtype=np.int32)
+    edge_key = np.empty(num_edges, dtype=np.int32)
+    edge_length = np.empty(num_edges, dtype=np.float64)
+    edge_highway = np.empty(num_edges, dtype=np.int16)
+    geom_offsets = np.zeros(num_edges + 1, dtype=np.int64)
+    highway_codes = {}
+    edge_attributes = {}
+    coords = []
+
+    for i, (u, v, k, data) in enumerate(G.edges(keys=True, data=True)):
+        edge_u[i] = index_of[u]
+        edge_v[i] = index_of[v]
+        edge_key[i] = k if isinstance(k, int) else 0
+        edge_length[i] = data.get('length', 0)
+
+        # OSM ways can carry several highway tags; the first one is coded,
+        # the full list goes into edge_attributes.
+        highway = data.get('highway', '')
+        if isinstance(highway, list):
+            highway = highway[0] if highway else ''
+        edge_highway[i] = highway_codes.setdefault(str(highway), len(highway_codes))
+        for name, value in data.items():
+            if name not in ('length', 'geometry') and (name != 'highway' or isinstance(value, list)):
+                edge_attributes.setdefault(name, [None] * num_edges)[i] = value
+
+        geometry = data.get('geometry')
+        if geometry is not None:
+            coords.append(shapely.get_coordinates(geometry))
+        geom_offsets[i + 1] = geom_offsets[i] + (len(coords[-1]) if geometry is not None else 0)
+
+    geom_coords = np.concatenate(coords) if coords else np.empty((0, 2), dtype=np.float64)
+    highway_names = np.array(sorted(highway_codes, key=highway_codes.get), dtype=str)
+
+    np.savez(
+        filepath,
+        format_version=np.array(FORMAT_VERSION),
+        crs=np.array(str(G.graph.get('crs', 'epsg:4326'))),
+        graph_attributes=_encode_attributes({k: v for k, v in G.graph.items() if k != 'crs'}),
+        node_attributes=_encode_attributes(node_attributes),
+        edge_attributes=_encode_attributes(edge_attributes),
+        node_ids=node_ids, node_x=node_x, node_y=node_y,
+        edge_u=edge_u, edge_v=edge_v, edge_key=edge_key,
+        edge_length=edge_length, edge_highway=edge_highway,
+        highway_names=highway_names,
+        geom_offsets=geom_offsets, geom_coords=geom_coords
+    )
+
+
+def load_graph_binary(filepath: str):
+    """
+    Loads a city graph written by save_graph_binary.
+
+    The networkx graph, the GeoDataFrames and the CSR adjacency are all built
+    directly from the arrays, which avoids XML parsing and ox.graph_to_gdfs.
+
+    Args:
+        filepath (str): Path to the .npz file.
+
+    Returns:
+        tuple: (G, nodes_gdf, edges_gdf, csr_graph)
+
+    Raises:
+        ValueError: If the file was written with an unsupported format version.
+    """
+    with np.load(filepath, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+
+    if int(arrays['format_version']) != FORMAT_VERSION:
+        raise ValueError(f"Unsupported graph format version {int(arrays['format_version'])}")
+
+    crs = str(arrays['crs'])
+    node_ids = arrays['node_ids']
+    node_x = arrays['node_x']
+    node_y = arrays['node_y']
+    edge_u = arrays['edge_u']
+    edge_v = arrays['edge_v']
+    edge_key = arrays['edge_key']
+    edge_length = arrays['edge_length']
+    highway = arrays['highway_names'][arrays['edge_highway']]
+    geom_offsets = arrays['geom_offsets']
+    geom_coords = arrays['geom_coords']
+    node_attributes = _decode_attributes(arrays['node_attributes'])
+    edge_attributes = _decode_attributes(arrays['edge_attributes'])
+    highway = highway.tolist()
+    if 'highway' in edge_attributes:
+        highway = [hw if tags is None else tags for hw, tags in zip(highway, edge_attributes.pop('highway'))]
+
+    # Edges without their own geometry become straight lines between their nodes.
+    num_edges = len(edge_u)
+    geom_counts = np.diff(geom_offsets)
+    straight = np.flatnonzero(geom_counts == 0)
+    counts = geom_counts.copy()
+    counts[straight] = 2
+    line_offsets = np.zeros(num_edges + 1, dtype=np.int64)
+    np.cumsum(counts, out=line_offsets[1:])
+
+    line_coords = np.empty((line_offsets[-1], 2), dtype=np.float64)
+    geom_owner = np.repeat(np.arange(num_edges), geom_counts)
+    line_coords[line_offsets[geom_owner] + np.arange(len(geom_coords)) - geom_offsets[geom_owner]] = geom_coords
+    line_coords[line_offsets[straight]] = np.column_stack((node_x[edge_u[straight]], node_y[edge_u[straight]]))
+    line_coords[line_offsets[straight] + 1] = np.column_stack((node_x[edge_v[straight]], node_y[edge_v[straight]]))
+    geometries = shapely.linestrings(line_coords, indices=np.repeat(np.arange(num_edges), counts))
+    has_geometry = geom_counts > 0
+
+    nodes_gdf = gpd.GeoDataFrame(
+        {'x': node_x, 'y': node_y, **node_attributes},
+        geometry=shapely.points(node_x, node_y),
+        index=node_ids,
+        crs=crs
+    )
+    nodes_gdf.index.name = 'osmid'
+
+    u_ids = node_ids[edge_u]
+    v_ids = node_ids[edge_v]
+    edges_gdf = gpd.GeoDataFrame(
+        {'length': edge_length, 'highway': highway, **edge_attributes},
+        geometry=geometries,
+        index=[u_ids, v_ids, edge_key],
+        crs=crs
+    )
+    edges_gdf.index.names = ['u', 'v', 'key']
+
+    G = nx.MultiDiGraph(crs=crs, **_decode_attributes(arrays['graph_attributes']))
+    G.add_nodes_from(
+        (n, _with_attributes({'x': x, 'y': y}, node_attributes, i))
+        for i, (n, x, y) in enumerate(zip(node_ids.tolist(), node_x.tolist(), node_y.tolist()))
+    )
+    G.add_edges_from(
+        (u, v, k, _with_attributes(
+            {'length': length, 'highway': hw, 'geometry': geom} if own else {'length': length, 'highway': hw},
+            edge_attributes, i
+        ))
+        for i, (u, v, k, length, hw, geom, own) in enumerate(zip(
+            u_ids.tolist(), v_ids.tolist(), edge_key.tolist(),
+            edge_length.tolist(), highway,
+            geometries.tolist(), has_geometry.tolist()
+        ))
+    )
+
+    csr = csr_from_edges(node_ids, node_x, node_y, edge_u, edge_v, edge_key, edge_length)
+    return G, nodes_gdf, edges_gdf, csr
@@ -0,0 +1,234 @@
+#=====================================================
+# File: /src/core/jobs.py
+#=====================================================
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+from src.core.algorithms import calculate_route
+from src.core.solver_pool import PROGRESS_INTERVAL_S, SOLVER_TIMEOUT_S, iter_solvers
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = 2            # Jobs running at the same time
+MAX_QUEUED_JOBS = 16       # Waiting jobs before submit() refuses new ones
+FINISHED_JOBS_KEPT = 100   # Finished jobs kept for polling, oldest dropped first
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class Job:
+    """
+    One submitted computation: fn(job, *args, **kwargs) and its state.
+
+    'progress' may be updated by fn while it runs, and fn should check
+    'cancelled' where it can stop early; its return value becomes 'result'.
+    """
+
+    def __init__(self, fn, args, kwargs):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.state = QUEUED
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.progress = None
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def to_dict(self):
+        """
+        The job state for the polling endpoints (without the result).
+        """
+        return {
+            'job_id': self.id,
+            'state': self.state,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'progress': self.progress,
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """
+    Bounded queue of jobs run by a small pool of background threads.
+
+    At most max_queued jobs wait for a worker; submit() refuses more. Jobs
+    and their results are kept in memory until keep newer jobs have finished,
+    so no external broker or storage is needed. The worker threads start
+    with the first submitted job.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_queued=MAX_QUEUED_JOBS, keep=FINISHED_JOBS_KEPT):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.keep = keep
+        self._jobs = {}            # job ID -> Job
+        self._queued = deque()
+        self._finished = deque()   # IDs of the finished jobs, oldest first
+        self._running = 0
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queues fn(job, *args, **kwargs).
+
+        Returns:
+            Job or None: The new job, or None if the queue is full.
+        """
+        with self._cond:
+            if len(self._queued) >= self.max_queued:
+                return None
+            job = Job(fn, args, kwargs)
+            self._jobs[job.id] = job
+            self._queued.append(job)
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run, name=f'job-worker-{len(self._threads)}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            self._cond.notify()
+            return job
+
+    def get(self, job_id):
+        """
+        Returns the job with this ID, or None if it is unknown or expired.
+        """
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def position(self, job):
+        """
+        Returns the number of jobs queued before 'job' (None if not queued).
+        """
+        with self._cond:
+            for i, queued in enumerate(self._queued):
+                if queued is job:
+                    return i
+            return None
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. A queued job is cancelled at once; a running one is
+        asked to stop and becomes 'cancelled' when its function returns.
+
+        Returns:
+            Job or None: The job, or None if the ID is unknown.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state == QUEUED:
+                self._queued.remove(job)
+                self._finish(job, CANCELLED)
+            elif job.state == RUNNING:
+                job._cancel.set()
+            return job
+
+    def stats(self):
+        """
+        Returns the number of queued and running jobs and the queue limits.
+        """
+        with self._cond:
+            return {
+                'queued': len(self._queued),
+                'running': self._running,
+                'workers': self.workers,
+                'max_queued': self.max_queued
+            }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queued)
+                job = self._queued.popleft()
+                job.state = RUNNING
+                job.started = time.time()
+                self._running += 1
+            result, error = None, None
+            try:
+                result = job.fn(job, *job.args, **job.kwargs)
+            except Exception as e:
+                logger.exception(f"Job {job.id} failed")
+                error = str(e)
+            with self._cond:
+                self._running -= 1
+                job.result = result
+                job.error = error
+                if job.cancelled:
+                    self._finish(job, CANCELLED)
+                else:
+                    self._finish(job, FAILED if error is not None else DONE)
+
+    def _finish(self, job, state):
+        # Called with the lock held. Drops the arguments (e.g. the graph) and
+        # the oldest finished jobs beyond 'keep'.
+        job.state = state
+        job.finished = time.time()
+        job.fn = job.args = job.kwargs = None
+        self._finished.append(job.id)
+        while len(self._finished) > self.keep:
+            self._jobs.pop(self._finished.popleft(), None)
+
+
+def route_job(job, G, node_ids, algorithm, num_trucks=1, routing='dijkstra', seed=None,
+              time_limit_ms=None, timeout=SOLVER_TIMEOUT_S):
+    """
+    Job function of calculate_route(). A TSP solver runs in a worker process
+    (see solver_pool.iter_solvers), so cancelling the job stops it within
+    PROGRESS_INTERVAL_S, and its progress is stored in job.progress.
+
+    Args:
+        job (Job): The job running this function.
+        G, node_ids, algorithm, num_trucks, routing, seed, time_limit_ms:
+            See calculate_route().
+        timeout (float): Time limit of the solver in seconds.
+
+    Returns:
+        dict: The calculate_route() result.
+    """
+    def solve(dist, node_ids, algorithm, seed=None, time_limit=None):
+        events = iter_solvers(
+            dist, node_ids, [algorithm], seed, timeout, max_workers=1,
+            progress_interval=PROGRESS_INTERVAL_S, time_limit=time_limit
+        )
+        try:
+            for event in events:
+                if job.cancelled:
+                    break
+                if event[0] == 'progress':
+                    job.progress = event[2]
+                else:
+                    return event[2]
+        finally:
+            events.close()
+        return {'status': 'error', 'message': 'Job cancelled'}
+
+    if job.cancelled:
+        return {'status': 'error', 'message': 'Job cancelled'}
+    return calculate_route(G, node_ids, algorithm, num_trucks, routing, seed, solve=solve,
+                           time_limit_ms=time_limit_ms)
+
+
+# Job queue shared by all requests.
+job_queue = JobQueue()
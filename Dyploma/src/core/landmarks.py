@@ -0,0 +1,269 @@
+#=====================================================
+# File: /src/core/landmarks.py
+#=====================================================
+
+import os
+import heapq
+import math
+import numpy as np
+
+from src.core.contraction import graph_signature
+from src.core.csr_graph import dijkstra, record_search, transpose_csr
+
+# Bumped whenever the on-disk layout below changes.
+FORMAT_VERSION = 1
+
+# Number of landmarks chosen per city.
+NUM_LANDMARKS = 8
+
+
+def index_path_for(graphml_path):
+    """
+    Returns the path of the landmark file that belongs to a city graph file.
+    Example: cities/wroclaw.graphml -> cities/wroclaw.alt.npz
+    """
+    return os.path.splitext(graphml_path)[0] + '.alt.npz'
+
+
+def _distances_from(csr, source):
+    """
+    Full Dijkstra search; returns an array of distances (math.inf if unreachable).
+    """
+    settled, _ = dijkstra(csr, source)
+    dist = np.full(csr.num_nodes, math.inf)
+    dist[np.fromiter(settled.keys(), dtype=np.int64, count=len(settled))] = list(settled.values())
+    return dist
+
+
+class Landmarks:
+    """
+    Landmark distance arrays of a city graph for ALT (A*, Landmarks,
+    Triangle inequality) queries.
+
+    Attributes:
+        nodes (np.ndarray): Node indices of the landmarks.
+        to_landmark (np.ndarray): (n, k) distances d(v, L).
+        from_landmark (np.ndarray): (n, k) distances d(L, v).
+        signature (np.ndarray): graph_signature of the graph they belong to.
+    """
+
+    def __init__(self, csr, nodes, from_landmark, to_landmark, signature):
+        self.csr = csr
+        self.reverse = transpose_csr(csr)
+        self.nodes = nodes
+        self.from_landmark = from_landmark
+        self.to_landmark = to_landmark
+        self.signature = signature
+
+    def save(self, filepath):
+        """
+        Writes the landmark arrays to a .npz file.
+        """
+        np.savez(
+            filepath,
+            format_version=np.array(FORMAT_VERSION),
+            signature=self.signature,
+            nodes=self.nodes,
+            from_landmark=self.from_landmark,
+            to_landmark=self.to_landmark
+        )
+
+    @classmethod
+    def load(cls, csr, filepath):
+        """
+        Reads landmark arrays written by save().
+
+        Raises:
+            ValueError: If the file was written with an unsupported format version.
+        """
+        with np.load(filepath, allow_pickle=False) as data:
+            if int(data['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported landmark format version {int(data['format_version'])}")
+            return cls(csr, data['nodes'], data['from_landmark'], data['to_landmark'], data['signature'])
+
+    def potential(self, source, target):
+        """
+        Returns the averaged bidirectional potential p(v) for a source/target pair.
+
+        p(v) = (h_t(v) - h_s(v)) / 2, where h_t(v) is the landmark lower bound on
+        d(v, target) and h_s(v) the lower bound on d(source, v). The forward search
+        uses +p and the backward search -p; both are consistent. Unreachable
+        landmark distances are stored as NaN and skipped.
+        """
+        fwd = self.from_landmark
+        bwd = self.to_landmark
+        ft, bt = fwd[target], bwd[target]
+        fs, bs = fwd[source], bwd[source]
+        fmax = np.fmax.reduce
+        cache = {}
+
+        def p(v):
+            value = cache.get(v)
+            if value is None:
+                fv, bv = fwd[v], bwd[v]
+                h_t = max(fmax(ft - fv, initial=0.0), fmax(bv - bt, initial=0.0))
+                h_s = max(fmax(fv - fs, initial=0.0), fmax(bs - bv, initial=0.0))
+                value = 0.5 * (h_t - h_s)
+                cache[v] = value
+            return value
+
+        return p
+
+
+def select_landmarks(csr, k=NUM_LANDMARKS):
+    """
+    Chooses k landmarks by farthest-point selection and computes their
+    distance arrays in both directions.
+
+    Each new landmark is the reachable node with the largest round-trip
+    distance to its nearest already chosen landmark.
+
+    Args:
+        csr (CSRGraph): The compact city graph.
+        k (int): Number of landmarks.
+
+    Returns:
+        Landmarks: The landmark index.
+    """
+    reverse = transpose_csr(csr)
+    n = csr.num_nodes
+    k = min(k, n)
+
+    # Start from the node farthest from an arbitrary node (the one with most edges).
+    start = int(np.argmax(np.diff(csr.indptr)))
+    seed = _distances_from(csr, start)
+    first = int(np.argmax(np.where(np.isfinite(seed), seed, -1)))
+
+    nodes = []
+    from_rows = []
+    to_rows = []
+    nearest = np.full(n, math.inf)
+    candidate = first
+    for _ in range(k):
+        nodes.append(candidate)
+        from_rows.append(_distances_from(csr, candidate))
+        to_rows.append(_distances_from(reverse, candidate))
+        round_trip = from_rows[-1] + to_rows[-1]
+        nearest = np.minimum(nearest, round_trip)
+        score = np.where(np.isfinite(nearest), nearest, -1)
+        score[nodes] = -1
+        candidate = int(np.argmax(score))
+        if score[candidate] <= 0:
+            break
+
+    # Stored node-major with NaN for unreachable pairs (see Landmarks.potential).
+    from_landmark = np.array(from_rows).T.copy()
+    to_landmark = np.array(to_rows).T.copy()
+    from_landmark[~np.isfinite(from_landmark)] = np.nan
+    to_landmark[~np.isfinite(to_landmark)] = np.nan
+    return Landmarks(csr, np.array(nodes, dtype=np.int32), from_landmark, to_landmark, graph_signature(csr))
+
+
+def alt_query(landmarks, source, target):
+    """
+    Bidirectional A* with landmark potentials (ALT).
+
+    Args:
+        landmarks (Landmarks): Landmark index of the graph.
+        source (int): Source node index.
+        target (int): Target node index.
+
+    Returns:
+        (float, list): (distance, path of node indices), or (math.inf, None).
+    """
+    if source == target:
+        record_search('alt', 1)
+        return 0.0, [source]
+
+    p = landmarks.potential(source, target)
+    graphs = (landmarks.csr, landmarks.reverse)
+    signs = (1.0, -1.0)
+    dist = ({source: 0.0}, {target: 0.0})
+    pred = ({}, {})
+    settled = (set(), set())
+    heaps = ([(p(source), source)], [(-p(target), target)])
+    best = math.inf
+    meet = -1
+
+    while heaps[0] and heaps[1]:
+        # With the averaged potential, no shorter path exists once the two
+        # minimum keys add up to at least the best path found.
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        _, u = heapq.heappop(heaps[side])
+        if u in settled[side]:
+            continue
+        settled[side].add(u)
+        d = dist[side][u]
+        other = dist[1 - side]
+
+        graph = graphs[side]
+        sign = signs[side]
+        start, end = graph.indptr[u], graph.indptr[u + 1]
+        for v, length in zip(graph.indices[start:end].tolist(), graph.lengths[start:end].tolist()):
+            nd = d + length
+            if nd < dist[side].get(v, math.inf):
+                dist[side][v] = nd
+                pred[side][v] = u
+                heapq.heappush(heaps[side], (nd + sign * p(v), v))
+                if v in other and nd + other[v] < best:
+                    best = nd + other[v]
+                    meet = v
+
+    record_search('alt', len(settled[0]) + len(settled[1]))
+    if meet < 0:
+        return math.inf, None
+
+    path = [meet]
+    while path[-1] != source:
+        path.append(pred[0][path[-1]])
+    path.reverse()
+    node = meet
+    while node != target:
+        node = pred[1][node]
+        path.append(node)
+    return best, path
+
+
+class PairPaths:
+    """
+    Path lookup for a matrix built from point-to-point queries, compatible
+    with distance_matrix.ShortestPathTrees.
+    """
+
+    def __init__(self):
+        self.paths = {}
+
+    def path(self, u, v):
+        """
+        Returns the stored node index path from node ID u to node ID v, or None.
+        """
+        return self.paths.get((u, v))
+
+
+def alt_distance_matrix(landmarks, node_ids, indices):
+    """
+    Fills the distance matrix with one ALT query per ordered pair.
+
+    Args:
+        landmarks (Landmarks): Landmark index of the graph.
+        node_ids (list): Node IDs (strings) of the selected nodes.
+        indices (list): The matching node indices.
+
+    Returns:
+        (list, PairPaths): (matrix, trees) in the format of
+                           distance_matrix.compute_distance_matrix.
+    """
+    n = len(indices)
+    matrix = [[0.0] * n for _ in range(n)]
+    trees = PairPaths()
+    for i in range(n):
+        trees.paths[(node_ids[i], node_ids[i])] = [indices[i]]
+        for j in range(n):
+            if i != j:
+                d, path = alt_query(landmarks, indices[i], indices[j])
+                matrix[i][j] = d
+                if path is not None:
+                    trees.paths[(node_ids[i], node_ids[j])] = path
+    return matrix, trees
@@ -0,0 +1,234 @@
+#=====================================================
+# File: /src/core/lin_kernighan.py
+#=====================================================
+
+import random
+import time
+import numpy as np
+
+from src.core.local_search import EPS, earlier, expired, neighbor_lists
+
+MAX_DEPTH = 5            # Flips in one variable-depth move
+BREADTH = 3              # Alternatives tried for the first flip
+LK_TIME_LIMIT_S = 2.0    # Default time budget of iterated LK
+KICKS_PER_POINT = 1      # Default number of kicks = KICKS_PER_POINT * n
+KICK_SEGMENT = 50        # Longest segment moved by a double-bridge kick
+
+
+class _FlipTour:
+    """
+    Array tour with fixed tour[0], position index and prefix sums of the edge
+    lengths in both directions, so that the gain of any segment reversal is
+    available in constant time for asymmetric distances. A reversal only
+    recomputes the prefix sums of the reversed part and shifts the rest.
+    """
+
+    def __init__(self, dist, tour):
+        self.dist = dist
+        self.matrix = np.asarray(dist, dtype=np.float64)
+        self.n = len(tour)
+        self.set_tour(tour)
+
+    def set_tour(self, tour):
+        n = self.n
+        self.tour = np.array(tour, dtype=np.int64)
+        self.pos = np.empty(n, dtype=np.int64)
+        self.pos[self.tour] = np.arange(n)
+        t = self.tour
+        self.F = np.zeros(n)
+        self.B = np.zeros(n)
+        np.cumsum(self.matrix[t[:-1], t[1:]], out=self.F[1:])
+        np.cumsum(self.matrix[t[1:], t[:-1]], out=self.B[1:])
+
+    def to_list(self):
+        return self.tour.tolist()
+
+    def length(self):
+        return float(self.F[-1]) + self.dist[self.tour[-1]][self.tour[0]]
+
+    def delta(self, p, q):
+        """
+        Change of the tour length if tour[p..q] is reversed (1 <= p < q <= n-1).
+        """
+        tour, dist, F, B = self.tour, self.dist, self.F, self.B
+        u, v, w, x = tour[p - 1], tour[p], tour[q], tour[(q + 1) % self.n]
+        return (dist[u][w] + dist[v][x] - dist[u][v] - dist[w][x]
+                + (B[q] - B[p]) - (F[q] - F[p]))
+
+    def flip(self, p, q):
+        t, F, B, M = self.tour, self.F, self.B, self.matrix
+        t[p:q + 1] = t[p:q + 1][::-1].copy()
+        self.pos[t[p:q + 1]] = np.arange(p, q + 1)
+        # Edges lo..hi (edge e joins t[e] and t[e + 1]) have changed.
+        lo, hi = p - 1, min(q, self.n - 2)
+        a, b = t[lo:hi + 1], t[lo + 1:hi + 2]
+        for prefix, edges in ((F, M[a, b]), (B, M[b, a])):
+            old_end = prefix[hi + 1]
+            np.cumsum(edges, out=prefix[lo + 1:hi + 2])
+            prefix[lo + 1:hi + 2] += prefix[lo]
+            prefix[hi + 2:] += prefix[hi + 1] - old_end
+
+    def double_bridge(self, rng):
+        """
+        Swaps two short adjacent segments (a double-bridge kick) and returns
+        the points next to the changed edges.
+        """
+        n = self.n
+        a = rng.randint(1, n - 3)
+        b = min(n - 2, a + rng.randint(1, KICK_SEGMENT))
+        c = min(n - 1, b + rng.randint(1, KICK_SEGMENT))
+        t = self.tour.tolist()
+        touched = [t[a - 1], t[a], t[b - 1], t[b], t[c - 1], t[c], t[(c + 1) % n]]
+        self.set_tour(t[:a] + t[b:c + 1] + t[a:b] + t[c + 1:])
+        return touched
+
+
+def _flip_candidates(state, s_pos, neighbors, total, added):
+    # Reversals that break the open edge tour[s_pos] -> tour[s_pos + 1] and
+    # link s = tour[s_pos] to one of its neighbours, ordered by the gain the
+    # tour would have if the new open edge cost nothing.
+    tour, pos, dist, n = state.tour, state.pos, state.dist, state.n
+    s = tour[s_pos]
+    e = tour[(s_pos + 1) % n]
+    options = []
+    for c in neighbors[s]:
+        j = pos[c]
+        if s_pos + 2 <= j <= n - 1:
+            # Forward: reverse tour[s_pos+1..j]; new edge s -> c, open edge e -> tour[j+1].
+            p, q = s_pos + 1, j
+            broken = (tour[q], tour[(q + 1) % n])
+            new_edge = (s, c)
+            open_cost = dist[e][tour[(q + 1) % n]]
+            next_pos = q
+        elif 0 <= j < s_pos - 1:
+            # Backward: reverse tour[j+1..s_pos]; new edge c -> s, open edge tour[j+1] -> e.
+            p, q = j + 1, s_pos
+            broken = (tour[j], tour[j + 1])
+            new_edge = (c, s)
+            open_cost = dist[tour[j + 1]][e]
+            next_pos = q
+        else:
+            continue
+        if broken in added:
+            continue
+        new_total = total + state.delta(p, q)
+        gain = open_cost - new_total
+        if gain > EPS:
+            options.append((gain, p, q, new_total, new_edge, next_pos))
+    options.sort(key=lambda option: -option[0])
+    return options
+
+
+def _improve_from(state, a, neighbors):
+    """
+    Variable-depth search from point a: a chain of up to MAX_DEPTH segment
+    reversals, each breaking the edge the previous one opened, continued
+    while the gain without the open edge stays positive. The best prefix of
+    the chain is kept. Returns the points whose edges changed, or None.
+    """
+    n = state.n
+    start = state.pos[a]
+    for first in _flip_candidates(state, start, neighbors, 0.0, set())[:BREADTH]:
+        flips = []
+        touched = []
+        added = set()
+        total = 0.0
+        best_total = 0.0
+        best_depth = 0
+        option = first
+        s_pos = start
+        while option is not None:
+            _, p, q, total, new_edge, s_pos = option
+            tour = state.tour
+            touched.extend((tour[p - 1], tour[p], tour[q], tour[(q + 1) % n]))
+            state.flip(p, q)
+            flips.append((p, q))
+            added.add(new_edge)
+            if total < best_total - EPS:
+                best_total = total
+                best_depth = len(flips)
+            if len(flips) >= MAX_DEPTH:
+                break
+            options = _flip_candidates(state, s_pos, neighbors, total, added)
+            option = options[0] if options else None
+
+        # Undo the flips after the best point of the chain.
+        while len(flips) > best_depth:
+            state.flip(*flips.pop())
+        if best_depth:
+            return touched[:4 * best_depth]
+    return None
+
+
+def _optimize(state, neighbors, queue, deadline=None):
+    # Don't-look bits: only points next to a changed edge are searched again.
+    queued = set(queue)
+    queue = list(queue)
+    while queue and not expired(deadline):
+        a = queue.pop()
+        queued.discard(a)
+        touched = _improve_from(state, a, neighbors)
+        if touched:
+            for c in touched + [a]:
+                if c not in queued:
+                    queued.add(c)
+                    queue.append(c)
+
+
+def lin_kernighan_tour(dist, tour, neighbors=None, time_limit=LK_TIME_LIMIT_S,
+                       max_kicks=None, seed=None, on_progress=None, deadline=None):
+    """
+    Iterated Lin-Kernighan: variable-depth local search, then repeated
+    double-bridge kicks, each followed by a local LK repair. A kicked tour
+    is kept only if it is shorter than the best tour so far.
+
+    Args:
+        dist (list): n x n distance matrix.
+        tour (list): Point indices; tour[0] is the fixed start.
+        neighbors (list, optional): Candidate lists from neighbor_lists().
+        time_limit (float): Time budget in seconds; the first descent stops
+                            at it too.
+        max_kicks (int, optional): Kick limit; defaults to KICKS_PER_POINT * n.
+        seed (int, optional): Seed of the kick positions.
+        on_progress (callable, optional): Called as on_progress(fraction, best_length)
+                                          after every kick.
+        deadline (float, optional): time.perf_counter() value (e.g. a
+                                    local_search.Deadline) that ends the
+                                    search before time_limit does.
+
+    Returns:
+        list: The best tour found.
+    """
+    n = len(tour)
+    if n < 4:
+        return list(tour)
+    if neighbors is None:
+        neighbors = neighbor_lists(dist)
+    if max_kicks is None:
+        max_kicks = KICKS_PER_POINT * n
+
+    start_time = time.perf_counter()
+    deadline = earlier(deadline, start_time + time_limit)
+    state = _FlipTour(dist, tour)
+    _optimize(state, neighbors, state.to_list()[::-1], deadline)
+    best = state.to_list()
+    best_length = state.length()
+    if n < 8:
+        return best
+
+    rng = random.Random(seed)
+    for kick in range(max_kicks):
+        if expired(deadline):
+            break
+        if on_progress is not None:
+            elapsed = time.perf_counter() - start_time
+            on_progress(max(kick / max_kicks, elapsed / (deadline - start_time)), best_length)
+        touched = state.double_bridge(rng)
+        _optimize(state, neighbors, touched, deadline)
+        length = state.length()
+        if length < best_length - EPS:
+            best = state.to_list()
+            best_length = length
+        else:
+            state.set_tour(best)
+    return best
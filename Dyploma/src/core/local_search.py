@@ -0,0 +1,401 @@
+#=====================================================
+# File: /src/core/local_search.py
+#=====================================================
+
+import time
+from collections import deque
+import numpy as np
+
+# Number of candidate neighbours kept per point.
+NEIGHBOR_COUNT = 10
+
+# Minimum gain for a move to count as an improvement (meters).
+EPS = 1e-9
+
+
+def neighbor_lists(dist, k=NEIGHBOR_COUNT):
+    """
+    Returns, for every point, the k points closest to it in either direction.
+
+    Args:
+        dist (list): n x n distance matrix (dist[i][j] from i to j).
+        k (int): Number of neighbours per point.
+
+    Returns:
+        list: neighbors[i] is a list of up to k point indices, closest first.
+    """
+    D = np.asarray(dist, dtype=np.float64)
+    n = len(D)
+    if n < 2:
+        return [[] for _ in range(n)]
+    closeness = np.minimum(D, D.T)
+    np.fill_diagonal(closeness, np.inf)
+    k = min(k, n - 1)
+    order = np.argsort(closeness, axis=1, kind='stable')[:, :k]
+    return order.tolist()
+
+
+def tour_length(dist, tour):
+    """
+    Returns the length of the closed tour tour[0] -> ... -> tour[-1] -> tour[0].
+    """
+    total = 0.0
+    for i in range(len(tour) - 1):
+        total += dist[tour[i]][tour[i + 1]]
+    if len(tour) > 1:
+        total += dist[tour[-1]][tour[0]]
+    return total
+
+
+class Deadline(float):
+    """
+    A time.perf_counter() deadline that records whether it stopped a search.
+
+    The searches only ask expired() while they still have work left, so
+    'reached' is set exactly when the deadline cut one of them short, not
+    when a search converged just before it. Being a float, a Deadline can
+    be passed wherever a plain deadline is expected.
+    """
+
+    reached = False
+
+
+def expired(deadline):
+    """
+    Returns whether a time.perf_counter() deadline (None for none) has passed,
+    and marks a Deadline as reached if so.
+    """
+    if deadline is None or time.perf_counter() < deadline:
+        return False
+    if isinstance(deadline, Deadline):
+        deadline.reached = True
+    return True
+
+
+def earlier(deadline, other):
+    """
+    Returns the earlier of two deadlines (None for none). On a tie the first
+    one is returned, so a Deadline passed first still records being reached.
+    """
+    if deadline is None:
+        return other
+    if other is None or deadline <= other:
+        return deadline
+    return other
+
+
+def _prefix_sums(dist, tour):
+    # F[k]: length of tour[0] -> ... -> tour[k]; B[k]: the same path walked backwards.
+    n = len(tour)
+    F = [0.0] * n
+    B = [0.0] * n
+    for t in range(n - 1):
+        a, b = tour[t], tour[t + 1]
+        F[t + 1] = F[t] + dist[a][b]
+        B[t + 1] = B[t] + dist[b][a]
+    return F, B
+
+
+def two_opt_tour(dist, tour, neighbors=None, deadline=None):
+    """
+    2-opt local search on a closed tour with asymmetric distances.
+
+    A move reverses tour[p..q]. Its gain is evaluated in constant time:
+    the two replaced edges come from the matrix, and the change in length of
+    the reversed segment (whose edges now run the other way) comes from
+    prefix sums of the tour in both directions. Only moves that create an
+    edge between a point and one of its candidate neighbours are tried, and
+    points whose neighbourhood did not change are skipped (don't-look bits).
+    tour[0] never moves.
+
+    Args:
+        dist (list): n x n distance matrix.
+        tour (list): Point indices; tour[0] is the fixed start.
+        neighbors (list, optional): Candidate lists from neighbor_lists().
+        deadline (float, optional): time.perf_counter() value at which the
+                                    search stops with the tour improved so far.
+
+    Returns:
+        list: The improved tour (a new list).
+    """
+    n = len(tour)
+    tour = list(tour)
+    if n < 3:
+        return tour
+    if neighbors is None:
+        neighbors = neighbor_lists(dist)
+
+    while True:
+        while _two_opt_pass(dist, tour, neighbors, deadline):
+            pass
+        # The only change a segment reversal cannot make is reversing the
+        # whole tour, which matters when the distances are asymmetric.
+        reverse = tour[:1] + tour[:0:-1]
+        if tour_length(dist, reverse) < tour_length(dist, tour) - EPS:
+            tour = reverse
+        else:
+            return tour
+
+
+def _two_opt_pass(dist, tour, neighbors, deadline=None):
+    # One round of the don't-look bit queue, starting with every point
+    # queued. Returns whether the tour changed; a round without a change
+    # proves the tour is 2-opt optimal for the candidate lists. Past the
+    # deadline the round ends early and reports no change.
+    n = len(tour)
+    changed = False
+    pos = [0] * n
+    for i, c in enumerate(tour):
+        pos[c] = i
+    F, B = _prefix_sums(dist, tour)
+
+    queue = deque(tour)
+    queued = [True] * n
+    while queue:
+        if expired(deadline):
+            return False
+        a = queue.popleft()
+        queued[a] = False
+        improved = False
+        for c in neighbors[a]:
+            i, j = pos[a], pos[c]
+            # Segments whose reversal makes a -> c (j > i) or c -> a (j < i) a tour edge.
+            if j > i:
+                moves = ((i + 1, j), (i, j - 1))
+            else:
+                moves = ((j + 1, i), (j, i - 1))
+            for p, q in moves:
+                if p < 1 or q > n - 1 or p >= q:
+                    continue
+                u, v, w, x = tour[p - 1], tour[p], tour[q], tour[(q + 1) % n]
+                delta = (dist[u][w] + dist[v][x] - dist[u][v] - dist[w][x]
+                         + (B[q] - B[p]) - (F[q] - F[p]))
+                if delta < -EPS:
+                    tour[p:q + 1] = tour[p:q + 1][::-1]
+                    for t in range(p, q + 1):
+                        pos[tour[t]] = t
+                    for t in range(p - 1, n - 1):
+                        s, e = tour[t], tour[t + 1]
+                        F[t + 1] = F[t] + dist[s][e]
+                        B[t + 1] = B[t] + dist[e][s]
+                    for endpoint in (u, v, w, x):
+                        if not queued[endpoint]:
+                            queued[endpoint] = True
+                            queue.append(endpoint)
+                    improved = changed = True
+                    break
+            if improved:
+                break
+    return changed
+
+
+def or_opt_tour(dist, tour, neighbors=None, deadline=None, max_segment=3):
+    """
+    Or-opt local search: moves a chain of 1..max_segment consecutive points
+    to another place in the tour, in its own or reversed direction.
+
+    Candidate places are the gaps next to the neighbours of the chain's end
+    points. The gain is computed from the three replaced edges plus, for a
+    reversed chain, the difference of its inner edges in both directions.
+    tour[0] never moves.
+
+    Args:
+        dist (list): n x n distance matrix.
+        tour (list): Point indices; tour[0] is the fixed start.
+        neighbors (list, optional): Candidate lists from neighbor_lists().
+        deadline (float, optional): Stops the search (see two_opt_tour).
+        max_segment (int): Longest chain that is moved.
+
+    Returns:
+        list: The improved tour (a new list).
+    """
+    n = len(tour)
+    tour = list(tour)
+    if n < 4:
+        return tour
+    if neighbors is None:
+        neighbors = neighbor_lists(dist)
+
+    while _or_opt_pass(dist, tour, neighbors, max_segment, deadline):
+        pass
+    return tour
+
+
+def _or_opt_pass(dist, tour, neighbors, max_segment, deadline=None):
+    # Same scheme as _two_opt_pass.
+    n = len(tour)
+    changed = False
+    pos = [0] * n
+    for i, c in enumerate(tour):
+        pos[c] = i
+    queue = deque(tour)
+    queued = [True] * n
+    while queue:
+        if expired(deadline):
+            return False
+        a = queue.popleft()
+        queued[a] = False
+        move = _best_or_move(dist, tour, pos, neighbors, a, max_segment)
+        if move is None:
+            continue
+        i, length, gap, reverse = move
+        chain = tour[i:i + length]
+        touched = (tour[i - 1], tour[(i + length) % n], tour[gap], tour[(gap + 1) % n],
+                   chain[0], chain[-1])
+        rest = tour[:i] + tour[i + length:]
+        at = rest.index(tour[gap]) + 1
+        tour[:] = rest[:at] + (chain[::-1] if reverse else chain) + rest[at:]
+        for t, c in enumerate(tour):
+            pos[c] = t
+        changed = True
+        for c in touched:
+            if not queued[c]:
+                queued[c] = True
+                queue.append(c)
+    return changed
+
+
+def _best_or_move(dist, tour, pos, neighbors, a, max_segment):
+    # First improving move of a chain starting at point a, as
+    # (chain start, chain length, gap index, reversed) or None.
+    n = len(tour)
+    i = pos[a]
+    if i == 0:
+        return None
+    for length in range(1, max_segment + 1):
+        end = i + length - 1
+        if end > n - 1 or length > n - 3:
+            break
+        chain = tour[i:end + 1]
+        first, last = chain[0], chain[-1]
+        prev, nxt = tour[i - 1], tour[(end + 1) % n]
+        removed = dist[prev][first] + dist[last][nxt] - dist[prev][nxt]
+        inner_fwd = 0.0
+        inner_rev = 0.0
+        for t in range(length - 1):
+            inner_fwd += dist[chain[t]][chain[t + 1]]
+            inner_rev += dist[chain[t + 1]][chain[t]]
+
+        for c in neighbors[first] + neighbors[last]:
+            j = pos[c]
+            if i <= j <= end:
+                continue
+            # The gaps just after and just before the neighbour.
+            for gap in (j, (j - 1) % n):
+                if i - 1 <= gap <= end:
+                    continue
+                g1, g2 = tour[gap], tour[(gap + 1) % n]
+                base = removed + dist[g1][g2]
+                if dist[g1][first] + dist[last][g2] - base < -EPS:
+                    return i, length, gap, False
+                if (dist[g1][last] + dist[first][g2] + inner_rev - inner_fwd - base) < -EPS:
+                    return i, length, gap, True
+    return None
+
+
+def or3opt_tour(dist, tour, neighbors=None, deadline=None):
+    """
+    Reversal-free 3-opt ("or3opt"): swaps two adjacent segments of any length,
+    turning ... a | b ... c | d ... e | f ... into ... a | d ... e | b ... c | f ...
+
+    No segment changes direction, so the gain is exact for asymmetric
+    distances using only the three removed and three added edges. The first
+    new edge a -> d comes from the neighbour list of a and the second
+    e -> b from the neighbour list of b. tour[0] never moves.
+
+    Args:
+        dist (list): n x n distance matrix.
+        tour (list): Point indices; tour[0] is the fixed start.
+        neighbors (list, optional): Candidate lists from neighbor_lists().
+        deadline (float, optional): Stops the search (see two_opt_tour).
+
+    Returns:
+        list: The improved tour (a new list).
+    """
+    n = len(tour)
+    tour = list(tour)
+    if n < 4:
+        return tour
+    if neighbors is None:
+        neighbors = neighbor_lists(dist)
+
+    while _or3opt_pass(dist, tour, neighbors, deadline):
+        pass
+    return tour
+
+
+def _or3opt_pass(dist, tour, neighbors, deadline=None):
+    # Same scheme as _two_opt_pass.
+    n = len(tour)
+    changed = False
+    pos = [0] * n
+    for i, c in enumerate(tour):
+        pos[c] = i
+    queue = deque(tour)
+    queued = [True] * n
+    while queue:
+        if expired(deadline):
+            return False
+        a = queue.popleft()
+        queued[a] = False
+        i = pos[a]
+        if i > n - 3:
+            continue
+        b = tour[i + 1]
+        found = None
+        for d in neighbors[a]:
+            j1 = pos[d]            # The second segment starts at j1 = j + 1
+            if j1 < i + 2:
+                continue
+            c = tour[j1 - 1]
+            for e in neighbors[b]:
+                k = pos[e]
+                if k < j1:
+                    continue
+                f = tour[(k + 1) % n]
+                delta = (dist[a][d] + dist[e][b] + dist[c][f]
+                         - dist[a][b] - dist[c][d] - dist[e][f])
+                if delta < -EPS:
+                    found = (j1, k, (a, b, c, d, e, f))
+                    break
+            if found:
+                break
+        if found is None:
+            continue
+        j1, k, touched = found
+        tour[i + 1:k + 1] = tour[j1:k + 1] + tour[i + 1:j1]
+        for t in range(i + 1, k + 1):
+            pos[tour[t]] = t
+        changed = True
+        for c in touched:
+            if not queued[c]:
+                queued[c] = True
+                queue.append(c)
+    return changed
+
+
+def improve_tour(dist, tour, operators, neighbors=None, deadline=None):
+    """
+    Applies the local search operators one after another until a whole
+    round leaves the tour length unchanged or the deadline passes.
+
+    Args:
+        dist (list): n x n distance matrix.
+        tour (list): Point indices; tour[0] is the fixed start.
+        operators (list): Functions (dist, tour, neighbors, deadline) -> tour.
+        neighbors (list, optional): Candidate lists from neighbor_lists().
+        deadline (float, optional): Stops the search (see two_opt_tour).
+
+    Returns:
+        list: The improved tour.
+    """
+    if neighbors is None:
+        neighbors = neighbor_lists(dist)
+    length = tour_length(dist, tour)
+    while True:
+        for operator in operators:
+            tour = operator(dist, tour, neighbors, deadline)
+        new_length = tour_length(dist, tour)
+        if new_length > length - EPS or expired(deadline):
+            return tour
+        length = new_length
@@ -0,0 +1,224 @@
+#=====================================================
+# File: /src/core/lower_bounds.py
+#=====================================================
+
+import numpy as np
+
+SUBGRADIENT_ITERATIONS = 100   # Default number of subgradient steps
+INITIAL_STEP = 2.0             # Polyak step factor, halved when the bound stalls
+STALL_ITERATIONS = 10          # Steps without improvement before the factor is halved
+
+
+def symmetric_transform(dist):
+    """
+    Jonker-Volgenant transformation of the asymmetric problem into a
+    symmetric one on 2n points: point i becomes an "in" copy i and an "out"
+    copy n + i joined by an edge of weight -link, and the edge between out i
+    and in j weighs dist[i][j]. Other edges do not exist. A directed tour of
+    length L becomes a symmetric tour of weight L - n * link, so the bounds
+    of the symmetric problem hold without losing the direction of the edges.
+
+    Returns:
+        (np.ndarray, float): The 2n x 2n weights (inf for missing edges) and link.
+    """
+    D = np.asarray(dist, dtype=np.float64)
+    n = len(D)
+    link = float(D.sum()) + 1.0
+    W = np.full((2 * n, 2 * n), np.inf)
+    W[n:, :n] = D
+    W[:n, n:] = D.T
+    idx = np.arange(n)
+    W[idx, n + idx] = -link
+    W[n + idx, idx] = -link
+    return W, link
+
+
+def spanning_tree(W, nodes):
+    """
+    Prim's minimum spanning tree over a subset of the points.
+
+    Args:
+        W (np.ndarray): Symmetric n x n weight matrix.
+        nodes (np.ndarray): Indices of the points to span.
+
+    Returns:
+        (float, np.ndarray): The tree weight, and the tree degree of every
+                             point of 'nodes' (in the same order).
+    """
+    k = len(nodes)
+    degree = np.zeros(k, dtype=np.int64)
+    if k < 2:
+        return 0.0, degree
+    sub = W[np.ix_(nodes, nodes)]
+    in_tree = np.zeros(k, dtype=bool)
+    in_tree[0] = True
+    best = sub[0].copy()
+    parent = np.zeros(k, dtype=np.int64)
+    total = 0.0
+    for _ in range(k - 1):
+        candidates = np.where(in_tree, np.inf, best)
+        v = int(np.argmin(candidates))
+        total += candidates[v]
+        degree[v] += 1
+        degree[parent[v]] += 1
+        in_tree[v] = True
+        closer = sub[v] < best
+        best[closer] = sub[v][closer]
+        parent[closer] = v
+    return float(total), degree
+
+
+def one_tree(W):
+    """
+    Minimum 1-tree: a spanning tree of points 1..n-1 plus the two cheapest
+    edges of point 0. Every tour is a 1-tree, so its weight is a lower bound.
+
+    Returns:
+        (float, np.ndarray): The 1-tree weight and the degree of every point.
+    """
+    n = len(W)
+    weight, rest = spanning_tree(W, np.arange(1, n))
+    cheapest = np.argsort(W[0, 1:], kind='stable')[:2] + 1
+    degree = np.zeros(n, dtype=np.int64)
+    degree[1:] = rest
+    degree[0] = 2
+    degree[cheapest] += 1
+    return weight + float(W[0, cheapest].sum()), degree
+
+
+def held_karp_bound(dist, upper=None, iterations=SUBGRADIENT_ITERATIONS):
+    """
+    Held-Karp lower bound: the 1-tree bound of the transformed problem (see
+    symmetric_transform) with point penalties pi chosen by subgradient
+    optimization. With w[i][j] = W[i][j] + pi[i] + pi[j], every tour weighs
+    its length plus 2 * sum(pi), so 1-tree(w) - 2 * sum(pi) is a lower bound
+    for any pi. The penalties push points whose 1-tree degree is not 2
+    towards degree 2, which tightens the bound.
+
+    Args:
+        dist (list or np.ndarray): n x n distance matrix (asymmetric allowed).
+        upper (float, optional): Length of a known tour, the target of the
+                                 step sizes; a nearest neighbour tour is used
+                                 if not given.
+        iterations (int): Number of subgradient steps.
+
+    Returns:
+        (float, np.ndarray): The best bound found and its penalties, indexed
+                             like the transformed points.
+    """
+    D = np.asarray(dist, dtype=np.float64)
+    n = len(D)
+    pi = np.zeros(2 * n)
+    if n < 3:
+        return float(D.sum()), pi
+    if upper is None:
+        upper = _nearest_neighbor_length(D)
+    W, link = symmetric_transform(D)
+
+    best_bound, best_pi = -np.inf, pi.copy()
+    step = INITIAL_STEP
+    stall = 0
+    for _ in range(iterations):
+        weight, degree = one_tree(W + pi[:, None] + pi[None, :])
+        bound = weight - 2.0 * pi.sum() + n * link
+        if bound > best_bound + 1e-9:
+            best_bound, best_pi = bound, pi.copy()
+            stall = 0
+        else:
+            stall += 1
+            if stall >= STALL_ITERATIONS:
+                step /= 2.0
+                stall = 0
+        g = degree - 2
+        norm = float((g * g).sum())
+        if norm == 0 or upper - bound <= 1e-9:
+            break                   # The 1-tree is a tour: the bound is exact
+        pi = pi + step * (upper - bound) / norm * g
+    return float(best_bound), best_pi
+
+
+def assignment_bound(dist):
+    """
+    Assignment lower bound of the asymmetric problem: every point gets exactly
+    one successor (not itself) at minimum total cost. A tour is such an
+    assignment without subtours. Solved with the Hungarian method in O(n^3).
+
+    Args:
+        dist (list or np.ndarray): n x n distance matrix.
+
+    Returns:
+        float: The minimum assignment cost.
+    """
+    C = np.array(dist, dtype=np.float64)
+    n = len(C)
+    if n < 2:
+        return 0.0
+    np.fill_diagonal(C, C.sum() + 1.0)   # Forbids self-loops without inf arithmetic
+
+    # Potentials u (rows) and v (columns), p[j] = row assigned to column j;
+    # index 0 is a virtual column and rows/columns are numbered from 1.
+    u = np.zeros(n + 1)
+    v = np.zeros(n + 1)
+    p = np.zeros(n + 1, dtype=np.int64)
+    way = np.zeros(n + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(n + 1, np.inf)
+        used = np.zeros(n + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            free[0] = False
+            reduced = np.full(n + 1, np.inf)
+            reduced[1:] = C[i0 - 1] - u[i0] - v[1:]
+            closer = free & (reduced < minv)
+            minv[closer] = reduced[closer]
+            way[closer] = j0
+            j1 = int(np.argmin(np.where(free, minv, np.inf)))
+            delta = minv[j1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    rows = p[1:] - 1
+    return float(C[rows, np.arange(n)].sum())
+
+
+def tour_lower_bound(dist, upper=None):
+    """
+    Best of the Held-Karp and the assignment bound.
+
+    Args:
+        dist (list or np.ndarray): n x n distance matrix.
+        upper (float, optional): Length of a known tour (see held_karp_bound).
+
+    Returns:
+        float: A lower bound on the length of every closed tour.
+    """
+    n = len(dist)
+    if n < 2:
+        return 0.0
+    if n == 2:
+        return float(dist[0][1] + dist[1][0])
+    return max(held_karp_bound(dist, upper)[0], assignment_bound(dist))
+
+
+def _nearest_neighbor_length(D):
+    n = len(D)
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    current, total = 0, 0.0
+    for _ in range(n - 1):
+        nxt = int(np.argmin(np.where(visited, np.inf, D[current])))
+        total += D[current, nxt]
+        visited[nxt] = True
+        current = nxt
+    return total + D[current, 0]
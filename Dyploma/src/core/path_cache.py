@@ -0,0 +1,125 @@
+#=====================================================
+# File: /src/core/path_cache.py
+#=====================================================
+
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Default memory budget of the cache, in bytes.
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Approximate size of one entry without its path (key tuple, list, floats).
+ENTRY_BYTES = 200
+
+
+class PathCache:
+    """
+    Memory-bounded LRU cache of shortest path results shared by all requests.
+
+    Entries are keyed by (city file, source node ID, target node ID) and hold
+    the distance and, once it has been needed, the path as an int32 array of
+    node indices. Node indices are only valid for the loaded graph, so a city
+    must be invalidated whenever its graph is (re)loaded.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, city_key, source, target):
+        """
+        Looks up the distance of a pair and counts a hit or a miss.
+
+        Args:
+            city_key (str): City filename the node IDs belong to.
+            source (int): Source node ID.
+            target (int): Target node ID.
+
+        Returns:
+            float or None: The cached distance (math.inf if unreachable), or None.
+        """
+        key = (city_key, source, target)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def get_path(self, city_key, source, target):
+        """
+        Returns the cached path of a pair as a list of node indices, or None
+        if the pair or its path is not cached. Does not affect the statistics.
+        """
+        key = (city_key, source, target)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1].tolist()
+
+    def put(self, city_key, source, target, distance, path=None):
+        """
+        Stores the distance of a pair, and its path if given. An already
+        cached path is kept when only the distance is stored again.
+        """
+        key = (city_key, source, target)
+        packed = np.asarray(path, dtype=np.int32) if path is not None else None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= ENTRY_BYTES + (old[1].nbytes if old[1] is not None else 0)
+                if packed is None:
+                    packed = old[1]
+            self._entries[key] = (distance, packed)
+            self.bytes += ENTRY_BYTES + (packed.nbytes if packed is not None else 0)
+            while self.bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= ENTRY_BYTES + (evicted.nbytes if evicted is not None else 0)
+
+    def invalidate(self, city_key=None):
+        """
+        Drops every entry of a city, or all entries if city_key is None.
+        """
+        with self._lock:
+            if city_key is None:
+                self._entries.clear()
+                self.bytes = 0
+                return
+            for key in [k for k in self._entries if k[0] == city_key]:
+                _, path = self._entries.pop(key)
+                self.bytes -= ENTRY_BYTES + (path.nbytes if path is not None else 0)
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current size of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def reset_stats(self):
+        """
+        Clears the hit/miss counters.
+        """
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,137 @@
+#=====================================================
+# File: /src/core/portfolio.py
+#=====================================================
+
+import math
+import os
+import random
+import time
+
+from src.core.annealing import anneal_tour
+from src.core.construction import greedy_edge_tour, insertion_tour, nearest_neighbor_tour
+from src.core.local_search import Deadline, improve_tour, or_opt_tour, tour_length, two_opt_tour
+from src.core.worker_pool import iter_tasks
+
+PORTFOLIO_TIME_LIMIT_S = 2.0              # Default deadline of the whole portfolio
+PORTFOLIO_WORKERS = os.cpu_count() or 1   # Members running at the same time
+GRACE_S = 5.0                             # Extra time before a late member is terminated
+
+# Members of the portfolio: (label, search, start). The local searches start
+# from the named construction; the annealing runs start from a random tour
+# and differ in their seed.
+PORTFOLIO_MEMBERS = (
+    ('2-opt from greedy', '2-opt', 'greedy'),
+    ('2-opt from nearest neighbour', '2-opt', 'nearest neighbour'),
+    ('2-opt from farthest insertion', '2-opt', 'farthest insertion'),
+    ('2-opt from cheapest insertion', '2-opt', 'cheapest insertion'),
+    ('Or-opt from greedy', 'or-opt', 'greedy'),
+    ('Or-opt from farthest insertion', 'or-opt', 'farthest insertion'),
+    ('Simulated Annealing #1', 'annealing', 0),
+    ('Simulated Annealing #2', 'annealing', 1),
+)
+
+_CONSTRUCTIONS = {
+    'greedy': greedy_edge_tour,
+    'nearest neighbour': nearest_neighbor_tour,
+    'nearest insertion': lambda dist: insertion_tour(dist, 'nearest'),
+    'farthest insertion': lambda dist: insertion_tour(dist, 'farthest'),
+    'cheapest insertion': lambda dist: insertion_tour(dist, 'cheapest'),
+}
+
+
+def _run_member(dist, search, start, seed, deadline, budget):
+    # Worker process of one member. 'deadline' is a time.time() value, which
+    # unlike time.perf_counter() is shared between processes; an annealing
+    # run also stops after 'budget' seconds.
+    local_deadline = Deadline(time.perf_counter() + max(0.0, deadline - time.time()))
+    rows = dist.tolist()
+    if search == 'annealing':
+        rng = random.Random(None if seed is None else seed + start)
+        rest = list(range(1, len(rows)))
+        rng.shuffle(rest)
+        tour = anneal_tour(
+            rows, [0] + rest, time_limit=budget, seed=None if seed is None else seed + start,
+            deadline=local_deadline
+        )
+    else:
+        tour = _CONSTRUCTIONS[start](dist)
+        if search == '2-opt':
+            tour = two_opt_tour(rows, tour, deadline=local_deadline)
+        else:
+            tour = improve_tour(rows, tour, [two_opt_tour, or_opt_tour], deadline=local_deadline)
+    return {
+        'status': 'success',
+        'tour': tour,
+        'length': tour_length(rows, tour),
+        'truncated': local_deadline.reached
+    }
+
+
+def portfolio_tour(dist, time_limit=PORTFOLIO_TIME_LIMIT_S, seed=None, members=PORTFOLIO_MEMBERS,
+                   max_workers=PORTFOLIO_WORKERS, on_progress=None):
+    """
+    Multi-start portfolio: runs every member search in its own worker process
+    on a shared copy of the matrix (see worker_pool.iter_tasks), all against
+    one deadline, and keeps the shortest tour. The local searches stop at the
+    deadline or when converged; the annealing runs share the time left to
+    them, so that with fewer workers than runs each still gets its part.
+
+    Args:
+        dist (np.ndarray): n x n distance matrix.
+        time_limit (float): Seconds until the deadline of all members.
+        seed (int, optional): Base seed of the annealing members.
+        members (tuple): (label, search, start) entries like PORTFOLIO_MEMBERS.
+        max_workers (int): Maximum number of members running at once.
+        on_progress (callable, optional): Called as on_progress(fraction, best_length)
+                                          whenever a member finishes.
+
+    Returns:
+        (list, list): The best tour and the statistics of every member:
+                      {'worker', 'status', 'distance', 'truncated',
+                      'compute_time_sec', 'best'} ('message' instead of
+                      'distance' and 'truncated' on errors); 'truncated'
+                      tells whether the deadline stopped the member.
+    """
+    n = len(dist)
+    if n < 4:
+        return list(range(n)), []
+    deadline = time.time() + time_limit
+    annealing = sum(1 for _, search, _ in members if search == 'annealing')
+    budget = time_limit / max(1, math.ceil(annealing / max(1, max_workers)))
+    tasks = [
+        (label, _run_member, (search, start, seed, deadline, budget), {})
+        for label, search, start in members
+    ]
+    stats = []
+    best, best_length = None, float('inf')
+    # Closed explicitly, so that the members stop at once when this runs in
+    # a worker that is terminated (see worker_pool._exit_on_sigterm).
+    events = iter_tasks(dist, tasks, time_limit + GRACE_S, max_workers)
+    try:
+        for _, label, result, seconds in events:
+            entry = {
+                'worker': label,
+                'status': result['status'],
+                'compute_time_sec': round(seconds, 3) if seconds is not None else None,
+                'best': False
+            }
+            if result['status'] == 'success':
+                entry['distance'] = result['length']
+                entry['truncated'] = result['truncated']
+                if result['length'] < best_length:
+                    best, best_length = result['tour'], result['length']
+            else:
+                entry['message'] = result['message']
+            stats.append(entry)
+            if on_progress is not None:
+                on_progress(len(stats) / len(tasks), best_length if best is not None else None)
+    finally:
+        events.close()
+
+    if best is None:
+        # Every member failed; fall back to a construction in this process.
+        best = greedy_edge_tour(dist)
+    else:
+        for entry in stats:
+            entry['best'] = entry.get('distance') == best_length
+    return best, stats
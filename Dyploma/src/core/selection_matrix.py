@@ -0,0 +1,166 @@
+#=====================================================
+# File: /src/core/selection_matrix.py
+#=====================================================
+
+import logging
+import math
+import queue
+import threading
+
+from src.core.distance_matrix import CachedPaths, cover_missing_pairs
+
+logger = logging.getLogger(__name__)
+
+# How long a route calculation waits for queued selection updates (seconds).
+# Kept short: without the matrix the route falls back to
+# compute_cached_distance_matrix, which takes the rows and columns the
+# worker has finished from the path cache and searches only the rest.
+WAIT_TIMEOUT_S = 1.0
+
+
+class SelectionMatrix:
+    """
+    Distance matrix of the currently selected points, kept up to date while
+    the user clicks on the map.
+
+    Adding a point queues a job for a background worker that computes only
+    the new row and column (one forward and one backward Dijkstra search,
+    less if the pairs are already in the path cache) and stores their paths
+    in the cache. Removing a point drops its row and column. When the route
+    is calculated, matrix_for() returns the finished matrix and no search
+    is needed.
+
+    A reset (new city, cleared selection) bumps 'generation', which makes
+    the worker discard jobs that were queued before it.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.csr = None
+        self.city_key = None
+        self.generation = 0
+        self.node_ids = []
+        self.distances = {}
+        self.pending = 0
+        self._cond = threading.Condition()
+        self._jobs = queue.Queue()
+        self._worker = None
+
+    def reset(self, csr=None, city_key=None):
+        """
+        Clears the selection and binds the matrix to a loaded city graph.
+        """
+        with self._cond:
+            self.generation += 1
+            self.csr = csr
+            self.city_key = city_key
+            self.node_ids = []
+            self.distances = {}
+            self._cond.notify_all()
+
+    def add(self, node_id):
+        """
+        Adds a selected node and queues the computation of its row and column.
+        """
+        with self._cond:
+            if self.city_key is None or node_id in self.node_ids:
+                return
+            self.node_ids.append(node_id)
+            self.pending += 1
+            self._jobs.put((self.generation, node_id))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='selection-matrix', daemon=True)
+                self._worker.start()
+
+    def remove(self, node_id):
+        """
+        Removes a node and its row and column from the matrix.
+        """
+        with self._cond:
+            if node_id not in self.node_ids:
+                return
+            self.node_ids.remove(node_id)
+            self.distances = {
+                pair: d for pair, d in self.distances.items() if node_id not in pair
+            }
+
+    def matrix_for(self, city_key, node_ids, timeout=WAIT_TIMEOUT_S):
+        """
+        Returns the distance matrix of node_ids once all queued updates are done.
+
+        Args:
+            city_key (str): City filename the request refers to.
+            node_ids (list): Node IDs (strings) in the order of the matrix rows.
+            timeout (float): Maximum time to wait for the background worker.
+
+        Returns:
+            list or None: The matrix, or None if the nodes are not all selected
+                          in this city or the worker did not finish in time.
+        """
+        with self._cond:
+            if city_key != self.city_key or not set(node_ids) <= set(self.node_ids):
+                return None
+            if not self._cond.wait_for(lambda: self.pending == 0, timeout):
+                logger.warning("Selection matrix not ready; computing the missing pairs directly.")
+                return None
+            distances = self.distances
+            matrix = []
+            for u in node_ids:
+                row = []
+                for v in node_ids:
+                    d = 0.0 if u == v else distances.get((u, v))
+                    if d is None:
+                        return None
+                    row.append(d)
+                matrix.append(row)
+            return matrix
+
+    def _run(self):
+        while True:
+            generation, node_id = self._jobs.get()
+            try:
+                self._update(generation, node_id)
+            except Exception as e:
+                logger.error(f"Selection matrix update for node {node_id} failed: {e}")
+            finally:
+                with self._cond:
+                    self.pending -= 1
+                    self._cond.notify_all()
+
+    def _update(self, generation, node_id):
+        with self._cond:
+            if generation != self.generation or node_id not in self.node_ids:
+                return
+            csr = self.csr
+            city_key = self.city_key
+            ids = [node_id] + [n for n in self.node_ids if n != node_id]
+
+        n = len(ids)
+        keys = [int(x) for x in ids]
+        indices = [csr.index_of[k] for k in keys]
+        pairs = [(0, j) for j in range(1, n)] + [(j, 0) for j in range(1, n)]
+        matrix = [[0.0] * n for _ in range(n)]
+        missing = []
+        for i, j in pairs:
+            d = self.cache.get(city_key, keys[i], keys[j])
+            if d is None:
+                missing.append((i, j))
+            else:
+                matrix[i][j] = d
+
+        trees = cover_missing_pairs(csr, ids, indices, missing, matrix) if missing else None
+        # Store the paths too, so that building the route geometry needs no search.
+        paths = CachedPaths(csr, self.cache, city_key, trees)
+        for i, j in missing:
+            if matrix[i][j] == math.inf:
+                self.cache.put(city_key, keys[i], keys[j], math.inf)
+            else:
+                paths.path(ids[i], ids[j])
+
+        with self._cond:
+            if generation != self.generation:
+                return
+            selected = set(self.node_ids)
+            for i, j in pairs:
+                if ids[i] in selected and ids[j] in selected:
+                    self.distances[(ids[i], ids[j])] = matrix[i][j]
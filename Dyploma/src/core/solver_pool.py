@@ -0,0 +1,82 @@
+#=====================================================
+# File: /src/core/solver_pool.py
+#=====================================================
+
+import os
+
+from src.core.algorithms import solve_tsp
+from src.core.worker_pool import iter_tasks
+
+SOLVER_TIMEOUT_S = 60.0              # Default time limit of one algorithm
+MAX_WORKERS = os.cpu_count() or 1    # Algorithms running at the same time
+PROGRESS_INTERVAL_S = 0.5            # Default seconds between progress events
+
+
+def iter_solvers(dist, node_ids, algorithms, seed=None, timeout=SOLVER_TIMEOUT_S,
+                 max_workers=MAX_WORKERS, progress_interval=None, time_limit=None):
+    """
+    Runs several TSP algorithms on the same distance matrix in parallel and
+    yields their events as they happen.
+
+    Every algorithm runs solve_tsp() in its own worker process on a shared
+    copy of the matrix, at most max_workers at a time (see
+    worker_pool.iter_tasks). A worker that exceeds 'timeout' is terminated
+    and its algorithm reported as timed out. The seconds reported for each
+    algorithm are measured in its worker around the solver alone.
+
+    Events:
+        ('progress', algorithm, {'elapsed_sec', 'fraction', 'best_distance'})
+            about every progress_interval seconds per running algorithm;
+            fraction and best_distance come from the solvers that report
+            progress (see solve_tsp) and are None otherwise.
+        ('result', algorithm, solve_tsp() result, seconds or None)
+            once per algorithm, in the order they finish.
+
+    Args:
+        dist (np.ndarray): n x n distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        algorithms (list): Algorithm names (see algorithms.solve_tsp).
+        seed (int, optional): Seed for the randomized algorithms.
+        timeout (float): Time limit of each algorithm in seconds.
+        max_workers (int): Maximum number of worker processes.
+        progress_interval (float, optional): Seconds between the progress
+                                             events of one algorithm; None
+                                             for no progress events.
+        time_limit (float, optional): Time limit passed to solve_tsp(), after
+                                      which the anytime solvers return their
+                                      best route so far; 'timeout' still
+                                      terminates a worker.
+
+    Yields:
+        tuple: The events described above.
+    """
+    tasks = [
+        (algorithm, solve_tsp, (node_ids, algorithm, seed), {'time_limit': time_limit})
+        for algorithm in algorithms
+    ]
+    yield from iter_tasks(dist, tasks, timeout, max_workers, progress_interval)
+
+
+def run_solvers(dist, node_ids, algorithms, seed=None, timeout=SOLVER_TIMEOUT_S,
+                max_workers=MAX_WORKERS):
+    """
+    Runs several TSP algorithms on the same distance matrix in parallel and
+    waits for all of them (see iter_solvers).
+
+    Args:
+        dist (np.ndarray): n x n distance matrix.
+        node_ids (list): The node IDs of the matrix rows.
+        algorithms (list): Algorithm names (see algorithms.solve_tsp).
+        seed (int, optional): Seed for the randomized algorithms.
+        timeout (float): Time limit of each algorithm in seconds.
+        max_workers (int): Maximum number of worker processes.
+
+    Returns:
+        dict: algorithm -> (solve_tsp() result, seconds or None).
+    """
+    return {
+        algorithm: (result, seconds)
+        for _, algorithm, result, seconds in iter_solvers(
+            dist, node_ids, algorithms, seed, timeout, max_workers
+        )
+    }
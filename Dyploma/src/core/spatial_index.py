@@ -0,0 +1,104 @@
+#=====================================================
+# File: /src/core/spatial_index.py
+#=====================================================
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry import box
+
+
+class EdgeLayer:
+    """
+    A set of edge geometries with an STR-tree and column-wise (lat, lon) points.
+
+    Attributes:
+        tree (STRtree): Tree over the geometries.
+        offsets (np.ndarray): The points of geometry i are
+            coords[offsets[i]:offsets[i + 1]].
+        coords (np.ndarray): (lat, lon) points of all geometries.
+    """
+
+    def __init__(self, geometries):
+        self.tree = STRtree(geometries)
+        points, owner = shapely.get_coordinates(geometries, return_index=True)
+        self.coords = points[:, ::-1].copy()
+        self.offsets = np.zeros(len(geometries) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owner, minlength=len(geometries)), out=self.offsets[1:])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def query(self, west, south, east, north):
+        """
+        Returns the sorted positions of the geometries that intersect the bounding box.
+        """
+        bbox = box(west, south, east, north)
+        return np.sort(self.tree.query(bbox, predicate='intersects'))
+
+    def to_json(self, positions):
+        """
+        Serializes the given geometries as [{'coords': [[lat, lon], ...]}, ...].
+        """
+        starts = self.offsets[positions].tolist()
+        ends = self.offsets[positions + 1].tolist()
+        coords = self.coords
+        return [{'coords': coords[s:e].tolist()} for s, e in zip(starts, ends)]
+
+
+class SpatialIndex:
+    """
+    Per-city spatial index over the node and edge GeoDataFrames.
+
+    Two STR-trees answer bounding box queries, and the coordinates needed
+    for the JSON responses are stored column-wise so that serialization
+    never touches the GeoDataFrames row by row.
+
+    Attributes:
+        edges (EdgeLayer): Full-detail edge geometries, in edges_gdf order.
+        node_tree (STRtree): Tree over the node points.
+        node_ids (list): Node IDs as strings, as sent to the frontend.
+        node_lat (np.ndarray): Node latitudes.
+        node_lon (np.ndarray): Node longitudes.
+    """
+
+    def __init__(self, nodes_gdf, edges_gdf):
+        self.edges = EdgeLayer(edges_gdf.geometry.values)
+
+        self.node_tree = STRtree(nodes_gdf.geometry.values)
+        self.node_ids = [str(n) for n in nodes_gdf.index.tolist()]
+        self.node_lat = nodes_gdf['y'].to_numpy(dtype=np.float64)
+        self.node_lon = nodes_gdf['x'].to_numpy(dtype=np.float64)
+
+    def query_edges(self, west, south, east, north):
+        """
+        Returns the positions of the edges that intersect the bounding box.
+        """
+        return self.edges.query(west, south, east, north)
+
+    def query_nodes(self, west, south, east, north):
+        """
+        Returns the positions of the nodes that lie within the bounding box.
+        """
+        bbox = box(west, south, east, north)
+        return np.sort(self.node_tree.query(bbox, predicate='intersects'))
+
+    def edges_to_json(self, positions):
+        """
+        Serializes the given edges as [{'coords': [[lat, lon], ...]}, ...].
+        """
+        return self.edges.to_json(positions)
+
+    def nodes_to_json(self, positions):
+        """
+        Serializes the given nodes as [{'id': ..., 'lat': ..., 'lon': ...}, ...].
+        """
+        ids = self.node_ids
+        return [
+            {'id': ids[p], 'lat': lat, 'lon': lon}
+            for p, lat, lon in zip(
+                positions.tolist(),
+                self.node_lat[positions].tolist(),
+                self.node_lon[positions].tolist()
+            )
+        ]
@@ -0,0 +1,192 @@
+#=====================================================
+# File: /src/core/tile_pyramid.py
+#=====================================================
+
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+import shapely
+
+from src.core.spatial_index import EdgeLayer
+
+# Road classes ordered from most to least important. Unknown classes rank last.
+HIGHWAY_RANK = {
+    'motorway': 0, 'motorway_link': 0,
+    'trunk': 1, 'trunk_link': 1,
+    'primary': 2, 'primary_link': 2,
+    'secondary': 3, 'secondary_link': 3,
+    'tertiary': 4, 'tertiary_link': 4,
+    'unclassified': 5, 'residential': 5,
+    'living_street': 6, 'service': 6,
+}
+UNKNOWN_RANK = 7
+
+# Level-of-detail bands: (min_zoom, max_rank, simplify tolerance in degrees).
+# A band applies from its min_zoom up to the next band's min_zoom.
+ZOOM_BANDS = [
+    (0, 2, 0.0005),
+    (11, 4, 0.0002),
+    (14, 5, 0.00005),
+    (16, UNKNOWN_RANK, 0.0),
+]
+
+MAX_EDGES_PER_TILE = 1500          # Upper bound on the features of a single tile
+MAX_EDGES_PER_RESPONSE = 5000      # Upper bound on a get_edges_in_bounds payload
+MAX_TILES_PER_REQUEST = 64         # Coarser tiles are used for larger viewports
+TILE_CACHE_SIZE = 4096             # Tiles kept per city
+MAX_LATITUDE = 85.05112878         # Web Mercator limit
+
+
+def tile_bounds(z, x, y):
+    """
+    Returns (west, south, east, north) of the z/x/y slippy map tile in degrees.
+    """
+    n = 2 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+
+def tile_xy(z, lon, lat):
+    """
+    Returns the (x, y) of the slippy map tile at zoom z that contains the point.
+    """
+    n = 2 ** z
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return max(0, min(n - 1, x)), max(0, min(n - 1, y))
+
+
+def _highway_name(value):
+    # OSM ways can carry several highway tags; the first one is used.
+    if isinstance(value, list):
+        return value[0] if value else ''
+    return value if isinstance(value, str) else ''
+
+
+class TilePyramid:
+    """
+    Per-city level-of-detail pyramid for the map edges.
+
+    For every zoom band the edges are filtered by road class and their
+    geometries simplified once when the city is loaded. Tiles keyed by z/x/y
+    are cut from the band of their zoom on first use and kept in an LRU
+    cache; each tile holds at most MAX_EDGES_PER_TILE edges, the most
+    important (then longest) roads first.
+    """
+
+    def __init__(self, edges_gdf, spatial_index):
+        ranks = np.array(
+            [HIGHWAY_RANK.get(_highway_name(h), UNKNOWN_RANK) for h in edges_gdf['highway'].tolist()]
+            if 'highway' in edges_gdf.columns else [UNKNOWN_RANK] * len(edges_gdf),
+            dtype=np.int8
+        )
+        lengths = (
+            edges_gdf['length'].to_numpy(dtype=np.float64)
+            if 'length' in edges_gdf.columns else np.zeros(len(edges_gdf))
+        )
+        geometries = edges_gdf.geometry.values
+
+        # Each band: (min_zoom, EdgeLayer, priority of each layer geometry).
+        self.bands = []
+        for min_zoom, max_rank, tolerance in ZOOM_BANDS:
+            positions = np.flatnonzero(ranks <= max_rank)
+            if len(positions) == len(ranks) and tolerance == 0:
+                # Full detail: reuse the city's spatial index.
+                layer = spatial_index.edges
+            else:
+                simplified = shapely.simplify(geometries[positions], tolerance)
+                layer = EdgeLayer(simplified)
+            # Lower value = higher priority when a tile has to be truncated.
+            priority = np.lexsort((-lengths[positions], ranks[positions]))
+            order = np.empty(len(positions), dtype=np.int64)
+            order[priority] = np.arange(len(positions))
+            self.bands.append((min_zoom, layer, order))
+
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def band_for_zoom(self, zoom):
+        """
+        Returns (band number, EdgeLayer, priority) for a map zoom level.
+        """
+        chosen = 0
+        for i, (min_zoom, _, _) in enumerate(self.bands):
+            if zoom >= min_zoom:
+                chosen = i
+        _, layer, order = self.bands[chosen]
+        return chosen, layer, order
+
+    def tile_positions(self, z, x, y, band=None):
+        """
+        Returns the layer positions of the edges in tile z/x/y.
+
+        Args:
+            z, x, y (int): Tile coordinates.
+            band (int, optional): Band to cut from; defaults to the band of z.
+
+        Returns:
+            (EdgeLayer, np.ndarray): The band layer and the sorted positions.
+        """
+        if band is None:
+            band = self.band_for_zoom(z)[0]
+        _, layer, order = self.bands[band]
+        key = (band, z, x, y)
+        with self._lock:
+            positions = self._tiles.get(key)
+            if positions is not None:
+                self._tiles.move_to_end(key)
+                return layer, positions
+
+        positions = layer.query(*tile_bounds(z, x, y))
+        if len(positions) > MAX_EDGES_PER_TILE:
+            keep = np.argsort(order[positions], kind='stable')[:MAX_EDGES_PER_TILE]
+            positions = np.sort(positions[keep])
+
+        with self._lock:
+            self._tiles[key] = positions
+            if len(self._tiles) > TILE_CACHE_SIZE:
+                self._tiles.popitem(last=False)
+        return layer, positions
+
+    def tile_json(self, z, x, y):
+        """
+        Serializes tile z/x/y as [{'coords': [[lat, lon], ...]}, ...].
+        """
+        layer, positions = self.tile_positions(z, x, y)
+        return layer.to_json(positions)
+
+    def edges_in_bounds(self, west, south, east, north, zoom):
+        """
+        Collects the edges of every tile that covers the bounding box.
+        Edges shared by neighbouring tiles are returned once, and the result
+        never exceeds MAX_EDGES_PER_RESPONSE edges.
+
+        Returns:
+            list: [{'coords': [[lat, lon], ...]}, ...]
+        """
+        band, layer, order = self.band_for_zoom(zoom)
+
+        # Use coarser tiles when the viewport would need too many of them.
+        z = max(0, min(int(zoom), 22))
+        while True:
+            x0, y0 = tile_xy(z, west, north)
+            x1, y1 = tile_xy(z, east, south)
+            if (x1 - x0 + 1) * (y1 - y0 + 1) <= MAX_TILES_PER_REQUEST or z == 0:
+                break
+            z -= 1
+
+        parts = [
+            self.tile_positions(z, x, y, band)[1]
+            for x in range(x0, x1 + 1)
+            for y in range(y0, y1 + 1)
+        ]
+        positions = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        if len(positions) > MAX_EDGES_PER_RESPONSE:
+            keep = np.argsort(order[positions], kind='stable')[:MAX_EDGES_PER_RESPONSE]
+            positions = np.sort(positions[keep])
+        return layer.to_json(positions)
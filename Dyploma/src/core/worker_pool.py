@@ -0,0 +1,181 @@
+#=====================================================
+# File: /src/core/worker_pool.py
+#=====================================================
+
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STOP_GRACE_S = 2.0   # Time a terminated worker gets to clean up before it is killed
+
+
+def _exit_on_sigterm(signum, frame):
+    # Process.terminate() sends SIGTERM, which by default ends the process
+    # without running 'finally' blocks. A task that runs workers of its own
+    # (see portfolio.portfolio_tour) needs them to stop those workers and
+    # to unlink its shared memory.
+    raise SystemExit(1)
+
+
+def _stop(process):
+    # Terminates a worker and waits for it; one stuck in native code past
+    # STOP_GRACE_S is killed.
+    process.terminate()
+    process.join(STOP_GRACE_S)
+    if process.is_alive():
+        process.kill()
+        process.join()
+
+
+def _run_shared(conn, shm_name, shape, key, fn, args, kwargs, progress_interval):
+    # Worker process: reads the matrix from shared memory, runs one task
+    # and sends ('progress', fraction, best length) at most every
+    # progress_interval seconds (if given), then ('result', result, seconds).
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        dist = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        if progress_interval is not None:
+            last_sent = [float('-inf')]
+
+            def on_progress(fraction, best_length):
+                now = time.monotonic()
+                if now - last_sent[0] >= progress_interval:
+                    last_sent[0] = now
+                    conn.send(('progress', fraction, best_length))
+
+            kwargs = dict(kwargs, on_progress=on_progress)
+        start = time.perf_counter()
+        try:
+            result = fn(dist, *args, **kwargs)
+        except Exception as e:
+            result = {'status': 'error', 'message': f'{key} failed: {e}'}
+        seconds = time.perf_counter() - start
+        del dist
+        conn.send(('result', result, seconds))
+    finally:
+        shm.close()
+        conn.close()
+
+
+def _progress_info(started, fraction, best_length):
+    return {
+        'elapsed_sec': round(time.monotonic() - started, 3),
+        'fraction': None if fraction is None else round(min(1.0, fraction), 4),
+        'best_distance': None if best_length is None else float(best_length)
+    }
+
+
+def iter_tasks(dist, tasks, timeout, max_workers, progress_interval=None):
+    """
+    Runs tasks on the same distance matrix in parallel worker processes and
+    yields their events as they happen.
+
+    The matrix is copied once into shared memory. A task (key, fn, args,
+    kwargs) runs fn(dist, *args, **kwargs) in its own process, at most
+    max_workers at a time; fn must be a module-level function and returns a
+    picklable result. With a progress_interval, fn also gets an on_progress
+    keyword argument that it may call as on_progress(fraction, best_length).
+    A worker that exceeds 'timeout' is terminated and its task reported as
+    timed out. Terminated workers run their 'finally' blocks, so a task may
+    itself use iter_tasks() as long as it closes the generator.
+    The seconds reported for each task are measured in its worker around fn.
+
+    Events:
+        ('progress', key, {'elapsed_sec', 'fraction', 'best_distance'})
+            about every progress_interval seconds per running task; fraction
+            and best_distance are the last values the task reported, or None.
+        ('result', key, result, seconds or None)
+            once per task, in the order they finish; a task that fails,
+            crashes or times out gets {'status': 'error', 'message': ...}.
+
+    Args:
+        dist (np.ndarray): n x n distance matrix.
+        tasks (list): (key, fn, args, kwargs) tuples with distinct keys.
+        timeout (float): Time limit of each task in seconds.
+        max_workers (int): Maximum number of worker processes.
+        progress_interval (float, optional): Seconds between the progress
+                                             events of one task; None for
+                                             no progress events.
+
+    Yields:
+        tuple: The events described above.
+    """
+    dist = np.ascontiguousarray(dist, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(dist.nbytes, 1))
+    running = {}    # receiving end -> (key, process, start, deadline)
+    reported = {}   # receiving end -> (time of the last progress event, fraction, best length)
+    try:
+        shared = np.ndarray(dist.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = dist
+        del shared
+
+        pending = list(tasks)
+        while pending or running:
+            while pending and len(running) < max(1, max_workers):
+                key, fn, args, kwargs = pending.pop(0)
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(
+                    target=_run_shared,
+                    args=(sender, shm.name, dist.shape, key, fn, args, kwargs, progress_interval),
+                    name=f'worker-{key}'
+                )
+                process.start()
+                sender.close()
+                now = time.monotonic()
+                running[receiver] = (key, process, now, now + timeout)
+                reported[receiver] = (now, None, None)
+
+            wait_time = min(deadline for _, _, _, deadline in running.values()) - time.monotonic()
+            if progress_interval is not None:
+                wait_time = min(wait_time, progress_interval)
+            for receiver in wait(list(running), max(0.0, wait_time)):
+                key, process, started, _ = running[receiver]
+                try:
+                    message = receiver.recv()
+                except EOFError:
+                    logger.error(f"Worker process for {key} exited with code {process.exitcode}")
+                    message = ('result', {'status': 'error', 'message': f'{key} crashed'}, None)
+                if message[0] == 'progress':
+                    _, fraction, best_length = message
+                    reported[receiver] = (time.monotonic(), fraction, best_length)
+                    yield 'progress', key, _progress_info(started, fraction, best_length)
+                    continue
+                del running[receiver], reported[receiver]
+                receiver.close()
+                process.join()
+                yield 'result', key, message[1], message[2]
+
+            now = time.monotonic()
+            if progress_interval is not None:
+                # Tasks that report nothing (or rarely) still get a progress
+                # event every interval, repeating their last known values.
+                for receiver, (key, _, started, _) in list(running.items()):
+                    last, fraction, best_length = reported[receiver]
+                    if now - last >= progress_interval:
+                        reported[receiver] = (now, fraction, best_length)
+                        yield 'progress', key, _progress_info(started, fraction, best_length)
+                now = time.monotonic()
+            for receiver, (key, process, _, deadline) in list(running.items()):
+                if now >= deadline:
+                    _stop(process)
+                    receiver.close()
+                    del running[receiver], reported[receiver]
+                    yield 'result', key, {
+                        'status': 'error',
+                        'message': f'{key} timed out after {timeout:g} s'
+                    }, None
+    finally:
+        # Also reached when the consumer stops early (e.g. a closed stream).
+        for receiver, (_, process, _, _) in running.items():
+            _stop(process)
+            receiver.close()
+        shm.close()
+        shm.unlink()